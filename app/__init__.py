@@ -16,42 +16,106 @@ db = SQLAlchemy()
 login_manager = LoginManager()
 csrf = CSRFProtect()
 
-def create_app():
+def create_app(config_class=DevelopmentConfig):
+    # Duração de cada etapa da inicialização (flask --app wsgi startup-profile)
+    from app.utils.startup_profiler import startup_profiler
+    startup_profiler.start()
+
     app = Flask(__name__)
 
-    # Carregar configurações
-    app.config.from_object(DevelopmentConfig)
+    # Carregar configurações (ProductionConfig no ponto de entrada WSGI de produção)
+    app.config.from_object(config_class)
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or 'sua_chave_secreta_aqui'
 
-    # Tentar configurar o banco de dados local, com fallback para SQLite em caso de erro
-    try:
-        # Verificar se as variáveis essenciais do banco de dados estão definidas
-        local_db_user = os.environ.get('LOCAL_DB_USER') or os.environ.get('DB_USER')
-        local_db_password = os.environ.get('LOCAL_DB_PASSWORD') or os.environ.get('DB_PASSWORD')
-
-        if local_db_user and local_db_password:
-            app.config['SQLALCHEMY_DATABASE_URI'] = DevelopmentConfig.get_local_database_uri()
+    # Banco definido pela própria classe de configuração (testes): não usar as variáveis de ambiente
+    if not app.config.get('SQLALCHEMY_DATABASE_URI'):
+        # Tentar configurar o banco de dados local, com fallback para SQLite em caso de erro
+        try:
+            # Verificar se as variáveis essenciais do banco de dados estão definidas
+            local_db_user = os.environ.get('LOCAL_DB_USER') or os.environ.get('DB_USER')
+            local_db_password = os.environ.get('LOCAL_DB_PASSWORD') or os.environ.get('DB_PASSWORD')
+
+            if local_db_user and local_db_password:
+                app.config['SQLALCHEMY_DATABASE_URI'] = DevelopmentConfig.get_local_database_uri()
+                app.config['SQLALCHEMY_BINDS'] = {
+                    'local': DevelopmentConfig.get_local_database_uri(),
+                    'online': DevelopmentConfig.get_online_database_uri()
+                }
+            else:
+                raise ValueError("Variáveis de ambiente do banco de dados não configuradas")
+        except (ValueError, TypeError) as e:
+            # Em caso de erro nas variáveis de ambiente do banco de dados, usar SQLite para testes
+            print(f"Erro nas variáveis de ambiente do banco de dados: {e}")
+            print("Usando banco de dados SQLite para testes...")
+            app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///fallback.db'
             app.config['SQLALCHEMY_BINDS'] = {
-                'local': DevelopmentConfig.get_local_database_uri(),
-                'online': DevelopmentConfig.get_online_database_uri()
+                'local': 'sqlite:///fallback_local.db',
+                'online': 'sqlite:///fallback_online.db'
             }
-        else:
-            raise ValueError("Variáveis de ambiente do banco de dados não configuradas")
-    except (ValueError, TypeError) as e:
-        # Em caso de erro nas variáveis de ambiente do banco de dados, usar SQLite para testes
-        print(f"Erro nas variáveis de ambiente do banco de dados: {e}")
-        print("Usando banco de dados SQLite para testes...")
-        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///fallback.db'
-        app.config['SQLALCHEMY_BINDS'] = {
-            'local': 'sqlite:///fallback_local.db',
-            'online': 'sqlite:///fallback_online.db'
-        }
+
+    startup_profiler.mark('config')
 
     # Inicializar extensões com app
     db.init_app(app)
     login_manager.init_app(app)
     csrf.init_app(app)  # Adiciona proteção CSRF
     login_manager.login_view = 'auth.login'
+    startup_profiler.mark('extensions')
+
+    # Engines compartilhados dos bancos local e online (sessões removidas ao final de cada requisição)
+    from app.database_manager import database_manager
+    database_manager.init_app(app)
+
+    # Pipeline assíncrono de registro de atividades dos usuários
+    from app.utils.logger import activity_logger
+    activity_logger.init_app(app)
+
+    # Cache de veredictos de licença
+    from app.utils.license_cache import license_cache
+    license_cache.init_app(app)
+
+    # Cache dos usuários autenticados (user_loader do Flask-Login)
+    from app.utils.user_cache import user_cache
+    user_cache.init_app(app)
+
+    # Revalidação online de licenças em background, protegida por disjuntores
+    from app.utils.license_manager import license_manager
+    from app.utils.license_refresher import license_refresher
+    license_manager.init_app(app)
+    license_refresher.init_app(app)
+
+    # Estatísticas do dashboard calculadas no banco com cache de curta duração
+    from app.utils.dashboard_stats import dashboard_stats
+    dashboard_stats.init_app(app)
+
+    # Resumo do painel do gerente (consultas agregadas em cache por gerente)
+    from app.utils.manager_summary import manager_summary
+    manager_summary.init_app(app)
+
+    # Contagem e tempo dos comandos SQL por requisição, com log dos comandos lentos
+    from app.utils.query_profiler import query_profiler
+    query_profiler.init_app(app)
+
+    # Métricas do processo (latência por endpoint, pools, caches e contadores de negócio) em /metrics
+    from app.utils.metrics import metrics
+    metrics.init_app(app)
+
+    # Índice em memória para a busca de produtos
+    from app.utils.product_search import product_search
+    product_search.init_app(app)
+
+    # Snapshot comprimido do catálogo de produtos para os terminais
+    from app.utils.catalog_snapshot import catalog_snapshot
+    catalog_snapshot.init_app(app)
+
+    # Fechamento de vendas com baixa de estoque atômica
+    from app.utils.checkout import checkout_service
+    checkout_service.init_app(app)
+
+    # Descarte dos engines após o fork dos workers e encerramento gracioso do processo
+    from app.lifecycle import process_lifecycle
+    process_lifecycle.init_app(app)
+    startup_profiler.mark('services')
 
     # Definir o contexto do template para ter acesso ao current_user
     @app.context_processor
@@ -90,12 +154,21 @@ def create_app():
     from app.routes.credit import bp as credit_bp
     app.register_blueprint(credit_bp)
 
+    from app.routes.admin import bp as admin_bp
+    app.register_blueprint(admin_bp)
+    startup_profiler.mark('blueprints')
+
+    # Registrar comandos de linha de comando
+    from app.commands import register_commands
+    register_commands(app)
+
     # Registrar blueprint de debug (somente para desenvolvimento)
-    try:
-        from app.routes.debug import bp as debug_bp
-        app.register_blueprint(debug_bp)
-    except ImportError:
-        pass
+    if app.debug:
+        try:
+            from app.routes.debug import bp as debug_bp
+            app.register_blueprint(debug_bp)
+        except ImportError:
+            pass
 
     # Adicionar tratamento de erro global para erros de banco de dados
     @app.errorhandler(Exception)
@@ -103,4 +176,5 @@ def create_app():
         app.logger.error(f"Erro não tratado: {e}")
         return "Ocorreu um erro no servidor. Verifique as configurações do banco de dados.", 500
 
+    startup_profiler.mark('commands')
     return app
\ No newline at end of file
@@ -0,0 +1,65 @@
+import os
+from werkzeug.security import generate_password_hash
+from app import db
+
+
+def prepare_database(app, echo=print):
+    """
+    Prepara o banco de dados local: aplica as migrações pendentes, gera o resumo diário de
+    vendas para o histórico existente e cria o usuário admin se ainda não existir.
+    Em produção é executado uma única vez, antes de iniciar os workers
+    (flask --app wsgi prepare-db); o servidor de desenvolvimento (run.py) o executa ao iniciar.
+    Retorna False se algum passo falhou.
+    """
+    ok = True
+    with app.app_context():
+        # Aplicar as migrações pendentes do esquema; com o esquema atualizado
+        # a verificação é uma única consulta à tabela schema_version
+        from app import migrations
+        try:
+            if not migrations.is_current():
+                for version, name in migrations.upgrade():
+                    echo(f'Migração {version} aplicada: {name}')
+                echo('Banco de dados local atualizado com sucesso!')
+        except Exception as migration_error:
+            echo(f'Erro durante a atualização do banco de dados local: {migration_error}')
+            db.session.rollback()
+            ok = False
+
+        # Gerar o resumo diário de vendas para o histórico existente (primeira execução após atualização)
+        try:
+            from app.utils import sales_rollup
+            if sales_rollup.needs_backfill():
+                rows = sales_rollup.rebuild()
+                echo(f'Resumo diário de vendas gerado: {rows} linha(s).')
+        except Exception as rollup_error:
+            echo(f'Erro ao gerar o resumo diário de vendas: {rollup_error}')
+            db.session.rollback()
+            ok = False
+
+        # Verificar se o usuário admin já existe, caso contrário, criar
+        from app.models import User
+        admin_user = User.query.filter_by(username='admin').first()
+        if not admin_user:
+            # Verificar se as variáveis de ambiente para o usuário admin estão definidas
+            admin_username = os.environ.get('ADMIN_USERNAME', 'admin')
+            admin_password = os.environ.get('ADMIN_PASSWORD', 'admin123')
+            admin_email = os.environ.get('ADMIN_EMAIL', 'admin@localhost.com')
+
+            # Criar usuário admin com permissões
+            new_admin = User(
+                username=admin_username,
+                email=admin_email,
+                password=generate_password_hash(admin_password),
+                is_admin=True,
+                role='admin'
+            )
+
+            db.session.add(new_admin)
+            db.session.commit()
+            echo(f"Usuário admin '{admin_username}' criado com sucesso!")
+            echo(f"Login: {admin_username}")
+            echo(f"Senha: {admin_password} (recomenda-se alterar após o primeiro acesso)")
+        else:
+            echo(f"Usuário admin '{admin_user.username}' já existe.")
+    return ok
\ No newline at end of file
@@ -0,0 +1,178 @@
+import click
+
+
+def register_commands(app):
+    """Registra os comandos de linha de comando da aplicação (flask --app run <comando>)"""
+
+    @app.cli.command('rebuild-sales-rollup')
+    @click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Primeiro dia a reconstruir (AAAA-MM-DD).')
+    @click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Dia final, exclusivo (AAAA-MM-DD).')
+    def rebuild_sales_rollup_command(start, end):
+        """Reconstrói o resumo diário de vendas a partir das vendas registradas"""
+        from app.utils.sales_rollup import rebuild
+        rows = rebuild(start.date() if start else None, end.date() if end else None)
+        click.echo(f'Resumo diário de vendas reconstruído: {rows} linha(s).')
+
+    @app.cli.command('db-upgrade')
+    def db_upgrade_command():
+        """Aplica as migrações pendentes do esquema do banco de dados local"""
+        from app import migrations
+        applied = migrations.upgrade()
+        for version, name in applied:
+            click.echo(f'Migração {version} aplicada: {name}')
+        click.echo(f'Esquema na versão {migrations.latest_version()}.')
+
+    @app.cli.command('prepare-db')
+    def prepare_db_command():
+        """Aplica as migrações, gera o resumo diário de vendas pendente e cria o usuário admin"""
+        from app.bootstrap import prepare_database
+        if not prepare_database(app, echo=click.echo):
+            raise SystemExit(1)
+
+    @app.cli.command('db-status')
+    def db_status_command():
+        """Mostra a versão do esquema e as migrações pendentes"""
+        from app import migrations
+        current = migrations.current_version()
+        click.echo(f'Versão aplicada: {current if current is not None else "nenhuma"}')
+        click.echo(f'Versão mais recente: {migrations.latest_version()}')
+        for version, name in migrations.pending():
+            click.echo(f'Pendente: {version} - {name}')
+
+    @app.cli.command('reconcile-cashiers')
+    @click.option('--all', 'include_closed', is_flag=True, help='Verificar também os caixas fechados.')
+    @click.option('--fix', is_flag=True, help='Corrigir os contadores divergentes.')
+    def reconcile_cashiers_command(include_closed, fix):
+        """Verifica os contadores dos caixas (vendas, despesas e saldo) contra a soma das transações"""
+        from app.utils.cashier_ledger import reconcile
+        drifts = reconcile(include_closed=include_closed, fix=fix)
+        for drift in drifts:
+            click.echo(f"Caixa {drift['cashier_id']}: {drift['field']} = {drift['counter']:.2f}, "
+                       f"esperado {drift['expected']:.2f}")
+        if not drifts:
+            click.echo('Nenhuma divergência encontrada.')
+        elif fix:
+            click.echo(f'{len(drifts)} contador(es) corrigido(s).')
+
+    @app.cli.command('reconcile-customer-debts')
+    @click.option('--fix', is_flag=True, help='Corrigir as dívidas divergentes.')
+    def reconcile_customer_debts_command(fix):
+        """Verifica a dívida de cada cliente fiado contra a soma dos consumos pendentes"""
+        from app.utils.credit_ledger import reconcile
+        drifts = reconcile(fix=fix)
+        for drift in drifts:
+            click.echo(f"Cliente {drift['customer_id']}: dívida = {drift['counter']:.2f}, "
+                       f"esperado {drift['expected']:.2f}")
+        if not drifts:
+            click.echo('Nenhuma divergência encontrada.')
+        elif fix:
+            click.echo(f'{len(drifts)} dívida(s) corrigida(s).')
+
+    @app.cli.command('license-stub-server')
+    @click.option('--port', type=int, default=5099, help='Porta do servidor local.')
+    @click.option('--valid-key', 'valid_keys', multiple=True, help='Chave de licença considerada válida.')
+    @click.option('--delay', type=float, default=0.0, help='Atraso (segundos) de cada resposta.')
+    @click.option('--status', 'status_code', type=int, default=200, help='Código HTTP das respostas (ex.: 503).')
+    def license_stub_server_command(port, valid_keys, delay, status_code):
+        """Inicia um servidor local que imita a API de validação de licenças"""
+        from app.utils.license_stub_server import LicenseStubServer
+        server = LicenseStubServer(port=port, valid_keys=valid_keys, delay=delay, status_code=status_code)
+        click.echo(f'Servidor de licenças local em http://127.0.0.1:{port} (use ONLINE_SERVER_URL)')
+        server.serve_forever()
+
+    @app.cli.command('benchmark-seed')
+    @click.option('--products', type=int, default=200, help='Quantidade de produtos.')
+    @click.option('--users', type=int, default=5, help='Quantidade de usuários (um caixa por usuário por dia).')
+    @click.option('--years', type=int, default=1, help='Anos de histórico de vendas.')
+    @click.option('--sales-per-day', type=int, default=40, help='Média de vendas por usuário por dia.')
+    @click.option('--customers', type=int, default=50, help='Quantidade de clientes fiado.')
+    @click.option('--seed', type=int, default=42, help='Semente do gerador (mesma semente, mesmos dados).')
+    def benchmark_seed_command(products, users, years, sales_per_day, customers, seed):
+        """Gera uma loja sintética determinística no banco configurado (que deve estar vazio)"""
+        from app.utils.synthetic_store import SyntheticStore, SYNTHETIC_PASSWORD
+        store = SyntheticStore(products=products, users=users, years=years, sales_per_day=sales_per_day,
+                               customers=customers, seed=seed)
+        try:
+            counts = store.generate()
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        for table, count in sorted(counts.items()):
+            click.echo(f'{table}: {count} linha(s)')
+        click.echo(f"Usuários bench_manager e bench_user1..{users} criados (senha '{SYNTHETIC_PASSWORD}').")
+
+    @app.cli.command('benchmark')
+    @click.option('--iterations', type=int, default=50, help='Requisições medidas por cenário.')
+    @click.option('--warmup', type=int, default=5, help='Requisições de aquecimento (não medidas) por cenário.')
+    @click.option('--only', 'only', multiple=True, help='Executar apenas o cenário ou endpoint informado.')
+    @click.option('--label', default=None, help='Identificação do relatório (ex.: o commit medido).')
+    @click.option('--output', type=click.Path(dir_okay=False), default=None, help='Arquivo JSON do relatório.')
+    @click.option('--compare', 'baseline_path', type=click.Path(exists=True, dir_okay=False), default=None,
+                  help='Relatório anterior para comparação; encerra com erro se houver regressões.')
+    @click.option('--threshold', type=float, default=0.2, help='Aumento tolerado do p95 (fração) na comparação.')
+    def benchmark_command(iterations, warmup, only, label, output, baseline_path, threshold):
+        """Mede latência, consultas por requisição e memória dos endpoints mais usados"""
+        from app.utils.benchmark import Benchmark, compare, save_report, load_report
+
+        def progress(name, result):
+            click.echo(f"{name}: p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, "
+                       f"p99 {result['p99_ms']:.2f} ms, {result['queries_per_request']} consulta(s)/req, "
+                       f"erros {result['errors']}")
+
+        benchmark = Benchmark(app, iterations=iterations, warmup=warmup)
+        try:
+            report = benchmark.run(only=only, label=label, progress=progress)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        peak = max((result['peak_rss_kb'] or 0 for result in report['endpoints'].values()), default=0)
+        if peak:
+            click.echo(f'Pico de memória do processo: {peak / 1024:.1f} MB')
+        if output:
+            save_report(report, output)
+            click.echo(f'Relatório gravado em {output}')
+
+        if baseline_path:
+            regressions = compare(load_report(baseline_path), report, threshold=threshold)
+            for regression in regressions:
+                click.echo(f'Regressão: {regression}')
+            if regressions:
+                raise SystemExit(1)
+            click.echo('Nenhuma regressão encontrada.')
+
+    @app.cli.command('startup-profile')
+    @click.option('--target', default='wsgi', help='Módulo do ponto de entrada (com a variável app).')
+    @click.option('--top', type=int, default=15, help='Quantidade de módulos e pacotes listados.')
+    @click.option('--budget', type=float, default=None,
+                  help='Tempo máximo (ms) até a aplicação estar pronta; padrão STARTUP_BUDGET_MS.')
+    @click.option('--output', type=click.Path(dir_okay=False), default=None, help='Arquivo JSON do relatório.')
+    def startup_profile_command(target, top, budget, output):
+        """Mede a partida a frio: importação por módulo e duração de cada etapa do create_app"""
+        from app.utils.startup_profiler import profile_cold_start
+        from app.utils.benchmark import save_report
+        try:
+            report = profile_cold_start(target, top=top)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+
+        click.echo(f"Aplicação pronta em {report['ready_ms']:.1f} ms "
+                   f"(importações {report['import_ms']:.1f} ms, create_app {report['create_app_ms']:.1f} ms; "
+                   f"processo {report['process_ms']:.1f} ms)")
+        click.echo('Etapas do create_app:')
+        for step in report['steps']:
+            click.echo(f"  {step['step']}: {step['ms']:.1f} ms")
+        click.echo('Pacotes (tempo de importação próprio):')
+        for package in report['packages']:
+            click.echo(f"  {package['package']}: {package['ms']:.1f} ms")
+        click.echo('Módulos mais lentos:')
+        for module in report['modules']:
+            click.echo(f"  {module['module']}: {module['self_ms']:.1f} ms "
+                       f"(com dependências {module['cumulative_ms']:.1f} ms)")
+        if output:
+            save_report(report, output)
+            click.echo(f'Relatório gravado em {output}')
+
+        budget = budget if budget is not None else app.config.get('STARTUP_BUDGET_MS')
+        if budget and report['ready_ms'] > budget:
+            click.echo(f"Orçamento de inicialização excedido: {report['ready_ms']:.1f} ms > {budget:.0f} ms")
+            raise SystemExit(1)
\ No newline at end of file
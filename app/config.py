@@ -86,22 +86,80 @@ class DatabaseConfig:
         return f'mysql+pymysql://{ONLINE_DB_USER}:{ONLINE_DB_PASSWORD}@{ONLINE_DB_HOST}:{ONLINE_DB_PORT}/{ONLINE_DB_NAME}'
 
     # Opções adicionais para melhorar desempenho
+    # (um único engine por banco e por processo; tamanhos do pool configuráveis pelo .env)
     LOCAL_ENGINE_OPTIONS = {
         'poolclass': QueuePool,
-        'pool_size': 10,
+        'pool_size': int(os.environ.get('LOCAL_DB_POOL_SIZE', 10)),
         'pool_recycle': 280,
         'pool_pre_ping': True,
-        'max_overflow': 20
+        'max_overflow': int(os.environ.get('LOCAL_DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.environ.get('LOCAL_DB_POOL_TIMEOUT', 30))
     }
 
     ONLINE_ENGINE_OPTIONS = {
         'poolclass': QueuePool,
-        'pool_size': 5,  # Menor pool para validações online
+        'pool_size': int(os.environ.get('ONLINE_DB_POOL_SIZE', 5)),  # Menor pool para validações online
         'pool_recycle': 280,
         'pool_pre_ping': True,
-        'max_overflow': 10
+        'max_overflow': int(os.environ.get('ONLINE_DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('ONLINE_DB_POOL_TIMEOUT', 10))  # Não prender a requisição esperando o servidor de licenças
     }
 
+    # Registro de atividades dos usuários (fila em memória + gravação em lote)
+    ACTIVITY_LOG_QUEUE_SIZE = int(os.environ.get('ACTIVITY_LOG_QUEUE_SIZE', 10000))
+    ACTIVITY_LOG_BATCH_SIZE = int(os.environ.get('ACTIVITY_LOG_BATCH_SIZE', 200))
+    ACTIVITY_LOG_FLUSH_INTERVAL = float(os.environ.get('ACTIVITY_LOG_FLUSH_INTERVAL', 1.0))
+    ACTIVITY_LOG_TO_DB = os.environ.get('ACTIVITY_LOG_TO_DB', 'false').lower() in ('1', 'true', 'yes')
+
+    # Tempo máximo (em segundos) para gravar as atividades pendentes no encerramento do processo
+    SHUTDOWN_TIMEOUT = float(os.environ.get('SHUTDOWN_TIMEOUT', 5.0))
+
+    # Orçamento (em milissegundos) da partida a frio do ponto de entrada (flask --app wsgi startup-profile)
+    STARTUP_BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', 1500))
+
+    # Tempo (em segundos) que um veredicto de licença permanece em cache
+    LICENSE_CACHE_TTL = int(os.environ.get('LICENSE_CACHE_TTL', 60))
+
+    # Tempo (em segundos) que o registro de um usuário autenticado permanece em cache
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+
+    # Revalidação online de licenças em background
+    LICENSE_REFRESH_INTERVAL = int(os.environ.get('LICENSE_REFRESH_INTERVAL', 300))  # Segundos entre tentativas
+    LICENSE_API_TIMEOUT = float(os.environ.get('LICENSE_API_TIMEOUT', 10))
+    LICENSE_FIRST_CHECK_WAIT = float(os.environ.get('LICENSE_FIRST_CHECK_WAIT', 1.5))  # Espera máxima da requisição pela primeira validação
+    LICENSE_GRACE_PERIOD_DAYS = int(os.environ.get('LICENSE_GRACE_PERIOD_DAYS', 3))
+    LICENSE_BREAKER_FAILURES = int(os.environ.get('LICENSE_BREAKER_FAILURES', 3))  # Falhas seguidas até abrir o disjuntor
+    LICENSE_BREAKER_RESET = int(os.environ.get('LICENSE_BREAKER_RESET', 60))  # Segundos até uma nova tentativa
+
+    # Tempo (em segundos) que as estatísticas do dashboard permanecem em cache
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 10))
+
+    # Tempo (em segundos) que o resumo do painel de cada gerente permanece em cache
+    MANAGER_SUMMARY_CACHE_TTL = int(os.environ.get('MANAGER_SUMMARY_CACHE_TTL', 5))
+
+    # Instrumentação dos comandos SQL por requisição
+    QUERY_PROFILER_ENABLED = os.environ.get('QUERY_PROFILER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200))  # Comandos registrados no log com o EXPLAIN
+    SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', 'true').lower() in ('1', 'true', 'yes')
+    QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', 0))  # Máximo de comandos por requisição (0 = sem limite)
+    QUERY_BUDGETS = os.environ.get('QUERY_BUDGETS', '')  # Por endpoint: 'sales.new_sale=10,main.dashboard=5'
+    # Falhar a requisição que ultrapassa o orçamento (sem valor: apenas nos testes)
+    QUERY_BUDGET_STRICT = (os.environ['QUERY_BUDGET_STRICT'].lower() in ('1', 'true', 'yes')
+                           if os.environ.get('QUERY_BUDGET_STRICT') else None)
+
+    # Métricas no formato do Prometheus em /metrics (sem token: apenas administradores autenticados)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+    # Intervalo (segundos) para reconstruir o índice de busca de produtos em background
+    PRODUCT_SEARCH_REFRESH_INTERVAL = int(os.environ.get('PRODUCT_SEARCH_REFRESH_INTERVAL', 300))
+
+    # Nível de compressão gzip (1-9) do snapshot do catálogo de produtos
+    CATALOG_COMPRESS_LEVEL = int(os.environ.get('CATALOG_COMPRESS_LEVEL', 6))
+
+    # Número de novas tentativas de uma venda quando há conflito de estoque entre caixas
+    CHECKOUT_MAX_RETRIES = int(os.environ.get('CHECKOUT_MAX_RETRIES', 3))
+
     @classmethod
     def test_local_connection(cls):
         """Testa a conexão com o banco de dados local"""
@@ -109,6 +167,7 @@ class DatabaseConfig:
             engine = create_engine(cls.get_local_database_uri(), **cls.LOCAL_ENGINE_OPTIONS)
             connection = engine.connect()
             connection.close()
+            engine.dispose()  # Engine temporário: não manter o pool aberto
             return True
         except Exception as e:
             print(f"Erro ao conectar ao banco de dados local: {e}")
@@ -121,6 +180,7 @@ class DatabaseConfig:
             engine = create_engine(cls.get_online_database_uri(), **cls.ONLINE_ENGINE_OPTIONS)
             connection = engine.connect()
             connection.close()
+            engine.dispose()  # Engine temporário: não manter o pool aberto
             return True
         except Exception as e:
             print(f"Erro ao conectar ao banco de dados online: {e}")
@@ -142,4 +202,16 @@ class ProductionConfig(DatabaseConfig):
     # Mantém compatibilidade com configuração existente
     @staticmethod
     def get_database_uri():
-        return DatabaseConfig.get_local_database_uri()
\ No newline at end of file
+        return DatabaseConfig.get_local_database_uri()
+
+# Configuração dos testes automatizados (banco SQLite próprio, sem CSRF)
+class TestingConfig(DatabaseConfig):
+    DEBUG = False
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///test.db'
+    SQLALCHEMY_BINDS = {
+        'local': 'sqlite:///test_local.db',
+        'online': 'sqlite:///test_online.db'
+    }
\ No newline at end of file
@@ -1,57 +1,101 @@
 from app import db
 from app.config import DevelopmentConfig
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, scoped_session
+import os
 import threading
 
 
 class DatabaseManager:
     """
-    Gerenciador de múltiplos bancos de dados para o sistema Alpha
+    Gerenciador de múltiplos bancos de dados para o sistema Alpha.
+    Mantém um único engine (com pool de conexões) por banco e por processo, criado na
+    primeira utilização. Após um fork (ex.: workers do gunicorn) os engines herdados
+    são descartados sem fechar as conexões do processo pai e recriados no filho.
     """
-    _local_engines = {}
-    _local_sessions = {}
+    _engines = {}
+    _session_factories = {}
+    _pid = os.getpid()
     _lock = threading.Lock()
 
+    # URI e opções de cada banco
+    _binds = {
+        'local': (DevelopmentConfig.get_local_database_uri, DevelopmentConfig.LOCAL_ENGINE_OPTIONS),
+        'online': (DevelopmentConfig.get_online_database_uri, DevelopmentConfig.ONLINE_ENGINE_OPTIONS),
+    }
+
+    @classmethod
+    def init_app(cls, app):
+        """Remove as sessões da thread ao final de cada requisição"""
+        @app.teardown_appcontext
+        def remove_database_sessions(exception=None):
+            cls.remove_sessions()
+
+    @classmethod
+    def _check_fork(cls):
+        """Descarta os engines herdados do processo pai"""
+        if cls._pid == os.getpid():
+            return
+        with cls._lock:
+            if cls._pid == os.getpid():
+                return
+            for engine in cls._engines.values():
+                # close=False: as conexões pertencem ao processo pai e não devem ser fechadas aqui
+                engine.dispose(close=False)
+            cls._engines = {}
+            cls._session_factories = {}
+            cls._pid = os.getpid()
+
+    @classmethod
+    def get_engine(cls, bind):
+        """Obtém o engine compartilhado de um banco ('local' ou 'online')"""
+        cls._check_fork()
+        engine = cls._engines.get(bind)
+        if engine is None:
+            with cls._lock:
+                engine = cls._engines.get(bind)
+                if engine is None:
+                    get_uri, options = cls._binds[bind]
+                    engine = create_engine(get_uri(), **options)
+                    cls._engines[bind] = engine
+        return engine
+
+    @classmethod
+    def _session_factory(cls, bind):
+        """Fábrica de sessões (por thread) associada ao engine compartilhado"""
+        cls._check_fork()
+        factory = cls._session_factories.get(bind)
+        if factory is None:
+            engine = cls.get_engine(bind)
+            with cls._lock:
+                factory = cls._session_factories.get(bind)
+                if factory is None:
+                    factory = scoped_session(sessionmaker(bind=engine))
+                    cls._session_factories[bind] = factory
+        return factory
+
     @classmethod
     def get_local_engine(cls):
         """Obtém o engine para o banco de dados local"""
-        thread_id = threading.get_ident()
-        if thread_id not in cls._local_engines:
-            with cls._lock:
-                if thread_id not in cls._local_engines:
-                    cls._local_engines[thread_id] = create_engine(
-                        DevelopmentConfig.get_local_database_uri(),
-                        **DevelopmentConfig.LOCAL_ENGINE_OPTIONS
-                    )
-        return cls._local_engines[thread_id]
+        return cls.get_engine('local')
 
     @classmethod
     def get_online_engine(cls):
         """Obtém o engine para o banco de dados online"""
-        return create_engine(
-            DevelopmentConfig.get_online_database_uri(),
-            **DevelopmentConfig.ONLINE_ENGINE_OPTIONS
-        )
+        return cls.get_engine('online')
 
     @classmethod
     def get_local_session(cls):
-        """Obtém uma sessão para o banco de dados local"""
-        thread_id = threading.get_ident()
-        if thread_id not in cls._local_sessions:
-            with cls._lock:
-                if thread_id not in cls._local_sessions:
-                    engine = cls.get_local_engine()
-                    Session = sessionmaker(bind=engine)
-                    cls._local_sessions[thread_id] = Session()
-        return cls._local_sessions[thread_id]
+        """Obtém a sessão da thread atual para o banco de dados local (removida no teardown)"""
+        return cls._session_factory('local')()
 
     @classmethod
     def get_online_session(cls):
-        """Obtém uma sessão para o banco de dados online"""
-        engine = cls.get_online_engine()
-        Session = sessionmaker(bind=engine)
-        return Session()
+        """
+        Obtém uma nova sessão para o banco de dados online.
+        A sessão usa o pool compartilhado; quem a obtém deve fechá-la (close devolve a conexão ao pool).
+        """
+        return cls._session_factory('online').session_factory()
 
     @classmethod
     def get_db_for_licenses(cls):
@@ -68,6 +112,38 @@ class DatabaseManager:
         """
         return cls.get_online_session()
 
+    @classmethod
+    def remove_sessions(cls):
+        """Fecha as sessões da thread atual, devolvendo as conexões ao pool"""
+        for factory in list(cls._session_factories.values()):
+            factory.remove()
+
+    @classmethod
+    def dispose(cls):
+        """Fecha todas as conexões dos pools (ex.: no encerramento do processo)"""
+        with cls._lock:
+            for factory in cls._session_factories.values():
+                factory.remove()
+            for engine in cls._engines.values():
+                engine.dispose()
+            cls._engines = {}
+            cls._session_factories = {}
+
+    @classmethod
+    def pool_stats(cls):
+        """Retorna as estatísticas dos pools de conexões de cada banco já utilizado"""
+        stats = {}
+        for bind, engine in list(cls._engines.items()):
+            pool = engine.pool
+            stats[bind] = {
+                'size': pool.size() if hasattr(pool, 'size') else None,
+                'checked_in': pool.checkedin() if hasattr(pool, 'checkedin') else None,
+                'checked_out': pool.checkedout() if hasattr(pool, 'checkedout') else None,
+                'overflow': pool.overflow() if hasattr(pool, 'overflow') else None,
+                'status': pool.status()
+            }
+        return stats
+
 
 # Instância global do gerenciador de banco de dados
 database_manager = DatabaseManager()
\ No newline at end of file
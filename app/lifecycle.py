@@ -0,0 +1,88 @@
+import atexit
+import os
+import threading
+
+
+class ProcessLifecycle:
+    """
+    Ciclo de vida do processo da aplicação em servidores com vários workers.
+    A aplicação é criada uma vez no processo principal (preload) e herdada pelos workers
+    via fork; no filho os pools de conexões herdados são descartados sem fechar as conexões
+    do processo pai. No encerramento (sinal do servidor ou saída do interpretador) grava as
+    atividades pendentes e fecha as conexões dos pools.
+    """
+
+    def __init__(self, shutdown_timeout=5.0):
+        self.shutdown_timeout = shutdown_timeout
+        self.app = None
+        self._lock = threading.Lock()
+        self._hooks_registered = False
+        self._shutdown_pid = None
+
+        # Contadores de operação
+        self.forks = 0
+        self.shutdowns = 0
+
+    def init_app(self, app):
+        """Registra o descarte dos engines após um fork e o encerramento na saída do processo"""
+        self.app = app
+        self.shutdown_timeout = app.config.get('SHUTDOWN_TIMEOUT', self.shutdown_timeout)
+        with self._lock:
+            if self._hooks_registered:
+                return
+            if hasattr(os, 'register_at_fork'):  # Indisponível no Windows (sem fork)
+                os.register_at_fork(after_in_child=self.after_fork)
+            atexit.register(self.shutdown)
+            self._hooks_registered = True
+
+    def _flask_engines(self):
+        from app import db
+        with self.app.app_context():
+            return list(db.engines.values())
+
+    def after_fork(self):
+        """Descarta no processo filho os engines herdados (novas conexões são abertas sob demanda)"""
+        if self.app is None:
+            return
+        self._lock = threading.Lock()
+        self._shutdown_pid = None
+        self.forks += 1
+        for engine in self._flask_engines():
+            # close=False: as conexões pertencem ao processo pai e não devem ser fechadas aqui
+            engine.dispose(close=False)
+        # O DatabaseManager descarta os seus engines na primeira utilização no filho
+        from app.database_manager import database_manager
+        database_manager._check_fork()
+        # Índice de busca de produtos construído em background no início de cada worker
+        from app.utils.product_search import product_search
+        product_search.warm_up()
+
+    def shutdown(self):
+        """
+        Encerramento gracioso: grava as atividades enfileiradas e fecha as conexões dos pools.
+        Pode ser chamado mais de uma vez (hook do servidor e saída do interpretador).
+        """
+        if self.app is None:
+            return
+        with self._lock:
+            if self._shutdown_pid == os.getpid():
+                return
+            self._shutdown_pid = os.getpid()
+        self.shutdowns += 1
+
+        from app.utils.logger import activity_logger
+        from app.database_manager import database_manager
+        try:
+            activity_logger.shutdown(self.shutdown_timeout)
+        except Exception as e:
+            self.app.logger.error(f'Erro ao gravar as atividades pendentes no encerramento: {e}')
+        try:
+            database_manager.dispose()
+            for engine in self._flask_engines():
+                engine.dispose()
+        except Exception as e:
+            self.app.logger.error(f'Erro ao fechar as conexões no encerramento: {e}')
+
+
+# Instância global do ciclo de vida do processo
+process_lifecycle = ProcessLifecycle()
\ No newline at end of file
@@ -0,0 +1,266 @@
+from datetime import datetime
+from sqlalchemy import Integer, exc, func, insert, inspect, select, text
+from app import db
+from app.models import SchemaVersion, CatalogVersion
+
+# Migrações registradas: lista de (versão, nome, função) em ordem crescente de versão
+MIGRATIONS = []
+
+
+def migration(version, name):
+    """
+    Registra uma migração do esquema.
+    A função recebe a conexão da transação da migração e deve ser idempotente: em um banco
+    novo a versão 1 cria as tabelas já no formato atual dos modelos.
+    """
+    def decorator(func_):
+        MIGRATIONS.append((version, name, func_))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return func_
+    return decorator
+
+
+def latest_version():
+    """Versão mais recente conhecida pela aplicação"""
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def current_version():
+    """Versão aplicada no banco de dados local (None se o controle de versões ainda não existe)"""
+    try:
+        with db.engine.connect() as connection:
+            return connection.execute(select(func.max(SchemaVersion.version))).scalar() or 0
+    except exc.SQLAlchemyError:
+        return None
+
+
+def is_current():
+    """Indica se o esquema está atualizado (uma única consulta, sem inspecionar tabelas)"""
+    return current_version() == latest_version()
+
+
+def pending():
+    """Migrações ainda não aplicadas: lista de (versão, nome)"""
+    applied = current_version() or 0
+    return [(version, name) for version, name, _ in MIGRATIONS if version > applied]
+
+
+def upgrade():
+    """
+    Aplica as migrações pendentes em ordem, cada uma em sua própria transação junto com o
+    registro da versão. Retorna a lista de (versão, nome) aplicadas.
+    """
+    SchemaVersion.__table__.create(bind=db.engine, checkfirst=True)
+    applied = current_version() or 0
+
+    done = []
+    for version, name, func_ in MIGRATIONS:
+        if version <= applied:
+            continue
+        with db.engine.begin() as connection:
+            func_(connection)
+            connection.execute(insert(SchemaVersion).values(
+                version=version, name=name, applied_at=datetime.utcnow()
+            ))
+        done.append((version, name))
+    return done
+
+
+def _column_names(connection, table_name):
+    return {column['name'] for column in inspect(connection).get_columns(table_name)}
+
+
+def _model_index(name):
+    """Índice declarado nos modelos (__table_args__) com o nome informado"""
+    for table in db.metadata.tables.values():
+        for index in table.indexes:
+            if index.name == name:
+                return index
+    raise KeyError(name)
+
+
+@migration(1, 'Tabelas base, colunas de desconto das vendas e descrição dos consumos')
+def _base_schema(connection):
+    # Cria apenas as tabelas que ainda não existem
+    db.metadata.create_all(bind=connection)
+
+    # Bancos anteriores às colunas de desconto
+    sale_columns = _column_names(connection, 'sale')
+    if 'discount_percentage' not in sale_columns:
+        connection.execute(text('ALTER TABLE sale ADD COLUMN discount_percentage FLOAT DEFAULT 0.0'))
+    if 'discount_amount' not in sale_columns:
+        connection.execute(text('ALTER TABLE sale ADD COLUMN discount_amount FLOAT DEFAULT 0.0'))
+    if 'final_price' not in sale_columns:
+        connection.execute(text('ALTER TABLE sale ADD COLUMN final_price FLOAT NOT NULL DEFAULT 0.0'))
+        # Vendas anteriores aos descontos: o preço final é o preço total
+        connection.execute(text('UPDATE sale SET final_price = total_price'))
+
+    # Atualizar registros existentes para terem valores padrão para as novas colunas
+    connection.execute(text('''
+        UPDATE sale
+        SET discount_percentage = COALESCE(discount_percentage, 0.0),
+            discount_amount = COALESCE(discount_amount, 0.0),
+            final_price = COALESCE(final_price, total_price)
+        WHERE discount_percentage IS NULL OR discount_amount IS NULL OR final_price IS NULL
+    '''))
+
+    # Bancos anteriores à descrição do item consumido
+    if 'item_description' not in _column_names(connection, 'consumption_record'):
+        connection.execute(text(
+            "ALTER TABLE consumption_record ADD COLUMN item_description VARCHAR(200) NOT NULL "
+            "DEFAULT 'Item não especificado'"
+        ))
+
+
+@migration(2, 'Índices das colunas mais usadas em filtros')
+def _filter_indexes(connection):
+    names = (
+        'ix_sale_sale_date',
+        'ix_sale_cashier_date',
+        'ix_cashier_user_status',
+        'ix_cashier_transaction_cashier_type',
+        'ix_consumption_record_customer_paid',
+        'ix_user_manager_id',
+        'ix_license_expiry_date',
+    )
+    for name in names:
+        _model_index(name).create(bind=connection, checkfirst=True)
+
+
+@migration(3, 'Saldo corrente do caixa')
+def _cashier_balance(connection):
+    if 'balance' in _column_names(connection, 'cashier'):
+        return
+    connection.execute(text('ALTER TABLE cashier ADD COLUMN balance FLOAT DEFAULT 0.0'))
+
+    # Saldo dos caixas existentes a partir das transações registradas
+    connection.execute(text('''
+        UPDATE cashier
+        SET balance = (
+            SELECT COALESCE(SUM(CASE
+                WHEN t.transaction_type IN ('sale', 'entry') THEN t.amount
+                WHEN t.transaction_type IN ('expense', 'exit') THEN -t.amount
+                ELSE 0 END), 0)
+            FROM cashier_transaction t
+            WHERE t.cashier_id = cashier.id
+        )
+    '''))
+
+
+@migration(4, 'Código de barras/SKU dos produtos')
+def _product_barcode(connection):
+    if 'barcode' not in _column_names(connection, 'product'):
+        connection.execute(text('ALTER TABLE product ADD COLUMN barcode VARCHAR(64) NULL'))
+    _model_index('ix_product_barcode').create(bind=connection, checkfirst=True)
+
+
+@migration(5, 'Versão do catálogo de produtos')
+def _catalog_version(connection):
+    CatalogVersion.__table__.create(bind=connection, checkfirst=True)
+    if connection.execute(select(CatalogVersion.id)).first() is None:
+        connection.execute(insert(CatalogVersion).values(id=1, version=1, updated_at=datetime.utcnow()))
+
+
+@migration(6, 'Índices do histórico de consumo fiado')
+def _consumption_history_indexes(connection):
+    for name in ('ix_consumption_record_created_at', 'ix_consumption_record_customer_created'):
+        _model_index(name).create(bind=connection, checkfirst=True)
+
+
+# Colunas monetárias convertidas de FLOAT (reais) para BIGINT (centavos) na versão 7
+MONEY_COLUMNS = (
+    ('product', ('price',)),
+    ('sale', ('total_price', 'discount_amount', 'final_price')),
+    ('cashier', ('initial_amount', 'final_amount', 'total_sales', 'total_expenses', 'balance')),
+    ('cashier_transaction', ('amount',)),
+    ('customer_credit', ('total_debt',)),
+    ('consumption_record', ('total_value',)),
+    ('daily_sales_rollup', ('gross', 'discount', 'net')),
+)
+
+
+@migration(7, 'Valores monetários em centavos inteiros')
+def _money_in_cents(connection):
+    """
+    Cada coluna é convertida por uma coluna nova <coluna>_cents (BIGINT), preenchida a partir
+    da original, que só então é excluída e substituída pela nova. A coluna original nunca é
+    alterada no lugar: no MySQL cada ALTER confirma a transação, e uma conversão interrompida
+    pode ser retomada pelo estado das colunas, sem multiplicar os valores duas vezes.
+    """
+    for table_name, column_names in MONEY_COLUMNS:
+        for column_name in column_names:
+            _column_to_cents(connection, table_name, column_name)
+
+
+def _column_to_cents(connection, table_name, column_name):
+    cents_name = f'{column_name}_cents'
+    columns = {column['name']: column for column in inspect(connection).get_columns(table_name)}
+    original = columns.get(column_name)
+    if original is not None and cents_name not in columns:
+        if isinstance(original['type'], Integer):
+            return  # Tabela criada já no formato atual (ou coluna já convertida)
+        connection.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {cents_name} BIGINT NULL'))
+
+    if original is not None:
+        # Preenchimento idempotente: sempre a partir da coluna original, ainda em reais
+        connection.execute(text(
+            f'UPDATE {table_name} SET {cents_name} = ROUND({column_name} * 100) '
+            f'WHERE {column_name} IS NOT NULL'
+        ))
+        connection.execute(text(f'ALTER TABLE {table_name} DROP COLUMN {column_name}'))
+
+    model_column = db.metadata.tables[table_name].c[column_name]
+    if connection.dialect.name == 'mysql':
+        definition = 'BIGINT' + ('' if model_column.nullable else ' NOT NULL')
+        if model_column.default is not None:
+            definition += ' DEFAULT 0'
+        connection.execute(text(f'ALTER TABLE {table_name} CHANGE COLUMN {cents_name} {column_name} {definition}'))
+        return
+
+    connection.execute(text(f'ALTER TABLE {table_name} RENAME COLUMN {cents_name} TO {column_name}'))
+    # O SQLite não acrescenta restrições a colunas existentes (o modelo continua validando)
+    if connection.dialect.name != 'sqlite':
+        if not model_column.nullable:
+            connection.execute(text(f'ALTER TABLE {table_name} ALTER COLUMN {column_name} SET NOT NULL'))
+        if model_column.default is not None:
+            connection.execute(text(f'ALTER TABLE {table_name} ALTER COLUMN {column_name} SET DEFAULT 0'))
+
+@migration(8, 'Chave única do resumo diário de vendas')
+def _daily_sales_rollup_unique_key(connection):
+    """
+    Uma linha por (dia, caixa, produto): as vendas sem caixa passam a usar o caixa 0 (NULL não
+    participa de uma chave única), as linhas duplicadas de inserções simultâneas são somadas
+    na de menor ID e o índice da chave é recriado como único.
+    """
+    connection.execute(text('UPDATE daily_sales_rollup SET cashier_id = 0 WHERE cashier_id IS NULL'))
+
+    # Valores somados diretamente em centavos (sem passar pelo tipo Money)
+    duplicates = connection.execute(text('''
+        SELECT MIN(id), MAX(user_id), SUM(sale_count), SUM(quantity), SUM(gross), SUM(discount), SUM(net),
+               day, cashier_id, product_id
+        FROM daily_sales_rollup
+        GROUP BY day, cashier_id, product_id
+        HAVING COUNT(*) > 1
+    ''')).fetchall()
+    for keep_id, user_id, sale_count, quantity, gross, discount, net, day, cashier_id, product_id in duplicates:
+        connection.execute(text('''
+            UPDATE daily_sales_rollup
+            SET user_id = :user_id, sale_count = :sale_count, quantity = :quantity,
+                gross = :gross, discount = :discount, net = :net
+            WHERE id = :id
+        '''), {'id': keep_id, 'user_id': user_id, 'sale_count': sale_count, 'quantity': quantity,
+               'gross': gross, 'discount': discount, 'net': net})
+        connection.execute(text('''
+            DELETE FROM daily_sales_rollup
+            WHERE day = :day AND cashier_id = :cashier_id AND product_id = :product_id AND id <> :id
+        '''), {'id': keep_id, 'day': day, 'cashier_id': cashier_id, 'product_id': product_id})
+
+    # O SQLite não acrescenta restrições a colunas existentes (o caixa NULL não é mais gravado)
+    if connection.dialect.name == 'mysql':
+        connection.execute(text('ALTER TABLE daily_sales_rollup MODIFY cashier_id INTEGER NOT NULL DEFAULT 0'))
+
+    index = _model_index('ix_daily_sales_rollup_day_cashier_product')
+    existing = {item['name']: item for item in inspect(connection).get_indexes('daily_sales_rollup')}
+    if index.name in existing and not existing[index.name]['unique']:
+        index.drop(bind=connection)
+    index.create(bind=connection, checkfirst=True)
\ No newline at end of file
@@ -1,12 +1,15 @@
 from flask_login import UserMixin
 from app import db, login_manager
+from app.utils.money import Money, to_cents, from_cents
 from datetime import datetime
 import hashlib
 import secrets
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Registro imutável do usuário em cache (sem consultas ao banco em regime)
+    from app.utils.user_cache import user_cache
+    return user_cache.get(int(user_id))
 
 class User(UserMixin, db.Model):
     __tablename__ = 'user'
@@ -20,6 +23,10 @@ class User(UserMixin, db.Model):
     manager_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)  # Para usuários gerenciados por um gerente
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_user_manager_id', 'manager_id'),
+    )
+
     # Relacionamento com o gerente
     manager = db.relationship('User', remote_side=[id], backref='managed_users')
 
@@ -28,12 +35,17 @@ class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
-    price = db.Column(db.Float, nullable=False)
+    price = db.Column(Money, nullable=False)
     quantity = db.Column(db.Integer, default=0)
     max_quantity = db.Column(db.Integer, default=0)  # Quantidade máxima que o produto já teve
     category = db.Column(db.String(100))
+    barcode = db.Column(db.String(64), nullable=True)  # Código de barras ou SKU (único quando informado)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_product_barcode', 'barcode', unique=True),
+    )
+
     def update_max_quantity(self):
         """Atualiza a quantidade máxima se a quantidade atual for maior"""
         if self.quantity > self.max_quantity:
@@ -59,15 +71,20 @@ class Sale(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('product.id', ondelete='CASCADE'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
-    total_price = db.Column(db.Float, nullable=False)
+    total_price = db.Column(Money, nullable=False)
     discount_percentage = db.Column(db.Float, default=0.0)  # Percentual de desconto (0 a 100)
-    discount_amount = db.Column(db.Float, default=0.0)  # Valor do desconto
-    final_price = db.Column(db.Float, nullable=False, default=0.0)  # Preço final após desconto
+    discount_amount = db.Column(Money, default=0.0)  # Valor do desconto
+    final_price = db.Column(Money, nullable=False, default=0.0)  # Preço final após desconto
     sale_date = db.Column(db.DateTime, default=datetime.utcnow)
     cashier_id = db.Column(db.Integer, db.ForeignKey('cashier.id'), nullable=True)  # Novo campo
     product = db.relationship('Product', backref='sales', passive_deletes=True)
     cashier = db.relationship('Cashier', backref='sales')  # Novo relacionamento
 
+    __table_args__ = (
+        db.Index('ix_sale_sale_date', 'sale_date'),
+        db.Index('ix_sale_cashier_date', 'cashier_id', 'sale_date'),
+    )
+
 
 class Cashier(db.Model):
     """Modelo para controle de caixa"""
@@ -75,38 +92,40 @@ class Cashier(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     opening_date = db.Column(db.DateTime, default=datetime.utcnow)
     closing_date = db.Column(db.DateTime, nullable=True)
-    initial_amount = db.Column(db.Float, default=0.0)
-    final_amount = db.Column(db.Float, nullable=True)
-    total_sales = db.Column(db.Float, default=0.0)
-    total_expenses = db.Column(db.Float, default=0.0)
+    initial_amount = db.Column(Money, default=0.0)
+    final_amount = db.Column(Money, nullable=True)
+    total_sales = db.Column(Money, default=0.0)
+    total_expenses = db.Column(Money, default=0.0)
+    balance = db.Column(Money, default=0.0)  # Saldo corrente: soma das transações (mantida a cada transação)
     status = db.Column(db.String(20), default='open')  # 'open', 'closed'
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     user = db.relationship('User', backref='cashiers')
 
+    __table_args__ = (
+        db.Index('ix_cashier_user_status', 'user_id', 'status'),
+    )
+
     def calculate_total_sales(self):
         """Calcula o total de vendas para este caixa"""
         # Usar a associação direta com vendas ao invés de intervalo de datas
-        sales = Sale.query.filter_by(cashier_id=self.id).all()
-        self.total_sales = sum(sale.total_price for sale in sales)
+        # Dias anteriores vêm do resumo diário; apenas o dia atual é somado nas vendas
+        from app.utils.sales_rollup import summarize_sales
+        self.total_sales = summarize_sales(cashier_id=self.id)['gross']
         return self.total_sales
 
     def calculate_balance(self):
         """Calcula o saldo final do caixa"""
-        return self.initial_amount + self.total_sales - self.total_expenses
+        return from_cents(
+            to_cents(self.initial_amount or 0) + to_cents(self.total_sales or 0) - to_cents(self.total_expenses or 0)
+        )
 
     def calculate_current_balance(self):
-        """Calcula o saldo atual do caixa (considerando transações registradas)"""
-        # Obter todas as transações do caixa
-        transactions = CashierTransaction.query.filter_by(cashier_id=self.id).all()
-
-        balance = self.initial_amount
-        for transaction in transactions:
-            if transaction.transaction_type in ['sale', 'entry']:
-                balance += transaction.amount
-            elif transaction.transaction_type in ['expense', 'exit']:
-                balance -= transaction.amount
-
-        return balance
+        """
+        Retorna o saldo atual do caixa (considerando transações registradas).
+        O saldo é mantido a cada transação (inclusive a de abertura com o valor inicial),
+        então não é necessário percorrer as transações.
+        """
+        return self.balance or 0.0
 
 
 class CashierTransaction(db.Model):
@@ -115,13 +134,17 @@ class CashierTransaction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     cashier_id = db.Column(db.Integer, db.ForeignKey('cashier.id'), nullable=False)
     transaction_type = db.Column(db.String(20), nullable=False)  # 'sale', 'expense', 'entry', 'exit'
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(Money, nullable=False)
     description = db.Column(db.String(200))
     transaction_date = db.Column(db.DateTime, default=datetime.utcnow)
     related_sale_id = db.Column(db.Integer, db.ForeignKey('sale.id'), nullable=True)
     cashier = db.relationship('Cashier', backref='transactions')
     related_sale = db.relationship('Sale', backref='cashier_transactions')
 
+    __table_args__ = (
+        db.Index('ix_cashier_transaction_cashier_type', 'cashier_id', 'transaction_type'),
+    )
+
 
 class CustomerCredit(db.Model):
     """Modelo para clientes que compram fiado"""
@@ -129,22 +152,13 @@ class CustomerCredit(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(150), nullable=False)
     phone = db.Column(db.String(20), nullable=True)
-    total_debt = db.Column(db.Float, default=0.0)  # Dívida total acumulada
+    total_debt = db.Column(Money, default=0.0)  # Dívida total acumulada
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __repr__(self):
         return f'<CustomerCredit {self.name}>'
 
-    def calculate_total_debt(self):
-        """Calcula a dívida total baseada nos registros de consumo"""
-        total = 0
-        for record in self.consumption_records:
-            if not record.paid:
-                total += record.total_value
-        self.total_debt = total
-        return total
-
 
 class ConsumptionRecord(db.Model):
     """Modelo para registros de consumo de clientes fiado"""
@@ -152,7 +166,7 @@ class ConsumptionRecord(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('customer_credit.id'), nullable=False)
     item_description = db.Column(db.String(200), nullable=False)  # Descrição do item/produto
-    total_value = db.Column(db.Float, nullable=False)  # Valor total da compra
+    total_value = db.Column(Money, nullable=False)  # Valor total da compra
     paid = db.Column(db.Boolean, default=False)  # Indica se a dívida foi quitada
     paid_date = db.Column(db.DateTime, nullable=True)  # Data em que a dívida foi quitada
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -161,10 +175,38 @@ class ConsumptionRecord(db.Model):
     # Relacionamento com o cliente
     customer = db.relationship('CustomerCredit', backref='consumption_records')
 
+    __table_args__ = (
+        db.Index('ix_consumption_record_customer_paid', 'customer_id', 'paid'),
+        db.Index('ix_consumption_record_created_at', 'created_at'),
+        db.Index('ix_consumption_record_customer_created', 'customer_id', 'created_at'),
+    )
+
     def __repr__(self):
         return f'<ConsumptionRecord {self.customer.name} - {self.item_description} - R${self.total_value:.2f}>'
 
 
+class DailySalesRollup(db.Model):
+    """Resumo diário de vendas por caixa/usuário e produto (mantido junto com cada venda)"""
+    __tablename__ = 'daily_sales_rollup'
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)  # Usuário dono do caixa (None para vendas sem caixa)
+    cashier_id = db.Column(db.Integer, nullable=False, default=0)  # 0 para vendas sem caixa (NULL não é único)
+    product_id = db.Column(db.Integer, nullable=False)
+    sale_count = db.Column(db.Integer, nullable=False, default=0)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    gross = db.Column(Money, nullable=False, default=0.0)  # Soma de total_price
+    discount = db.Column(Money, nullable=False, default=0.0)  # Soma de discount_amount
+    net = db.Column(Money, nullable=False, default=0.0)  # Soma de final_price
+
+    __table_args__ = (
+        # Uma linha por dia, caixa e produto: as vendas são somadas com upsert (sales_rollup.record_sales)
+        db.Index('ix_daily_sales_rollup_day_cashier_product', 'day', 'cashier_id', 'product_id', unique=True),
+        db.Index('ix_daily_sales_rollup_user_day', 'user_id', 'day'),
+        db.Index('ix_daily_sales_rollup_product', 'product_id'),
+    )
+
+
 class License(db.Model):
     __tablename__ = 'license'
     # Este modelo usará o banco de dados online para validação, mas pode ser armazenado localmente também
@@ -178,6 +220,10 @@ class License(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_validation = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_license_expiry_date', 'expiry_date'),
+    )
+
     def generate_license_key(self):
         """Gera uma chave de licença única"""
         # Gerar uma chave baseada no nome do cliente e timestamp
@@ -238,7 +284,7 @@ class License(db.Model):
                 online_session.close()
             except:
                 pass
-            return {"valid": False, "license_data": None, "message": f"Erro ao validar licença no servidor: {str(e)}"}
+            return {"valid": False, "license_data": None, "error": True, "message": f"Erro ao validar licença no servidor: {str(e)}"}
 
     @classmethod
     def save_license_online(cls, license_data):
@@ -280,4 +326,33 @@ class License(db.Model):
                 online_session.close()
             except:
                 pass
-            return {"success": False, "message": f"Erro ao salvar licença no servidor online: {str(e)}"}
\ No newline at end of file
+            return {"success": False, "message": f"Erro ao salvar licença no servidor online: {str(e)}"}
+
+
+class ActivityLog(db.Model):
+    """Modelo para o registro persistente de atividades dos usuários"""
+    __tablename__ = 'activity_log'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(50))  # ID do usuário ou 'Anonymous'
+    action = db.Column(db.String(255), nullable=False)
+    endpoint = db.Column(db.String(150))
+    ip_address = db.Column(db.String(45))
+    user_agent = db.Column(db.String(255))
+    details = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class SchemaVersion(db.Model):
+    """Versões de migração do esquema já aplicadas ao banco de dados local"""
+    __tablename__ = 'schema_version'
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(200), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class CatalogVersion(db.Model):
+    """Versão do catálogo de produtos: incrementada a cada cadastro, edição ou exclusão de produto"""
+    __tablename__ = 'catalog_version'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
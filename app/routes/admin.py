@@ -0,0 +1,38 @@
+from flask import Blueprint, Response, current_app, jsonify, request
+from flask_login import current_user
+from app.routes.licenses import admin_required
+from app.utils.query_profiler import query_profiler
+from app.utils.metrics import metrics
+
+bp = Blueprint('admin', __name__)
+
+@bp.route('/admin/queries')
+@admin_required
+def query_stats():
+    """Comandos SQL por endpoint (quantidade e tempo no banco) e os últimos comandos lentos"""
+    return jsonify(query_profiler.stats())
+
+@bp.route('/admin/queries/reset', methods=['POST'])
+@admin_required
+def reset_query_stats():
+    """Zera os totais do profiler de comandos SQL"""
+    query_profiler.reset()
+    return jsonify({'success': True})
+
+@bp.route('/metrics')
+def metrics_endpoint():
+    """
+    Métricas no formato de texto do Prometheus.
+    Com METRICS_TOKEN configurado exige 'Authorization: Bearer <token>'; sem ele, apenas
+    administradores autenticados. Não há exceção para requisições da própria máquina: atrás de
+    um proxy local (nginx na frente do gunicorn) todas as requisições chegam de 127.0.0.1.
+    """
+    if not metrics.enabled:
+        return Response('Métricas desativadas.\n', status=404, content_type='text/plain; charset=utf-8')
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        if request.headers.get('Authorization') != f'Bearer {token}':
+            return Response('Token inválido ou ausente.\n', status=401, content_type='text/plain; charset=utf-8')
+    elif not (current_user.is_authenticated and current_user.is_admin):
+        return Response('Acesso negado.\n', status=403, content_type='text/plain; charset=utf-8')
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
\ No newline at end of file
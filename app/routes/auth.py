@@ -4,11 +4,9 @@ from app.models import User
 from app import db
 from app.utils.license_manager import license_manager
 from app.utils.password_utils import validate_password_strength
+from app.utils.user_cache import user_cache
 from werkzeug.security import generate_password_hash, check_password_hash
 from itsdangerous import URLSafeTimedSerializer
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import os
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField
@@ -32,6 +30,11 @@ serializer = URLSafeTimedSerializer(os.environ.get('SECRET_KEY', 'sua_chave_secr
 
 def send_reset_email(email, token):
     """Envia email de recuperação de senha"""
+    # Importados sob demanda: usados apenas na recuperação de senha (inicialização mais rápida)
+    import smtplib
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+
     msg = MIMEMultipart()
     msg['Subject'] = 'Recuperação de Senha - Alphasystem'
     msg['From'] = EMAIL_HOST_USER
@@ -148,6 +151,7 @@ def reset_with_token(token):
         if user:
             user.password = generate_password_hash(password)
             db.session.commit()
+            user_cache.invalidate(user.id)
             flash('Senha redefinida com sucesso. Faça login para continuar.', 'success')
             return redirect(url_for('auth.login'))
         else:
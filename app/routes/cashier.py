@@ -1,8 +1,10 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import current_user, login_required
-from app.models import Cashier, CashierTransaction, Sale
+from app.models import Cashier, CashierTransaction, Sale, Product
 from app import db
 from app.utils.decorators import license_required
+from app.utils import cashier_ledger
+from app.utils.metrics import metrics
 from datetime import datetime
 from flask_wtf import FlaskForm
 import os
@@ -52,17 +54,12 @@ def open_cashier():
             )
 
             db.session.add(cashier)
-            db.session.commit()
+            db.session.flush()  # Para obter o ID do caixa
 
-            # Registrar transação de abertura
-            transaction = CashierTransaction(
-                cashier_id=cashier.id,
-                transaction_type='entry',
-                amount=initial_amount,
-                description='Abertura de caixa'
-            )
-            db.session.add(transaction)
+            # Registrar transação de abertura (o valor inicial passa a compor o saldo corrente)
+            cashier_ledger.record_transaction(cashier, 'entry', initial_amount, 'Abertura de caixa')
             db.session.commit()
+            metrics.inc('cashier_opened')
 
             flash('Caixa aberto com sucesso!', 'success')
             return redirect(url_for('cashier.dashboard'))
@@ -86,16 +83,15 @@ def close_cashier(cashier_id):
         flash('Este caixa já está fechado!', 'error')
         return redirect(url_for('cashier.dashboard'))
     
-    # Calcular total de vendas e saldo final
-    total_sales = cashier.calculate_total_sales()
-    balance = cashier.calculate_balance()
+    # Saldo final a partir dos contadores mantidos a cada transação
+    balance = cashier.calculate_current_balance()
     
     cashier.closing_date = datetime.utcnow()
-    cashier.total_sales = total_sales
     cashier.final_amount = balance
     cashier.status = 'closed'
     
     db.session.commit()
+    metrics.inc('cashier_closed')
     
     flash(f'Caixa fechado com sucesso! Saldo final: R$ {balance:.2f}', 'success')
     return redirect(url_for('cashier.dashboard'))
@@ -124,16 +120,8 @@ def expenses():
             flash('O valor da despesa deve ser maior que zero!', 'error')
             return render_template('cashier/expenses.html', active_cashier=active_cashier, form=form)
 
-        # Registrar despesa
-        transaction = CashierTransaction(
-            cashier_id=active_cashier.id,
-            transaction_type='expense',
-            amount=amount,
-            description=description
-        )
-
-        db.session.add(transaction)
-        active_cashier.total_expenses += amount
+        # Registrar despesa e atualizar os contadores do caixa
+        cashier_ledger.record_transaction(active_cashier, 'expense', amount, description)
         db.session.commit()
 
         flash('Despesa registrada com sucesso!', 'success')
@@ -182,17 +170,21 @@ def api_sales_for_cashier(cashier_id):
     """API para obter vendas associadas a um caixa"""
     cashier = Cashier.query.filter_by(id=cashier_id, user_id=current_user.id).first_or_404()
 
-    # Obter vendas associadas diretamente ao caixa
-    sales = Sale.query.filter_by(cashier_id=cashier.id).order_by(Sale.sale_date.desc()).all()
+    # Obter vendas associadas diretamente ao caixa, com o nome do produto na mesma consulta
+    sales = db.session.query(
+        Sale.id, Product.name, Sale.quantity, Sale.total_price, Sale.sale_date
+    ).join(Product, Sale.product_id == Product.id).filter(
+        Sale.cashier_id == cashier.id
+    ).order_by(Sale.sale_date.desc()).all()
 
     sales_data = []
-    for sale in sales:
+    for sale_id, product_name, quantity, total_price, sale_date in sales:
         sales_data.append({
-            'id': sale.id,
-            'product_name': sale.product.name,
-            'quantity': sale.quantity,
-            'total_price': sale.total_price,
-            'sale_date': sale.sale_date.strftime('%d/%m/%Y %H:%M') if sale.sale_date else ''
+            'id': sale_id,
+            'product_name': product_name,
+            'quantity': quantity,
+            'total_price': total_price,
+            'sale_date': sale_date.strftime('%d/%m/%Y %H:%M') if sale_date else ''
         })
 
     return jsonify(sales_data)
\ No newline at end of file
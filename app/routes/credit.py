@@ -1,11 +1,20 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from app import db
-from app.models import CustomerCredit, ConsumptionRecord, Sale, Product, Cashier, CashierTransaction
+from app.models import CustomerCredit, ConsumptionRecord, Sale, Cashier
+from app.utils import cashier_ledger, credit_ledger, sales_rollup
+from app.utils.metrics import metrics
+from app.utils.money import to_cents, from_cents
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 
 bp = Blueprint('credit', __name__, url_prefix='/credit')
 
+# Paginação do histórico de consumo e limite da busca de clientes
+CONSUMPTION_PER_PAGE = 50
+CUSTOMER_SEARCH_MAX_LIMIT = 20
+
 @bp.route('/customers')
 @login_required
 def list_customers():
@@ -94,61 +103,81 @@ def delete_customer(customer_id):
 @login_required
 def list_consumption():
     """Página para listar todos os itens de consumo"""
-    # Obter o parâmetro de filtro (cliente_id) da query string
+    # Obter o parâmetro de filtro (cliente_id) e a página da query string
     customer_id_filter = request.args.get('customer_id', type=int)
+    page = max(request.args.get('page', 1, type=int), 1)
 
-    # Obter todos os clientes para o filtro
-    all_customers = CustomerCredit.query.all()
-
-    # Filtrar os registros de consumo com base no cliente selecionado
+    selected_customer = None
     if customer_id_filter:
-        consumption_records = ConsumptionRecord.query.filter_by(customer_id=customer_id_filter).order_by(ConsumptionRecord.created_at.desc()).all()
-        # Obter apenas o cliente específico
         selected_customer = CustomerCredit.query.get_or_404(customer_id_filter)
-        filtered_customers = [selected_customer]
-    else:
-        consumption_records = ConsumptionRecord.query.order_by(ConsumptionRecord.created_at.desc()).all()
-        filtered_customers = all_customers
-
-    # Calcular totais gerais (apenas para os registros exibidos)
-    total_consumed_general = 0.0
-    total_paid_general = 0.0
-    total_pending_general = 0.0
 
-    # Vamos agrupar por cliente para facilitar a visualização
-    records_by_customer = {}
-    for record in consumption_records:
-        if record.customer_id not in records_by_customer:
-            records_by_customer[record.customer_id] = {
-                'customer': record.customer,
-                'records': [],
-                'total_consumed': 0.0,
-                'total_paid': 0.0,
-                'total_pending': 0.0
-            }
-
-        records_by_customer[record.customer_id]['records'].append(record)
-
-        # Calcular totais por cliente
-        records_by_customer[record.customer_id]['total_consumed'] += record.total_value
-        if record.paid:
-            records_by_customer[record.customer_id]['total_paid'] += record.total_value
-            total_paid_general += record.total_value
-        else:
-            records_by_customer[record.customer_id]['total_pending'] += record.total_value
-            total_pending_general += record.total_value
-
-        # Calcular totais gerais
-        total_consumed_general += record.total_value
+    # Totais consumido/pago/pendente por cliente em uma única consulta agrupada
+    totals_query = db.session.query(
+        ConsumptionRecord.customer_id,
+        func.count(ConsumptionRecord.id),
+        func.coalesce(func.sum(ConsumptionRecord.total_value), 0),
+        func.coalesce(func.sum(case((ConsumptionRecord.paid.is_(True), ConsumptionRecord.total_value), else_=0)), 0)
+    )
+    if customer_id_filter:
+        totals_query = totals_query.filter(ConsumptionRecord.customer_id == customer_id_filter)
+
+    totals_by_customer = {}
+    for customer_id, count, consumed, paid in totals_query.group_by(ConsumptionRecord.customer_id):
+        totals_by_customer[customer_id] = {
+            'count': count,
+            'total_consumed': consumed,
+            'total_paid': paid,
+            'total_pending': from_cents(to_cents(consumed) - to_cents(paid))
+        }
+
+    # Totais gerais (apenas dos registros do filtro), somados em centavos
+    def general_total(field):
+        return from_cents(sum(to_cents(totals[field]) for totals in totals_by_customer.values()))
+
+    total_records = sum(totals['count'] for totals in totals_by_customer.values())
+    total_consumed_general = general_total('total_consumed')
+    total_paid_general = general_total('total_paid')
+    total_pending_general = general_total('total_pending')
+
+    # Registros da página atual, com o cliente carregado na mesma consulta
+    records_query = ConsumptionRecord.query.options(joinedload(ConsumptionRecord.customer))
+    if customer_id_filter:
+        records_query = records_query.filter(ConsumptionRecord.customer_id == customer_id_filter)
+    offset = (page - 1) * CONSUMPTION_PER_PAGE
+    consumption_records = records_query.order_by(
+        ConsumptionRecord.created_at.desc(), ConsumptionRecord.id.desc()
+    ).offset(offset).limit(CONSUMPTION_PER_PAGE).all()
 
     return render_template('credit/consumption_list.html',
-                          records_by_customer=records_by_customer,
                           consumption_records=consumption_records,
+                          totals_by_customer=totals_by_customer,
                           total_consumed_general=total_consumed_general,
                           total_paid_general=total_paid_general,
                           total_pending_general=total_pending_general,
-                          all_customers=all_customers,
-                          customer_id_filter=customer_id_filter)
+                          selected_customer=selected_customer,
+                          customer_id_filter=customer_id_filter,
+                          page=page,
+                          total_records=total_records,
+                          has_next=offset + len(consumption_records) < total_records)
+
+@bp.route('/customers/api/search')
+@login_required
+def api_search_customers():
+    """API de busca de clientes fiado pelo nome ou telefone (filtro do histórico de consumo)"""
+    query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 10, type=int), 1), CUSTOMER_SEARCH_MAX_LIMIT)
+    if not query:
+        return jsonify([])
+
+    pattern = f'%{query}%'
+    customers = CustomerCredit.query.filter(
+        or_(CustomerCredit.name.ilike(pattern), CustomerCredit.phone.ilike(pattern))
+    ).order_by(CustomerCredit.name).limit(limit).all()
+
+    return jsonify([
+        {'id': customer.id, 'name': customer.name, 'phone': customer.phone}
+        for customer in customers
+    ])
 
 @bp.route('/consumption/new')
 @login_required
@@ -172,19 +201,8 @@ def add_consumption_item():
 
     customer = CustomerCredit.query.get_or_404(customer_id)
 
-    # Aqui vamos armazenar o valor unitário para fins de cálculo futuro
-    # Mas vamos criar um registro com o preço total (por enquanto apenas um item)
-    record = ConsumptionRecord(
-        customer_id=customer_id,
-        item_description=item_description,
-        total_value=float(item_price)
-    )
-
-    db.session.add(record)
-    db.session.commit()
-
-    # Recalcular a dívida total do cliente
-    customer.calculate_total_debt()
+    # Registrar o consumo com o preço total (por enquanto apenas um item) e somar à dívida
+    record = credit_ledger.add_consumption(customer, item_description, float(item_price))
     db.session.commit()
 
     return jsonify({
@@ -196,18 +214,23 @@ def add_consumption_item():
 @bp.route('/consumption/<int:customer_id>/pay', methods=['POST'])
 @login_required
 def pay_consumption(customer_id):
-    """Quita a dívida de um cliente"""
+    """Quita a dívida de um cliente (toda a dívida ou um pagamento parcial)"""
     customer = CustomerCredit.query.get_or_404(customer_id)
 
-    # Obter todos os registros pendentes para somar o valor total pago
-    pending_records = ConsumptionRecord.query.filter_by(customer_id=customer_id, paid=False).all()
-
-    total_paid = sum(record.total_value for record in pending_records)
-
-    # Marcar todos os registros pendentes como pagos
-    for record in pending_records:
-        record.paid = True
-        record.paid_date = datetime.now()
+    # Valor pago (opcional): sem valor, toda a dívida é quitada
+    amount = None
+    amount_str = (request.form.get('amount') or '').strip().replace(',', '.')
+    if amount_str:
+        try:
+            amount = from_cents(to_cents(amount_str))
+        except (ValueError, ArithmeticError):
+            amount = 0.0
+        if amount <= 0:
+            flash('Informe um valor de pagamento válido.', 'error')
+            return redirect(url_for('credit.register_consumption'))
+
+    # Quitar os consumos pendentes (dos mais antigos para os mais novos) e abater da dívida
+    total_paid = credit_ledger.settle(customer, amount)
 
     # Verificar se o usuário tem caixa aberto (exceto gerentes/admins)
     active_cashier = Cashier.query.filter_by(user_id=current_user.id, status='open').first()
@@ -216,21 +239,9 @@ def pay_consumption(customer_id):
 
     # Registrar o pagamento como venda real se o caixa estiver aberto ou for gerente
     if total_paid > 0 and (is_manager or has_open_cashier):
-        # Encontrar ou criar um produto genérico para representar o pagamento de fiado
-        credit_payment_product = Product.query.filter_by(name='Pagamento de Fiado').first()
-        if not credit_payment_product:
-            credit_payment_product = Product(
-                name='Pagamento de Fiado',
-                description='Produto para representar pagamento de dívida de fiado',
-                price=0.0,  # Preço unitário zero para não afetar cálculos indevidamente
-                quantity=0  # Sem estoque
-            )
-            db.session.add(credit_payment_product)
-            db.session.flush()  # Para obter o ID do produto
-
-        # Criar uma venda para o pagamento de fiado
+        # Criar uma venda para o pagamento de fiado com o produto genérico de pagamento
         credit_payment_sale = Sale(
-            product_id=credit_payment_product.id,
+            product_id=credit_ledger.payment_product_id(),
             quantity=1,  # Sempre 1 unidade
             total_price=total_paid,  # Valor total pago
             discount_percentage=0.0,  # Sem desconto
@@ -241,29 +252,32 @@ def pay_consumption(customer_id):
         )
 
         db.session.add(credit_payment_sale)
+        db.session.flush()  # Para obter o ID da venda
+
+        # Atualizar o resumo diário de vendas na mesma transação
+        sales_rollup.record_sale(credit_payment_sale, user_id=active_cashier.user_id if active_cashier else None)
 
         if active_cashier:
-            # Atualizar total de vendas do caixa com o valor pago
-            active_cashier.total_sales += total_paid
-
-            # Criar transação de caixa para o pagamento de fiado
-            credit_payment_transaction = CashierTransaction(
-                cashier_id=active_cashier.id,
-                transaction_type='sale',  # Tipo de transação de venda
-                amount=total_paid,
-                description=f'Pagamento de fiado - Cliente: {customer.name}',
+            # Criar transação de caixa para o pagamento de fiado e somar o valor pago aos contadores do caixa
+            cashier_ledger.record_transaction(
+                active_cashier,
+                'sale',  # Tipo de transação de venda
+                total_paid,
+                f'Pagamento de fiado - Cliente: {customer.name}',
                 related_sale_id=credit_payment_sale.id
             )
 
-            db.session.add(credit_payment_transaction)
-
     db.session.commit()
-
-    # Recalcular a dívida total (agora deve ser zero)
-    customer.calculate_total_debt()
-    db.session.commit()
-
-    flash(f'Dívida do cliente {customer.name} quitada com sucesso! Valor de R${total_paid:.2f} adicionado às vendas.', 'success')
+    if total_paid > 0:
+        metrics.inc('credit_payments')
+        metrics.inc('credit_payments_amount', total_paid)
+
+    if amount is not None and total_paid < amount:
+        flash(f'O valor informado é maior que a dívida do cliente {customer.name}; foram quitados R${total_paid:.2f}.', 'warning')
+    if amount is not None and customer.total_debt > 0:
+        flash(f'Pagamento parcial do cliente {customer.name} registrado! Valor de R${total_paid:.2f} adicionado às vendas. Dívida restante: R${customer.total_debt:.2f}.', 'success')
+    else:
+        flash(f'Dívida do cliente {customer.name} quitada com sucesso! Valor de R${total_paid:.2f} adicionado às vendas.', 'success')
     return redirect(url_for('credit.register_consumption'))
 
 @bp.route('/consumption/<int:record_id>/delete_item', methods=['POST'])
@@ -271,13 +285,9 @@ def pay_consumption(customer_id):
 def delete_consumption_item(record_id):
     """Remove um item do consumo do cliente"""
     record = ConsumptionRecord.query.get_or_404(record_id)
-    
-    db.session.delete(record)
-    db.session.commit()
-    
-    # Recalcular a dívida total do cliente
-    customer = record.customer
-    customer.calculate_total_debt()
+
+    # Remover o consumo e abater o valor pendente da dívida na mesma transação
+    credit_ledger.delete_consumption(record)
     db.session.commit()
-    
+
     return jsonify({'success': True})
\ No newline at end of file
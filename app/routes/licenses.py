@@ -2,6 +2,8 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from app.models import License, User
 from app import db
 from app.utils.license_manager import license_manager
+from app.utils.license_cache import license_cache
+from app.utils.user_cache import user_cache
 from datetime import datetime, timedelta
 from functools import wraps
 from flask_wtf import FlaskForm
@@ -110,6 +112,8 @@ def create_license():
 
         db.session.add(license)
         db.session.commit()
+        # Descartar um eventual veredicto negativo em cache para esta chave
+        license_cache.invalidate(license.license_key)
 
         # Para ambiente local: tentar salvar também no banco online para validação
         try:
@@ -172,6 +176,8 @@ def edit_license(id):
         license.user_type = user_type
 
         db.session.commit()
+        license_cache.invalidate(license.license_key)
+        user_cache.clear()  # Os registros dos usuários trazem a validade da licença
 
         flash('Licença atualizada com sucesso!', 'success')
         return redirect(url_for('licenses.list_licenses'))
@@ -185,9 +191,12 @@ def delete_license(id):
     Exclui uma licença
     """
     license = License.query.get_or_404(id)
+    license_key = license.license_key
     
     db.session.delete(license)
     db.session.commit()
+    license_cache.invalidate(license_key)
+    user_cache.clear()
     
     flash('Licença excluída com sucesso!', 'success')
     return redirect(url_for('licenses.list_licenses'))
@@ -201,6 +210,8 @@ def toggle_license(id):
     license = License.query.get_or_404(id)
     license.is_active = not license.is_active
     db.session.commit()
+    license_cache.invalidate(license.license_key)
+    user_cache.clear()
     
     status = 'ativada' if license.is_active else 'desativada'
     flash(f'Licença {status} com sucesso!', 'success')
@@ -1,9 +1,11 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import current_user
-from app.models import User, License, Cashier, Sale, Product, CashierTransaction
+from app.models import User, License, Cashier, Product, CashierTransaction
 from app import db
 from sqlalchemy import func
 from app.utils.license_manager import check_license
+from app.utils.manager_summary import manager_summary
+from app.utils.user_cache import user_cache
 from werkzeug.security import generate_password_hash
 from functools import wraps
 from datetime import datetime
@@ -39,48 +41,17 @@ def manager_required(f):
 @manager_required
 def index():
     """Página principal do painel do gerente"""
-    managed_users = User.query.filter_by(manager_id=current_user.id).all()
-    total_managed_users = len(managed_users)
-
-    # Obter caixas abertos dos usuários gerenciados
-    managed_users_ids = [user.id for user in managed_users]
-    open_cashiers = Cashier.query.filter(
-        Cashier.user_id.in_(managed_users_ids),
-        Cashier.status == 'open'
-    ).all()
-
-    # Obter vendas do dia dos usuários gerenciados
-    today = datetime.utcnow().date()
-    today_sales = []
-    total_daily_sales = 0
-    total_daily_revenue = 0
-
-    if managed_users_ids:  # Apenas executar a query se houver usuários gerenciados
-        today_sales = db.session.query(Sale).join(Cashier, Sale.cashier_id == Cashier.id).join(User, Cashier.user_id == User.id).filter(
-            Sale.sale_date >= datetime(today.year, today.month, today.day),
-            Sale.sale_date < datetime(today.year, today.month, today.day + 1),
-            User.id.in_(managed_users_ids)
-        ).all()
-
-        # Calcular resumo das vendas do dia
-        total_daily_sales = len(today_sales)
-        total_daily_revenue = sum(sale.total_price for sale in today_sales)
-
-    # Obter as últimas vendas
-    recent_sales = []
-    if managed_users_ids:  # Apenas executar a query se houver usuários gerenciados
-        recent_sales = db.session.query(Sale).join(Cashier, Sale.cashier_id == Cashier.id).join(User, Cashier.user_id == User.id).filter(
-            User.id.in_(managed_users_ids)
-        ).order_by(Sale.sale_date.desc()).limit(10).all()
+    # Resumo consolidado (consultas agregadas, em cache por alguns segundos)
+    summary = manager_summary.get(current_user.id)
 
     return render_template('manager/index.html',
-                           managed_users=managed_users,
-                           total_managed_users=total_managed_users,
-                           open_cashiers=open_cashiers,
-                           today_sales=today_sales,
-                           total_daily_sales=total_daily_sales,
-                           total_daily_revenue=total_daily_revenue,
-                           recent_sales=recent_sales)
+                           managed_users=summary['managed_users'],
+                           total_managed_users=len(summary['managed_users']),
+                           open_cashiers=summary['open_cashiers'],
+                           total_daily_sales=summary['total_daily_sales'],
+                           total_daily_revenue=summary['total_daily_revenue'],
+                           recent_sales=summary['recent_sales'],
+                           summary=summary)
 
 @bp.route('/manager/users')
 @manager_required
@@ -141,6 +112,7 @@ def new_user():
 
         db.session.add(new_user)
         db.session.commit()
+        manager_summary.invalidate(current_user.id)
 
         flash('Usuário criado com sucesso!', 'success')
         return redirect(url_for('manager.list_users'))
@@ -186,6 +158,8 @@ def edit_user(id):
             user.password = generate_password_hash(new_password)
 
         db.session.commit()
+        user_cache.invalidate(user.id)
+        manager_summary.invalidate(current_user.id)
 
         flash('Usuário atualizado com sucesso!', 'success')
         return redirect(url_for('manager.list_users'))
@@ -226,6 +200,8 @@ def delete_user(id):
     # Finalmente, deletar o usuário
     db.session.delete(user)
     db.session.commit()
+    user_cache.invalidate(id)
+    manager_summary.invalidate(current_user.id)
 
     flash('Usuário excluído com sucesso!', 'success')
     return redirect(url_for('manager.list_users'))
\ No newline at end of file
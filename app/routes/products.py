@@ -1,7 +1,11 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, make_response
 from app.models import Product
 from app import db
 from app.utils.decorators import license_required
+from app.utils.product_search import product_search
+from app.utils.barcode_lookup import barcode_lookup, normalize_barcode
+from app.utils.catalog_snapshot import catalog_snapshot
+from app.utils import credit_ledger
 from decimal import Decimal
 from flask_wtf import FlaskForm
 from wtforms import StringField, TextAreaField, FloatField, IntegerField
@@ -16,6 +20,10 @@ class ProductForm(FlaskForm):
 
 bp = Blueprint('products', __name__)
 
+# Paginação da lista de produtos e limite do autocompletar
+PRODUCTS_PER_PAGE = 50
+AUTOCOMPLETE_MAX_LIMIT = 50
+
 def validate_positive_number(value, field_name):
     """Valida se um valor é um número positivo"""
     try:
@@ -32,17 +40,101 @@ def validate_non_empty_string(value, field_name):
         raise ValueError(f'{field_name} é obrigatório.')
     return value.strip()
 
+def validate_unique_barcode(value, product_id=None):
+    """Valida se o código de barras/SKU não pertence a outro produto"""
+    code = normalize_barcode(value)
+    if code:
+        existing = Product.query.filter(Product.barcode == code, Product.id != product_id).first()
+        if existing:
+            raise ValueError(f'Código de barras já cadastrado para o produto {existing.name}.')
+    return code
+
+def product_to_dict(product):
+    return {
+        'id': product.id,
+        'name': product.name,
+        'barcode': product.barcode,
+        'category': product.category,
+        'price': product.price,
+        'quantity': product.quantity
+    }
+
 @bp.route('/products')
 @license_required
 def list_products():
     from flask_wtf import FlaskForm
     form = FlaskForm()
-    query = request.args.get('q', '')
+    query = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    offset = (page - 1) * PRODUCTS_PER_PAGE
+
     if query:
-        products = Product.query.filter(Product.name.ilike(f'%{query}%')).all()
+        # Busca no índice em memória (sem acentos, por prefixo e aproximada), ordenada por relevância
+        total, product_ids = product_search.search(query, limit=PRODUCTS_PER_PAGE, offset=offset)
+        products = load_products_in_order(product_ids)
     else:
-        products = Product.query.all()
-    return render_template('products/list.html', products=products, query=query, form=form)
+        total = db.session.query(db.func.count(Product.id)).scalar()
+        products = Product.query.order_by(Product.id).offset(offset).limit(PRODUCTS_PER_PAGE).all()
+
+    return render_template('products/list.html', products=products, query=query, form=form,
+                           page=page, total=total, has_next=offset + len(products) < total)
+
+def load_products_in_order(product_ids):
+    """Carrega os produtos pelos IDs (uma consulta) mantendo a ordem informada"""
+    if not product_ids:
+        return []
+    products = {product.id: product for product in Product.query.filter(Product.id.in_(product_ids)).all()}
+    return [products[product_id] for product_id in product_ids if product_id in products]
+
+@bp.route('/products/api/search')
+@license_required
+def api_search_products():
+    """API de autocompletar produtos (JSON)"""
+    query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 10, type=int), 1), AUTOCOMPLETE_MAX_LIMIT)
+    _, product_ids = product_search.search(query, limit=limit, with_total=False)
+
+    return jsonify([product_to_dict(product) for product in load_products_in_order(product_ids)])
+
+@bp.route('/products/api/barcode/<path:code>')
+@license_required
+def api_product_by_barcode(code):
+    """API de busca de produto pelo código de barras/SKU (leitor da tela de vendas)"""
+    product = barcode_lookup.find(code)
+    if product is None:
+        return jsonify({'error': 'Produto não encontrado para o código informado.'}), 404
+    return jsonify(product_to_dict(product))
+
+@bp.route('/products/api/catalog')
+@license_required
+def api_catalog():
+    """
+    Catálogo de produtos completo em JSON comprimido, com ETag forte.
+    O documento só é gerado novamente quando a versão do catálogo muda; os terminais
+    revalidam com If-None-Match e recebem 304 enquanto o catálogo não mudar.
+    """
+    snapshot = catalog_snapshot.get()
+    matched = [etag for etag in catalog_snapshot.etags(snapshot) if request.if_none_match.contains(etag)]
+
+    if matched:
+        catalog_snapshot.not_modified += 1
+        response = make_response('', 304)
+        response.set_etag(matched[0])
+    else:
+        encoding = catalog_snapshot.choose_encoding(request.accept_encodings, snapshot)
+        etag, body = snapshot['representations'][encoding]
+        catalog_snapshot.served += 1
+        response = make_response(body)
+        response.content_type = 'application/json; charset=utf-8'
+        if encoding != 'identity':
+            response.content_encoding = encoding
+        response.set_etag(etag)
+
+    response.headers['X-Catalog-Version'] = str(snapshot['version'])
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Accept-Encoding')
+    return response
 
 @bp.route('/products/new', methods=['GET', 'POST'])
 @license_required
@@ -56,13 +148,15 @@ def new_product():
             price = float(validate_positive_number(request.form.get('price'), 'Preço'))
             quantity = int(validate_positive_number(request.form.get('quantity'), 'Quantidade'))
             category = request.form.get('category', '').strip()
+            barcode = validate_unique_barcode(request.form.get('barcode'))
 
             product = Product(
                 name=name,
                 description=description,
                 price=price,
                 quantity=quantity,
-                category=category
+                category=category,
+                barcode=barcode
             )
 
             # Validar dados do produto
@@ -73,11 +167,13 @@ def new_product():
                 return render_template('products/form.html', form=form)
 
             db.session.add(product)
+            catalog_snapshot.bump()
             db.session.commit()
 
             # Atualizar o estoque máximo após criar o produto
             product.update_max_quantity()
             db.session.commit()
+            product_search.add_or_update(product)
 
             flash('Produto adicionado com sucesso!', 'success')
             return redirect(url_for('products.list_products'))
@@ -96,11 +192,16 @@ def edit_product(id):
 
     if request.method == 'POST' and form.validate_on_submit():
         try:
-            product.name = validate_non_empty_string(request.form.get('name'), 'Nome')
+            name = validate_non_empty_string(request.form.get('name'), 'Nome')
+            # O produto de pagamento de fiado é identificado pelo nome em outros processos
+            if name != product.name and product.id == credit_ledger.payment_product_id():
+                raise ValueError('O nome do produto de pagamento de fiado não pode ser alterado.')
+            product.name = name
             product.description = request.form.get('description', '').strip()
             product.price = float(validate_positive_number(request.form.get('price'), 'Preço'))
             product.quantity = int(validate_positive_number(request.form.get('quantity'), 'Quantidade'))
             product.category = request.form.get('category', '').strip()
+            product.barcode = validate_unique_barcode(request.form.get('barcode'), product.id)
 
             # Validar dados do produto
             validation_errors = product.validate_data()
@@ -111,7 +212,9 @@ def edit_product(id):
 
             # Atualizar o estoque máximo após atualizar o produto
             product.update_max_quantity()
+            catalog_snapshot.bump()
             db.session.commit()
+            product_search.add_or_update(product)
 
             flash('Produto atualizado com sucesso!', 'success')
             return redirect(url_for('products.list_products'))
@@ -127,16 +230,26 @@ def edit_product(id):
 def delete_product(id):
     product = Product.query.get_or_404(id)
 
+    # O produto de pagamento de fiado tem o ID guardado em cada processo (credit_ledger)
+    if product.id == credit_ledger.payment_product_id():
+        flash('O produto de pagamento de fiado é usado pelo sistema e não pode ser excluído.', 'error')
+        return redirect(url_for('products.list_products'))
+
     # Primeiro deletar todas as vendas associadas ao produto manualmente
     # para evitar o problema de atualização do product_id para NULL
-    from app.models import Sale
+    from app.models import Sale, DailySalesRollup
     sales_to_delete = Sale.query.filter_by(product_id=id).all()
     for sale in sales_to_delete:
         db.session.delete(sale)
 
+    # Remover também o resumo diário das vendas excluídas
+    DailySalesRollup.query.filter_by(product_id=id).delete(synchronize_session=False)
+
     # Depois deletar o produto
     db.session.delete(product)
+    catalog_snapshot.bump()
     db.session.commit()
+    product_search.remove(id)
 
     flash('Produto excluído com sucesso!', 'success')
     return redirect(url_for('products.list_products'))
\ No newline at end of file
@@ -1,9 +1,13 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import current_user
-from app.models import Sale, Product, Cashier, CashierTransaction
+from sqlalchemy import and_, or_
+from app.models import Sale, Product, Cashier, User
 from app import db
 from app.utils.decorators import license_required
-from datetime import datetime
+from app.utils.checkout import checkout_service, CheckoutError
+from app.utils.metrics import metrics
+from app.utils.money import to_cents, from_cents
+from datetime import datetime, timedelta
 from flask_wtf import FlaskForm
 import os
 
@@ -14,17 +18,135 @@ class SalesForm(FlaskForm):
         csrf = True
         csrf_secret = os.environ.get('SECRET_KEY', 'sua_chave_secreta_aqui').encode('utf-8')
 
+SALES_PER_PAGE = 50
+SALES_MAX_PER_PAGE = 200
+
+
+def encode_sales_cursor(sale_date, sale_id):
+    """Codifica a posição (sale_date, id) da última venda exibida"""
+    return f"{sale_date.isoformat()}_{sale_id}"
+
+
+def decode_sales_cursor(cursor):
+    """Decodifica o cursor de paginação; retorna None se for inválido"""
+    try:
+        date_str, id_str = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(date_str), int(id_str)
+    except (AttributeError, ValueError):
+        return None
+
+
+def parse_sales_filters(args):
+    """Lê os filtros da listagem de vendas a partir da query string"""
+    def parse_day(value):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d') if value else None
+        except ValueError:
+            return None
+
+    per_page = args.get('per_page', SALES_PER_PAGE, type=int) or SALES_PER_PAGE
+    return {
+        'date_from': parse_day(args.get('date_from')),
+        'date_to': parse_day(args.get('date_to')),
+        'cashier_id': args.get('cashier_id', type=int),
+        'product_id': args.get('product_id', type=int),
+        'cursor': decode_sales_cursor(args.get('cursor')),
+        'per_page': max(1, min(per_page, SALES_MAX_PER_PAGE))
+    }
+
+
+def query_sales_page(filters):
+    """
+    Retorna uma página de vendas usando paginação por cursor em (sale_date, id),
+    com nome do produto e do operador de caixa carregados na mesma consulta.
+    """
+    query = db.session.query(
+        Sale.id,
+        Sale.quantity,
+        Sale.total_price,
+        Sale.discount_percentage,
+        Sale.final_price,
+        Sale.sale_date,
+        Sale.cashier_id,
+        Sale.product_id,
+        Product.name.label('product_name'),
+        User.username.label('cashier_username')
+    ).outerjoin(
+        Product, Sale.product_id == Product.id
+    ).outerjoin(
+        Cashier, Sale.cashier_id == Cashier.id
+    ).outerjoin(
+        User, Cashier.user_id == User.id
+    ).filter(Sale.sale_date.isnot(None))
+
+    if filters['date_from']:
+        query = query.filter(Sale.sale_date >= filters['date_from'])
+    if filters['date_to']:
+        # Data final inclusiva: vendas até o fim do dia informado
+        query = query.filter(Sale.sale_date < filters['date_to'] + timedelta(days=1))
+    if filters['cashier_id']:
+        query = query.filter(Sale.cashier_id == filters['cashier_id'])
+    if filters['product_id']:
+        query = query.filter(Sale.product_id == filters['product_id'])
+
+    if filters['cursor']:
+        cursor_date, cursor_id = filters['cursor']
+        query = query.filter(or_(
+            Sale.sale_date < cursor_date,
+            and_(Sale.sale_date == cursor_date, Sale.id < cursor_id)
+        ))
+
+    per_page = filters['per_page']
+    rows = query.order_by(Sale.sale_date.desc(), Sale.id.desc()).limit(per_page + 1).all()
+
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    next_cursor = encode_sales_cursor(rows[-1].sale_date, rows[-1].id) if has_next else None
+    return rows, next_cursor
+
+
 @bp.route('/sales')
 @license_required
 def list_sales():
-    sales = Sale.query.all()
-    return render_template('sales/list.html', sales=sales)
+    filters = parse_sales_filters(request.args)
+    sales, next_cursor = query_sales_page(filters)
+
+    # Manter os filtros atuais nos links de paginação
+    filter_args = {key: request.args.get(key) for key in ('date_from', 'date_to', 'cashier_id', 'product_id', 'per_page')
+                   if request.args.get(key)}
+
+    return render_template('sales/list.html', sales=sales, next_cursor=next_cursor,
+                           filters=filters, filter_args=filter_args)
+
+
+@bp.route('/sales/api/list')
+@license_required
+def api_list_sales():
+    """API (JSON) da listagem de vendas com os mesmos filtros e cursor da página"""
+    filters = parse_sales_filters(request.args)
+    sales, next_cursor = query_sales_page(filters)
+
+    sales_data = []
+    for sale in sales:
+        sales_data.append({
+            'id': sale.id,
+            'product_id': sale.product_id,
+            'product_name': sale.product_name,
+            'quantity': sale.quantity,
+            'total_price': sale.total_price,
+            'discount_percentage': sale.discount_percentage or 0,
+            'final_price': sale.final_price or sale.total_price,
+            'sale_date': sale.sale_date.isoformat(),
+            'cashier_id': sale.cashier_id,
+            'cashier_username': sale.cashier_username
+        })
+
+    return jsonify({'sales': sales_data, 'next_cursor': next_cursor})
 
 @bp.route('/sales/new', methods=['GET', 'POST'])
 @license_required
 def new_sale():
     form = SalesForm()
-    products = Product.query.all()
 
     # Verificar se o usuário tem caixa aberto (exceto gerentes/admins)
     active_cashier = Cashier.query.filter_by(user_id=current_user.id, status='open').first()
@@ -39,7 +161,7 @@ def new_sale():
     if request.method == 'POST':
         if not is_manager and not active_cashier:
             flash('Você precisa abrir o caixa antes de registrar uma venda.', 'error')
-            return render_template('sales/form.html', products=products, form=form)
+            return render_template('sales/form.html', form=form, has_open_cashier=has_open_cashier)
 
     if request.method == 'POST' and form.validate_on_submit():
         # Verificar se é uma venda múltipla ou única
@@ -52,102 +174,11 @@ def new_sale():
                 products_list = json.loads(products_data)
             except json.JSONDecodeError:
                 flash('Dados de produtos inválidos.', 'error')
-                return render_template('sales/form.html', products=products, form=form)
+                return render_template('sales/form.html', form=form, has_open_cashier=has_open_cashier)
 
             if not products_list:
                 flash('Nenhum produto selecionado.', 'error')
-                return render_template('sales/form.html', products=products, form=form)
-
-            # Determinar se o usuário é gerente (pode vender com caixa fechado)
-            is_manager = current_user.role == 'manager' or current_user.is_admin
-
-            # Verificar se o caixa está aberto para usuários normais
-            if not is_manager and not active_cashier:
-                flash('Você precisa abrir o caixa antes de registrar uma venda.', 'error')
-                return render_template('sales/form.html', products=products, form=form)
-
-            # Verificar estoque e calcular totais
-            total_sale_price = 0
-            products_to_update = []
-
-            for item in products_list:
-                product_id = item['product_id']
-                quantity = item['quantity']
-                # Verificar se há desconto aplicado (vem do frontend)
-                discount_percentage = item.get('discount_percentage', 0.0)
-
-                product = Product.query.get_or_404(product_id)
-
-                if product.quantity == 0:
-                    flash(f'Item sem estoque: {product.name}', 'error')
-                    return render_template('sales/form.html', products=products, form=form)
-                elif product.quantity < quantity:
-                    flash(f'Quantidade insuficiente em estoque para {product.name}!', 'error')
-                    return render_template('sales/form.html', products=products, form=form)
-
-                total_price = product.price * quantity
-                discount_amount = (total_price * discount_percentage) / 100
-                final_price = total_price - discount_amount
-                total_sale_price += final_price  # Somar o preço final com desconto
-
-                # Adicionar produto para atualização
-                products_to_update.append({
-                    'product': product,
-                    'quantity': quantity,
-                    'total_price': total_price,
-                    'discount_percentage': discount_percentage,
-                    'discount_amount': discount_amount,
-                    'final_price': final_price
-                })
-
-            # Salvar todas as vendas
-            sale_ids = []
-            for item in products_to_update:
-                product = item['product']
-                quantity = item['quantity']
-                total_price = item['total_price']
-                discount_percentage = item['discount_percentage']
-                discount_amount = item['discount_amount']
-                final_price = item['final_price']
-
-                sale = Sale(
-                    product_id=product.id,
-                    quantity=quantity,
-                    total_price=total_price,
-                    discount_percentage=discount_percentage,
-                    discount_amount=discount_amount,
-                    final_price=final_price,
-                    cashier_id=active_cashier.id if active_cashier else None
-                )
-
-                # Atualizar estoque
-                product.quantity -= quantity
-                product.update_max_quantity()
-
-                db.session.add(sale)
-                db.session.flush()  # Para obter o ID da venda antes do commit
-                sale_ids.append(sale.id)
-
-                if active_cashier:
-                    # Atualizar total de vendas do caixa com o preço final após desconto
-                    active_cashier.total_sales += final_price
-
-                    # Criar transação de caixa para a venda
-                    transaction = CashierTransaction(
-                        cashier_id=active_cashier.id,
-                        transaction_type='sale',
-                        amount=final_price,  # Usar o preço final após desconto
-                        description=f'Venda - {product.name} (Desconto: {discount_percentage}%)',
-                        related_sale_id=sale.id
-                    )
-
-                    db.session.add(transaction)
-
-            db.session.commit()
-
-            flash(f'{len(products_list)} vendas registradas com sucesso!', 'success')
-            return redirect(url_for('sales.list_sales'))
-
+                return render_template('sales/form.html', form=form, has_open_cashier=has_open_cashier)
         else:
             # Processar venda individual
             # Obter os dados da venda individual
@@ -157,76 +188,40 @@ def new_sale():
             # Verificar se os campos obrigatórios existem e não estão vazios
             if not product_id_str or not quantity_str:
                 flash('Por favor, selecione um produto e informe a quantidade.', 'error')
-                return render_template('sales/form.html', products=products, form=form)
+                return render_template('sales/form.html', form=form, has_open_cashier=has_open_cashier)
 
             try:
                 product_id = int(product_id_str)
                 quantity = int(quantity_str)
+                discount_percentage = float(request.form.get('discount_percentage', 0.0) or 0.0)  # Obter desconto do formulário
             except ValueError:
                 flash('Dados inválidos para produto ou quantidade.', 'error')
-                return render_template('sales/form.html', products=products, form=form)
-
-            discount_percentage = float(request.form.get('discount_percentage', 0.0))  # Obter desconto do formulário
-
-            product = Product.query.get_or_404(product_id)
-
-            if product.quantity == 0:
-                flash(f'Item sem estoque: {product.name}', 'error')
-                return render_template('sales/form.html', products=products, form=form)
-            elif product.quantity < quantity:
-                flash('Quantidade insuficiente em estoque!', 'error')
-                return render_template('sales/form.html', products=products, form=form)
-
-            total_price = product.price * quantity
-            discount_amount = (total_price * discount_percentage) / 100
-            final_price = total_price - discount_amount
-
-            # Verificar se o usuário pode registrar a venda com base no status do caixa
-            active_cashier = Cashier.query.filter_by(user_id=current_user.id, status='open').first()
-
-            # Determinar se o usuário é gerente (pode vender com caixa fechado)
-            is_manager = current_user.role == 'manager' or current_user.is_admin
-
-            # Verificar se o caixa está aberto para usuários normais
-            if not is_manager and not active_cashier:
-                flash('Você precisa abrir o caixa antes de registrar uma venda.', 'error')
-                return render_template('sales/form.html', products=products, form=form)
-
-            sale = Sale(
-                product_id=product_id,
-                quantity=quantity,
-                total_price=total_price,
-                discount_percentage=discount_percentage,
-                discount_amount=discount_amount,
-                final_price=final_price,
-                cashier_id=active_cashier.id if active_cashier else None  # Associar diretamente ao caixa ativo
-            )
-
-            # Atualizar estoque
-            product.quantity -= quantity
-            product.update_max_quantity()  # Atualizar quantidade máxima se necessário
-
-            db.session.add(sale)
-            db.session.flush()  # Para obter o ID da venda antes do commit
-
-            if active_cashier:
-                # Atualizar total de vendas do caixa com o preço final após desconto
-                active_cashier.total_sales += final_price
-
-                # Criar transação de caixa para a venda
-                transaction = CashierTransaction(
-                    cashier_id=active_cashier.id,
-                    transaction_type='sale',
-                    amount=final_price,  # Usar o preço final após desconto
-                    description=f'Venda - {product.name} (Desconto: {discount_percentage}%)',
-                    related_sale_id=sale.id
-                )
-
-                db.session.add(transaction)
-
+                return render_template('sales/form.html', form=form, has_open_cashier=has_open_cashier)
+
+            products_list = [{
+                'product_id': product_id,
+                'quantity': quantity,
+                'discount_percentage': discount_percentage
+            }]
+
+        # Registrar todas as vendas da cesta: uma consulta para os produtos, baixa de estoque
+        # em um único comando e inserção das vendas/transações em lote
+        try:
+            sales = checkout_service.checkout(products_list, active_cashier)
+            # Valor calculado antes do commit (depois dele os atributos seriam recarregados do banco)
+            sales_amount = from_cents(sum(to_cents(sale.final_price) for sale in sales))
             db.session.commit()
+            metrics.inc('sales', len(sales))
+            metrics.inc('sales_amount', sales_amount)
+        except CheckoutError as e:
+            db.session.rollback()
+            flash(str(e), 'error')
+            return render_template('sales/form.html', form=form, has_open_cashier=has_open_cashier)
 
+        if products_data:
+            flash(f'{len(sales)} vendas registradas com sucesso!', 'success')
+        else:
             flash('Venda registrada com sucesso!', 'success')
-            return redirect(url_for('sales.list_sales'))
+        return redirect(url_for('sales.list_sales'))
 
-    return render_template('sales/form.html', products=products, form=form)
\ No newline at end of file
+    return render_template('sales/form.html', form=form, has_open_cashier=has_open_cashier)
\ No newline at end of file
@@ -0,0 +1,43 @@
+def normalize_barcode(code):
+    """Remove espaços do código de barras/SKU; código vazio é tratado como ausente (None)"""
+    code = (code or '').strip()
+    return code or None
+
+
+class BarcodeLookup:
+    """
+    Busca de produto pelo código de barras/SKU para a tela de vendas.
+    Uma única consulta pelo índice único de barcode (ix_product_barcode): o produto é
+    carregado por completo (preço e estoque atuais) e não há estado em memória que possa
+    ficar desatualizado entre processos.
+    """
+
+    def __init__(self):
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+
+    def find(self, code):
+        """Retorna o produto com o código de barras/SKU informado ou None"""
+        from app.models import Product
+
+        code = normalize_barcode(code)
+        if not code:
+            return None
+
+        product = Product.query.filter_by(barcode=code).first()
+        if product is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return product
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+# Instância global da busca por código de barras
+barcode_lookup = BarcodeLookup()
\ No newline at end of file
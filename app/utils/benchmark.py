@@ -0,0 +1,282 @@
+import json
+import platform
+import re
+import threading
+import time
+from datetime import datetime
+from flask import has_app_context
+from sqlalchemy import event, func, update
+from app import db
+from app.models import User, Product, Sale, Cashier, CashierTransaction, ConsumptionRecord
+from app.utils.synthetic_store import SYNTHETIC_LICENSE_KEY
+
+try:
+    import resource
+except ImportError:  # Indisponível no Windows: o pico de memória não é medido
+    resource = None
+
+CSRF_TOKEN_PATTERN = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, pct):
+    """Percentil pelo método do posto mais próximo (valores já ordenados)"""
+    if not values:
+        return None
+    rank = max(int(round(pct / 100 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def peak_rss_kb():
+    """Pico de memória residente do processo (KB) ou None se não for possível medir"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # No macOS o valor vem em bytes; no Linux em KB
+    return peak // 1024 if platform.system() == 'Darwin' else peak
+
+
+class QueryCounter:
+    """Conta os comandos SQL executados pela thread atual enquanto estiver ativo"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self._thread = threading.get_ident()
+
+    def _before_cursor_execute(self, *args, **kwargs):
+        # O registro de atividades grava em outra thread e não entra na contagem
+        if threading.get_ident() == self._thread:
+            self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+
+
+class Scenario:
+    """Uma requisição medida: endpoint, usuário, método, URL e preparação (fora da medição)"""
+
+    def __init__(self, name, username, path, method='GET', data=None, prepare=None):
+        self.name = name
+        self.username = username
+        self.path = path
+        self.method = method
+        self.data = data
+        self.prepare = prepare
+
+
+class Benchmark:
+    """
+    Mede os endpoints mais usados com o cliente de testes do Flask sobre uma loja sintética
+    (gerada por SyntheticStore). Para cada cenário informa latência (p50/p95/p99),
+    consultas SQL por requisição e o pico de memória do processo; o resultado em JSON pode
+    ser comparado entre versões com compare().
+    """
+
+    def __init__(self, app, iterations=50, warmup=5):
+        self.app = app
+        self.iterations = iterations
+        self.warmup = warmup
+        self._clients = {}
+        self._user_ids = {}
+        self._cashier_id = None
+
+    def _user_id(self, username):
+        user_id = self._user_ids.get(username)
+        if user_id is None:
+            user_id = db.session.query(User.id).filter(User.username == username).scalar()
+            if user_id is None:
+                raise ValueError(f'Usuário {username} não encontrado; gere a loja com "flask --app run benchmark-seed".')
+            self._user_ids[username] = user_id
+        return user_id
+
+    def _client(self, username):
+        """Cliente de testes autenticado (sessão do Flask-Login) com o token CSRF da sessão"""
+        client = self.app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(self._user_ids[username])
+            session['_fresh'] = True
+        html = client.get('/sales/new').get_data(as_text=True)
+        match = CSRF_TOKEN_PATTERN.search(html)
+        client.csrf_token = match.group(1) if match else None
+        return client
+
+    def reopen_cashier(self):
+        """Reabre o caixa do dia do usuário de vendas (fechado pelo cenário de fechamento)"""
+        with self.app.app_context():
+            db.session.execute(
+                update(Cashier).where(Cashier.id == self._cashier_id)
+                .values(status='open', closing_date=None, final_amount=None)
+            )
+            db.session.commit()
+
+    def scenarios(self):
+        """Cenários padrão: venda, dashboard, fiado, painel do gerente e fechamento de caixa"""
+        from app.utils.dashboard_stats import dashboard_stats
+        from app.utils.manager_summary import manager_summary
+
+        cashier_user = 'bench_user1'
+        manager = 'bench_manager'
+        # Caixa mais recente do usuário (o do dia atual)
+        self._cashier_id = db.session.query(Cashier.id).filter(
+            Cashier.user_id == self._user_id(cashier_user)
+        ).order_by(Cashier.id.desc()).limit(1).scalar()
+        self._user_id(manager)
+        product_id = db.session.query(func.min(Product.id)).scalar()
+
+        return [
+            Scenario('sales.new_sale', cashier_user, '/sales/new'),
+            Scenario('sales.new_sale:post', cashier_user, '/sales/new', method='POST',
+                     data={'product_id': product_id, 'quantity': 1, 'discount_percentage': 0}),
+            Scenario('main.dashboard', manager, '/dashboard'),
+            Scenario('main.dashboard:cold', manager, '/dashboard', prepare=dashboard_stats.invalidate),
+            Scenario('credit.list_consumption', manager, '/credit/consumption'),
+            Scenario('credit.list_consumption:customer', manager, '/credit/consumption?customer_id=1'),
+            Scenario('manager.index:cold', manager, '/manager', prepare=manager_summary.clear),
+            # O fechamento é medido sempre sobre o mesmo caixa, reaberto antes de cada requisição
+            Scenario('cashier.close_cashier', cashier_user, f'/cashier/close/{self._cashier_id}', method='POST',
+                     data={}, prepare=self.reopen_cashier),
+        ]
+
+    def _request(self, client, scenario):
+        if scenario.method == 'POST':
+            data = dict(scenario.data or {}, csrf_token=client.csrf_token)
+            return client.post(scenario.path, data=data)
+        return client.get(scenario.path)
+
+    def run_scenario(self, scenario, engine):
+        client = self._clients.get(scenario.username)
+        if client is None:
+            client = self._clients[scenario.username] = self._client(scenario.username)
+
+        for _ in range(self.warmup):
+            if scenario.prepare:
+                scenario.prepare()
+            self._request(client, scenario)
+
+        latencies = []
+        queries = []
+        status_codes = {}
+        for _ in range(self.iterations):
+            if scenario.prepare:
+                scenario.prepare()
+            with QueryCounter(engine) as counter:
+                start = time.perf_counter()
+                response = self._request(client, scenario)
+                elapsed = time.perf_counter() - start
+            status_codes[str(response.status_code)] = status_codes.get(str(response.status_code), 0) + 1
+            latencies.append(elapsed * 1000)
+            queries.append(counter.count)
+
+        latencies.sort()
+        result = {f'p{pct}_ms': round(percentile(latencies, pct), 3) for pct in PERCENTILES}
+        result.update({
+            'mean_ms': round(sum(latencies) / len(latencies), 3),
+            'queries_per_request': round(sum(queries) / len(queries), 2),
+            'max_queries': max(queries),
+            'errors': sum(count for code, count in status_codes.items() if int(code) >= 400),
+            'status_codes': status_codes,
+            'peak_rss_kb': peak_rss_kb()
+        })
+        return result
+
+    @staticmethod
+    def dataset():
+        """Tamanho da loja medida"""
+        return {
+            'products': db.session.query(func.count(Product.id)).scalar(),
+            'users': db.session.query(func.count(User.id)).filter(User.license_key == SYNTHETIC_LICENSE_KEY).scalar(),
+            'cashiers': db.session.query(func.count(Cashier.id)).scalar(),
+            'sales': db.session.query(func.count(Sale.id)).scalar(),
+            'cashier_transactions': db.session.query(func.count(CashierTransaction.id)).scalar(),
+            'consumption_records': db.session.query(func.count(ConsumptionRecord.id)).scalar()
+        }
+
+    def run(self, only=None, label=None, progress=None):
+        """
+        Executa os cenários (todos ou os indicados em only) e retorna o relatório.
+        Cada requisição precisa do seu próprio contexto da aplicação (sessão do banco e usuário
+        autenticado), como em produção; se já houver um contexto ativo (comandos do flask),
+        a medição é feita em uma thread separada, que não o herda.
+        """
+        if not has_app_context():
+            return self._run(only, label, progress)
+
+        outcome = {}
+
+        def target():
+            try:
+                outcome['report'] = self._run(only, label, progress)
+            except BaseException as e:
+                outcome['error'] = e
+
+        worker = threading.Thread(target=target, name='benchmark')
+        worker.start()
+        worker.join()
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['report']
+
+    def _run(self, only, label, progress):
+        self._clients = {}
+        with self.app.app_context():
+            engine = db.engine
+            scenarios = self.scenarios()
+            report = {
+                'meta': {
+                    'label': label,
+                    'generated_at': datetime.utcnow().isoformat(),
+                    'python': platform.python_version(),
+                    'database': engine.dialect.name,
+                    'iterations': self.iterations,
+                    'warmup': self.warmup,
+                    'dataset': self.dataset()
+                },
+                'endpoints': {}
+            }
+
+        self.reopen_cashier()
+        try:
+            for scenario in scenarios:
+                if only and scenario.name not in only and scenario.name.split(':')[0] not in only:
+                    continue
+                report['endpoints'][scenario.name] = self.run_scenario(scenario, engine)
+                if progress:
+                    progress(scenario.name, report['endpoints'][scenario.name])
+        finally:
+            # Deixar a loja como foi gerada (caixa do dia aberto)
+            self.reopen_cashier()
+        return report
+
+
+def compare(baseline, current, threshold=0.2):
+    """
+    Compara dois relatórios e retorna as regressões: p95 mais de threshold (fração) acima
+    do anterior ou mais consultas por requisição.
+    """
+    regressions = []
+    for name, result in current['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if not previous:
+            continue
+        if result['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.2f} ms -> {result['p95_ms']:.2f} ms")
+        if result['queries_per_request'] > previous['queries_per_request']:
+            regressions.append(f"{name}: consultas por requisição {previous['queries_per_request']} -> "
+                               f"{result['queries_per_request']}")
+    return regressions
+
+
+def save_report(report, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2, sort_keys=True, ensure_ascii=False)
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
\ No newline at end of file
@@ -0,0 +1,112 @@
+from sqlalchemy import case, func, insert, select, update
+from app import db
+from app.models import Cashier, CashierTransaction
+from app.utils.money import to_cents, from_cents
+
+# Sinal de cada tipo de transação no saldo do caixa
+TRANSACTION_SIGNS = {'sale': 1, 'entry': 1, 'expense': -1, 'exit': -1}
+
+# Diferença máxima (em reais) tolerada entre os contadores e a soma das transações
+DRIFT_TOLERANCE = 0.005
+
+COUNTER_FIELDS = ('total_sales', 'total_expenses', 'balance')
+
+
+def record_transactions(cashier, transactions):
+    """
+    Registra transações de caixa (lista de dicts com transaction_type, amount, description,
+    related_sale_id) e atualiza os contadores do caixa na mesma transação.
+    Os contadores são incrementados com um único UPDATE atômico no banco, então vendas
+    simultâneas no mesmo caixa não perdem atualizações.
+    """
+    if not transactions:
+        return
+
+    # Totais acumulados em centavos inteiros
+    sales = expenses = balance = 0
+    rows = []
+    for transaction in transactions:
+        transaction_type = transaction['transaction_type']
+        amount = to_cents(transaction['amount'] or 0)
+        if transaction_type == 'sale':
+            sales += amount
+        elif transaction_type == 'expense':
+            expenses += amount
+        balance += TRANSACTION_SIGNS.get(transaction_type, 0) * amount
+        rows.append(dict(transaction, cashier_id=cashier.id))
+
+    db.session.execute(insert(CashierTransaction), rows)
+    db.session.execute(
+        update(Cashier)
+        .where(Cashier.id == cashier.id)
+        .values(
+            total_sales=func.coalesce(Cashier.total_sales, 0) + from_cents(sales),
+            total_expenses=func.coalesce(Cashier.total_expenses, 0) + from_cents(expenses),
+            balance=func.coalesce(Cashier.balance, 0) + from_cents(balance)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    # Os contadores serão recarregados do banco se forem acessados novamente
+    db.session.expire(cashier, list(COUNTER_FIELDS))
+
+
+def record_transaction(cashier, transaction_type, amount, description=None, related_sale_id=None):
+    """Registra uma transação de caixa e atualiza os contadores do caixa"""
+    record_transactions(cashier, [{
+        'transaction_type': transaction_type,
+        'amount': amount,
+        'description': description,
+        'related_sale_id': related_sale_id
+    }])
+
+
+def reconcile(cashier_ids=None, include_closed=False, fix=False):
+    """
+    Compara os contadores dos caixas com a soma (SQL) das suas transações.
+    Por padrão verifica apenas os caixas abertos, cujos contadores estão em uso.
+    Retorna a lista de divergências; com fix=True os contadores são corrigidos.
+    """
+    def total(condition, value):
+        return func.coalesce(func.sum(case((condition, value), else_=0)), 0)
+
+    signed_amount = case(
+        (CashierTransaction.transaction_type.in_(['sale', 'entry']), CashierTransaction.amount),
+        (CashierTransaction.transaction_type.in_(['expense', 'exit']), -CashierTransaction.amount),
+        else_=0
+    )
+    sums = select(
+        CashierTransaction.cashier_id.label('cashier_id'),
+        total(CashierTransaction.transaction_type == 'sale', CashierTransaction.amount).label('total_sales'),
+        total(CashierTransaction.transaction_type == 'expense', CashierTransaction.amount).label('total_expenses'),
+        func.coalesce(func.sum(signed_amount), 0).label('balance')
+    ).group_by(CashierTransaction.cashier_id).subquery()
+
+    # Contadores e somas lidos em uma única consulta
+    query = select(
+        Cashier.id,
+        Cashier.total_sales, Cashier.total_expenses, Cashier.balance,
+        sums.c.total_sales, sums.c.total_expenses, sums.c.balance
+    ).outerjoin(sums, sums.c.cashier_id == Cashier.id)
+    if not include_closed:
+        query = query.where(Cashier.status == 'open')
+    if cashier_ids is not None:
+        query = query.where(Cashier.id.in_(list(cashier_ids)))
+
+    drifts = []
+    for row in db.session.execute(query):
+        cashier_id = row[0]
+        counters = row[1:4]
+        expected = row[4:7]
+        fixes = {}
+        for field, counter, value in zip(COUNTER_FIELDS, counters, expected):
+            counter = float(counter or 0.0)
+            value = float(value or 0.0)
+            if abs(counter - value) > DRIFT_TOLERANCE:
+                drifts.append({'cashier_id': cashier_id, 'field': field, 'counter': counter, 'expected': value})
+                fixes[field] = value
+        if fix and fixes:
+            db.session.execute(update(Cashier).where(Cashier.id == cashier_id).values(**fixes))
+
+    if fix and drifts:
+        db.session.commit()
+    return drifts
\ No newline at end of file
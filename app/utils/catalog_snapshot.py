@@ -0,0 +1,136 @@
+import gzip
+import hashlib
+import json
+import threading
+from datetime import datetime
+from sqlalchemy import insert, select, update
+
+try:
+    import brotli
+except ImportError:  # Compressão brotli opcional
+    brotli = None
+
+CATALOG_VERSION_ID = 1
+
+
+class CatalogSnapshot:
+    """
+    Documento JSON com o catálogo de produtos (id, nome, código de barras, categoria e preço),
+    gerado uma vez por versão do catálogo e mantido já comprimido (gzip e, se instalado, brotli).
+    A versão fica no banco de dados e é incrementada na mesma transação de cada alteração de
+    produto, de modo que todos os processos enxergam a mesma versão. O estoque não faz parte
+    do documento: ele muda a cada venda e é conferido no registro da venda.
+    """
+
+    def __init__(self, compress_level=6):
+        self.compress_level = compress_level
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.builds = 0
+        self.served = 0
+        self.not_modified = 0
+
+    def init_app(self, app):
+        """Configura o nível de compressão a partir das configurações da aplicação"""
+        self.compress_level = app.config.get('CATALOG_COMPRESS_LEVEL', self.compress_level)
+
+    def current_version(self):
+        """Versão atual do catálogo (uma consulta pela chave primária)"""
+        from app import db
+        from app.models import CatalogVersion
+        version = db.session.execute(
+            select(CatalogVersion.version).where(CatalogVersion.id == CATALOG_VERSION_ID)
+        ).scalar()
+        return version or 0
+
+    def bump(self):
+        """
+        Incrementa a versão do catálogo na transação atual.
+        Deve ser chamado antes do commit de qualquer alteração de produto.
+        """
+        from app import db
+        from app.models import CatalogVersion
+        result = db.session.execute(
+            update(CatalogVersion)
+            .where(CatalogVersion.id == CATALOG_VERSION_ID)
+            .values(version=CatalogVersion.version + 1, updated_at=datetime.utcnow())
+        )
+        if result.rowcount == 0:
+            db.session.execute(insert(CatalogVersion).values(
+                id=CATALOG_VERSION_ID, version=1, updated_at=datetime.utcnow()
+            ))
+
+    def _build(self, version):
+        from app import db
+        from app.models import Product
+        rows = db.session.execute(
+            select(Product.id, Product.name, Product.barcode, Product.category, Product.price)
+            .order_by(Product.id)
+        ).all()
+        document = {
+            'version': version,
+            'generated_at': datetime.utcnow().isoformat(),
+            'products': [
+                {'id': id_, 'name': name, 'barcode': barcode, 'category': category, 'price': price}
+                for id_, name, barcode, category, price in rows
+            ]
+        }
+        body = json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+        # ETag forte: muda com o conteúdo e com a codificação de cada representação
+        digest = hashlib.sha1(body).hexdigest()[:16]
+        representations = {'identity': (f'{version}-{digest}', body)}
+        representations['gzip'] = (f'{version}-{digest}-gz', gzip.compress(body, self.compress_level))
+        if brotli is not None:
+            representations['br'] = (f'{version}-{digest}-br', brotli.compress(body))
+        self.builds += 1
+        return {'version': version, 'representations': representations}
+
+    def get(self, version=None):
+        """Snapshot da versão atual do catálogo, gerado apenas quando a versão muda"""
+        if version is None:
+            version = self.current_version()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot['version'] != version:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot['version'] != version:
+                    snapshot = self._build(version)
+                    self._snapshot = snapshot
+        return snapshot
+
+    @staticmethod
+    def choose_encoding(accept_encodings, snapshot):
+        """Codificação preferida pelo cliente entre as disponíveis (br, gzip ou identity)"""
+        for encoding in ('br', 'gzip'):
+            if encoding in snapshot['representations'] and accept_encodings[encoding]:
+                return encoding
+        return 'identity'
+
+    @staticmethod
+    def etags(snapshot):
+        """ETags de todas as representações da versão (qualquer uma vale para o If-None-Match)"""
+        return [etag for etag, _ in snapshot['representations'].values()]
+
+    def invalidate(self):
+        """Descarta o snapshot em memória; ele será gerado novamente no próximo acesso"""
+        with self._lock:
+            self._snapshot = None
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            'version': snapshot['version'] if snapshot else None,
+            'sizes': {
+                encoding: len(body) for encoding, (_, body) in snapshot['representations'].items()
+            } if snapshot else {},
+            'builds': self.builds,
+            'served': self.served,
+            'not_modified': self.not_modified
+        }
+
+
+# Instância global do snapshot do catálogo
+catalog_snapshot = CatalogSnapshot()
\ No newline at end of file
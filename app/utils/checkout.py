@@ -0,0 +1,195 @@
+import bisect
+import random
+import threading
+import time
+from sqlalchemy import case, update
+from app import db
+from app.models import Product, Sale
+from app.utils import cashier_ledger, sales_rollup
+from app.utils.money import to_cents, from_cents, percent_of
+
+
+class CheckoutError(ValueError):
+    """Erro de validação de uma venda (produto inexistente, sem estoque, etc.)"""
+
+
+class CheckoutService:
+    """
+    Serviço de fechamento de vendas com vários itens.
+    Carrega todos os produtos da cesta em uma única consulta, valida o estoque em memória,
+    baixa o estoque com um único UPDATE condicional (quantity >= solicitado) e insere as
+    vendas e transações de caixa em lote.
+
+    Não há bloqueio de linhas: se outro caixa vender o mesmo estoque entre a leitura e a
+    baixa, o UPDATE condicional não altera todas as linhas, a transação é desfeita e a
+    operação é repetida (até max_retries vezes) com os dados atualizados.
+    """
+
+    # Faixas de tamanho de cesta e limites (em segundos) do histograma de latência
+    BASKET_SIZE_BUCKETS = (1, 5, 10, 20, 50)
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+    def __init__(self, max_retries=3):
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self.histograms = {}
+
+        # Contadores de concorrência na baixa de estoque
+        self.conflicts = 0
+        self.retries_exhausted = 0
+
+    def init_app(self, app):
+        """Configura o serviço a partir das configurações da aplicação"""
+        self.max_retries = app.config.get('CHECKOUT_MAX_RETRIES', self.max_retries)
+
+    def _basket_label(self, size):
+        for limit in self.BASKET_SIZE_BUCKETS:
+            if size <= limit:
+                return f'<={limit}'
+        return f'>{self.BASKET_SIZE_BUCKETS[-1]}'
+
+    def observe(self, basket_size, elapsed):
+        """Registra a latência de um fechamento de venda no histograma da faixa de cesta"""
+        label = self._basket_label(basket_size)
+        with self._lock:
+            histogram = self.histograms.get(label)
+            if histogram is None:
+                histogram = {'buckets': [0] * (len(self.LATENCY_BUCKETS) + 1), 'count': 0, 'sum': 0.0}
+                self.histograms[label] = histogram
+            histogram['buckets'][bisect.bisect_left(self.LATENCY_BUCKETS, elapsed)] += 1
+            histogram['count'] += 1
+            histogram['sum'] += elapsed
+
+    def stats(self):
+        """Retorna os histogramas de latência por faixa de tamanho de cesta"""
+        with self._lock:
+            return {
+                'conflicts': self.conflicts,
+                'retries_exhausted': self.retries_exhausted,
+                'latency_buckets': list(self.LATENCY_BUCKETS),
+                'histograms': {label: {'buckets': list(h['buckets']), 'count': h['count'], 'sum': h['sum']}
+                               for label, h in self.histograms.items()}
+            }
+
+    def _normalize_items(self, items):
+        """Valida os itens recebidos e agrupa as quantidades por produto"""
+        lines = []
+        quantities = {}
+        for item in items:
+            try:
+                product_id = int(item['product_id'])
+                quantity = int(item['quantity'])
+                discount_percentage = float(item.get('discount_percentage', 0.0) or 0.0)
+            except (KeyError, TypeError, ValueError):
+                raise CheckoutError('Dados de produtos inválidos.')
+
+            if quantity <= 0:
+                raise CheckoutError('A quantidade deve ser maior que zero.')
+
+            lines.append((product_id, quantity, discount_percentage))
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+        return lines, quantities
+
+    def _load_and_validate(self, quantities):
+        """Carrega os produtos da cesta em uma única consulta e valida o estoque em memória"""
+        products = Product.query.filter(Product.id.in_(list(quantities))).all()
+        products_by_id = {product.id: product for product in products}
+
+        # Considerar o mesmo produto em várias linhas da cesta
+        for product_id, requested in quantities.items():
+            product = products_by_id.get(product_id)
+            if product is None:
+                raise CheckoutError('Produto não encontrado.')
+            if not product.quantity:
+                raise CheckoutError(f'Item sem estoque: {product.name}')
+            if product.quantity < requested:
+                raise CheckoutError(f'Quantidade insuficiente em estoque para {product.name}!')
+        return products_by_id
+
+    def _reserve_stock(self, quantities):
+        """
+        Baixa o estoque de todos os produtos com um único UPDATE atômico e condicional:
+        cada linha só é alterada se ainda tiver a quantidade solicitada.
+        Retorna True se todas as linhas foram alteradas.
+        (uma baixa nunca aumenta a quantidade, então max_quantity não precisa ser alterado)
+        """
+        requested = case(quantities, value=Product.id, else_=0)
+        result = db.session.execute(
+            update(Product)
+            .where(Product.id.in_(list(quantities)), Product.quantity >= requested)
+            .values(quantity=Product.quantity - requested)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == len(quantities)
+
+    def checkout(self, items, active_cashier=None):
+        """
+        Registra as vendas da cesta na sessão atual (sem commit) e retorna a lista de vendas.
+        Deve ser chamado antes de qualquer outra alteração na transação, pois um conflito de
+        estoque desfaz a transação (rollback) antes de tentar novamente.
+        Lança CheckoutError se algum item for inválido; nesse caso nada é alterado no estoque.
+        """
+        start = time.perf_counter()
+        lines, quantities = self._normalize_items(items)
+        if not lines:
+            raise CheckoutError('Nenhum produto selecionado.')
+
+        for attempt in range(self.max_retries + 1):
+            products_by_id = self._load_and_validate(quantities)
+            if self._reserve_stock(quantities):
+                break
+
+            # Conflito: outro caixa vendeu o mesmo estoque entre a leitura e a baixa
+            self.conflicts += 1
+            db.session.rollback()
+            time.sleep(random.uniform(0, 0.005 * (attempt + 1)))
+        else:
+            self.retries_exhausted += 1
+            raise CheckoutError('Não foi possível reservar o estoque devido a vendas simultâneas. Tente novamente.')
+
+        for product in products_by_id.values():
+            # A quantidade será recarregada do banco se for acessada novamente
+            db.session.expire(product, ['quantity'])
+
+        # Inserir as vendas em lote (um único flush)
+        cashier_id = active_cashier.id if active_cashier else None
+        sales = []
+        for product_id, quantity, discount_percentage in lines:
+            product = products_by_id[product_id]
+            # Valores calculados em centavos inteiros (desconto arredondado para o centavo)
+            total_cents = to_cents(product.price) * quantity
+            discount_cents = percent_of(total_cents, discount_percentage)
+            sales.append(Sale(
+                product_id=product_id,
+                quantity=quantity,
+                total_price=from_cents(total_cents),
+                discount_percentage=discount_percentage,
+                discount_amount=from_cents(discount_cents),
+                final_price=from_cents(total_cents - discount_cents),
+                cashier_id=cashier_id
+            ))
+        db.session.add_all(sales)
+        db.session.flush()  # Para obter os IDs das vendas
+
+        if active_cashier:
+            # Criar as transações de caixa das vendas com um único INSERT em lote e
+            # somar o preço final após desconto aos contadores do caixa
+            cashier_ledger.record_transactions(active_cashier, [
+                {
+                    'transaction_type': 'sale',
+                    'amount': sale.final_price,  # Usar o preço final após desconto
+                    'description': f'Venda - {products_by_id[sale.product_id].name} (Desconto: {sale.discount_percentage}%)',
+                    'related_sale_id': sale.id
+                }
+                for sale in sales
+            ])
+
+        # Atualizar o resumo diário de vendas na mesma transação
+        sales_rollup.record_sales(sales, user_id=active_cashier.user_id if active_cashier else None)
+
+        self.observe(len(lines), time.perf_counter() - start)
+        return sales
+
+
+# Instância global do serviço de fechamento de vendas
+checkout_service = CheckoutService()
\ No newline at end of file
@@ -0,0 +1,74 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Disjuntor para chamadas a servidores externos.
+    Após failure_threshold falhas seguidas o circuito abre e as chamadas são recusadas
+    imediatamente durante reset_timeout segundos; depois disso uma única chamada de teste
+    é permitida (meio aberto) e o resultado dela fecha ou reabre o circuito.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=60):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.successes = 0
+        self.total_failures = 0
+        self.rejected = 0
+        self.opened = 0
+
+    def allow(self):
+        """Indica se uma chamada pode ser feita agora"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                # Permitir uma única chamada de teste
+                self.state = self.HALF_OPEN
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self.failures = 0
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self.total_failures += 1
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def reset(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def stats(self):
+        """Retorna o estado e as métricas do disjuntor"""
+        return {
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'successes': self.successes,
+            'failures': self.total_failures,
+            'rejected': self.rejected,
+            'opened': self.opened
+        }
\ No newline at end of file
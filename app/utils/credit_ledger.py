@@ -0,0 +1,209 @@
+from datetime import datetime
+from sqlalchemy import and_, case, func, or_, select, update
+from app import db
+from app.models import CustomerCredit, ConsumptionRecord, Product
+from app.utils.money import to_cents, from_cents
+
+# Diferença máxima (em reais) tolerada entre a dívida do cliente e a soma dos consumos pendentes
+DRIFT_TOLERANCE = 0.005
+
+# Produto genérico usado nas vendas que representam pagamentos de fiado
+PAYMENT_PRODUCT_NAME = 'Pagamento de Fiado'
+
+# ID do produto de pagamento, guardado após a primeira consulta
+_payment_product_id = None
+
+
+def add_debt(customer, amount):
+    """
+    Soma (ou subtrai, com valor negativo) um valor à dívida do cliente na transação atual.
+    O incremento é um único UPDATE atômico no banco, então lançamentos simultâneos para o
+    mesmo cliente não perdem atualizações e a dívida não depende de percorrer os consumos.
+    """
+    if not amount:
+        return
+    db.session.execute(
+        update(CustomerCredit)
+        .where(CustomerCredit.id == customer.id)
+        .values(total_debt=func.coalesce(CustomerCredit.total_debt, 0) + amount)
+        .execution_options(synchronize_session=False)
+    )
+    # A dívida será recarregada do banco se for acessada novamente
+    db.session.expire(customer, ['total_debt'])
+
+
+def add_consumption(customer, item_description, total_value):
+    """Registra um consumo do cliente e soma o valor à dívida na mesma transação"""
+    record = ConsumptionRecord(
+        customer_id=customer.id,
+        item_description=item_description,
+        total_value=total_value
+    )
+    db.session.add(record)
+    db.session.flush()  # Para obter o ID do registro
+    add_debt(customer, total_value)
+    return record
+
+
+def delete_consumption(record):
+    """Remove um consumo; se ainda estava pendente, o valor sai da dívida do cliente"""
+    customer = record.customer
+    if not record.paid:
+        add_debt(customer, -(record.total_value or 0.0))
+    db.session.delete(record)
+
+
+def _pending_filter(customer_id):
+    return and_(
+        ConsumptionRecord.customer_id == customer_id,
+        or_(ConsumptionRecord.paid.is_(False), ConsumptionRecord.paid.is_(None))
+    )
+
+
+def settle(customer, amount=None, paid_date=None):
+    """
+    Quita os consumos pendentes do cliente, dos mais antigos para os mais novos.
+    Sem valor (ou com valor maior que a dívida) toda a dívida é quitada com um único UPDATE;
+    com um valor menor, os consumos cobertos integralmente são quitados com um UPDATE até o
+    último deles e o consumo seguinte é dividido entre a parte paga e o restante pendente.
+    Tudo ocorre na transação atual. Retorna o valor quitado.
+    """
+    paid_date = paid_date or datetime.now()
+    pending = _pending_filter(customer.id)
+
+    # Bloquear o cliente até o fim da transação (a linha do cliente é atualizada também pelos
+    # consumos), para que pagamentos e lançamentos simultâneos não quitem o mesmo consumo
+    db.session.execute(
+        update(CustomerCredit).where(CustomerCredit.id == customer.id)
+        .values(total_debt=func.coalesce(CustomerCredit.total_debt, 0))
+        .execution_options(synchronize_session=False)
+    )
+    # Valores em centavos inteiros
+    total_pending = to_cents(db.session.execute(
+        select(func.coalesce(func.sum(ConsumptionRecord.total_value), 0)).where(pending)
+    ).scalar())
+    amount = to_cents(amount)
+
+    if amount is None or amount >= total_pending:
+        condition = pending
+        settled = total_pending
+        split = None
+    else:
+        # Percorrer apenas (id, data, valor) dos pendentes até cobrir o valor pago
+        covered = 0
+        last_covered = None
+        split = None
+        rows = db.session.execute(
+            select(ConsumptionRecord.id, ConsumptionRecord.created_at, ConsumptionRecord.total_value)
+            .where(pending)
+            .order_by(ConsumptionRecord.created_at, ConsumptionRecord.id)
+            .execution_options(yield_per=500)
+        )
+        for record_id, created_at, value in rows:
+            value = to_cents(value or 0)
+            if covered + value > amount:
+                split = (record_id, amount - covered)
+                break
+            covered += value
+            last_covered = (record_id, created_at)
+        rows.close()
+
+        settled = covered
+        condition = None
+        if last_covered is not None:
+            record_id, created_at = last_covered
+            condition = and_(pending, or_(
+                ConsumptionRecord.created_at < created_at,
+                and_(ConsumptionRecord.created_at == created_at, ConsumptionRecord.id <= record_id)
+            ))
+
+    if condition is not None:
+        db.session.execute(
+            update(ConsumptionRecord).where(condition)
+            .values(paid=True, paid_date=paid_date)
+            .execution_options(synchronize_session=False)
+        )
+
+    if split is not None and split[1] > 0:
+        # Pagamento parcial de um consumo: o valor pago vira um consumo quitado e o restante
+        # permanece pendente no consumo original
+        record_id, partial = split
+        record = db.session.get(ConsumptionRecord, record_id)
+        record.total_value = from_cents(to_cents(record.total_value) - partial)
+        db.session.add(ConsumptionRecord(
+            customer_id=customer.id,
+            item_description=f'{record.item_description} (pagamento parcial)'[:200],
+            total_value=from_cents(partial),
+            paid=True,
+            paid_date=paid_date,
+            created_at=record.created_at
+        ))
+        settled += partial
+
+    settled = from_cents(settled)
+    add_debt(customer, -settled)
+    return settled
+
+
+def payment_product_id():
+    """
+    ID do produto genérico de pagamento de fiado, criado na transação atual se ainda não
+    existir. O ID é guardado após a primeira consulta (por processo); por isso o produto
+    não pode ser excluído nem renomeado (products.delete_product e products.edit_product).
+    """
+    global _payment_product_id
+    if _payment_product_id is None:
+        product_id = db.session.execute(
+            select(Product.id).where(Product.name == PAYMENT_PRODUCT_NAME).order_by(Product.id).limit(1)
+        ).scalar()
+        if product_id is None:
+            from app.utils.catalog_snapshot import catalog_snapshot
+            product = Product(
+                name=PAYMENT_PRODUCT_NAME,
+                description='Produto para representar pagamento de dívida de fiado',
+                price=0.0,  # Preço unitário zero para não afetar cálculos indevidamente
+                quantity=0  # Sem estoque
+            )
+            db.session.add(product)
+            catalog_snapshot.bump()
+            db.session.flush()  # Para obter o ID do produto
+            # Ainda não confirmado: guardar o ID apenas nas próximas chamadas
+            return product.id
+        _payment_product_id = product_id
+    return _payment_product_id
+
+
+def reconcile(customer_ids=None, fix=False):
+    """
+    Compara a dívida de cada cliente com a soma (SQL) dos seus consumos pendentes.
+    Retorna a lista de divergências; com fix=True as dívidas são corrigidas.
+    """
+    pending = select(
+        ConsumptionRecord.customer_id.label('customer_id'),
+        func.coalesce(func.sum(case(
+            (or_(ConsumptionRecord.paid.is_(False), ConsumptionRecord.paid.is_(None)), ConsumptionRecord.total_value),
+            else_=0
+        )), 0).label('total_debt')
+    ).group_by(ConsumptionRecord.customer_id).subquery()
+
+    # Dívidas e somas lidas em uma única consulta
+    query = select(
+        CustomerCredit.id, CustomerCredit.total_debt, pending.c.total_debt
+    ).outerjoin(pending, pending.c.customer_id == CustomerCredit.id)
+    if customer_ids is not None:
+        query = query.where(CustomerCredit.id.in_(list(customer_ids)))
+
+    drifts = []
+    for customer_id, counter, expected in db.session.execute(query):
+        counter = float(counter or 0.0)
+        expected = float(expected or 0.0)
+        if abs(counter - expected) > DRIFT_TOLERANCE:
+            drifts.append({'customer_id': customer_id, 'counter': counter, 'expected': expected})
+            if fix:
+                db.session.execute(
+                    update(CustomerCredit).where(CustomerCredit.id == customer_id).values(total_debt=expected)
+                )
+
+    if fix and drifts:
+        db.session.commit()
+    return drifts
\ No newline at end of file
@@ -0,0 +1,120 @@
+import threading
+import time
+from sqlalchemy import func, or_
+from app import db
+from app.models import Product
+from app.utils.sales_rollup import summarize_sales
+
+# Produto especial usado para representar pagamentos de fiado
+CREDIT_PAYMENT_PRODUCT_NAME = 'Pagamento de Fiado'
+
+
+class DashboardStats:
+    """
+    Serviço de estatísticas do dashboard principal.
+    Calcula contagens, receita e estoque baixo com consultas agregadas no banco
+    e mantém o resultado em um cache de curta duração compartilhado por todos
+    os usuários da loja.
+    """
+
+    def __init__(self, ttl=10):
+        self.ttl = ttl
+        self._cached = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+
+        # Instrumentação: última duração e acumulado (em segundos) por estatística
+        self.timings = {}
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """Configura o serviço a partir das configurações da aplicação"""
+        self.ttl = app.config.get('DASHBOARD_CACHE_TTL', self.ttl)
+        self.invalidate()
+
+    def _timed(self, name, func_):
+        """Executa uma estatística registrando o tempo gasto"""
+        start = time.perf_counter()
+        try:
+            return func_()
+        finally:
+            elapsed = time.perf_counter() - start
+            timing = self.timings.setdefault(name, {'last': 0.0, 'total': 0.0, 'count': 0})
+            timing['last'] = elapsed
+            timing['total'] += elapsed
+            timing['count'] += 1
+
+    def count_products(self):
+        return db.session.query(func.count(Product.id)).scalar() or 0
+
+    def sales_summary(self):
+        """
+        Quantidade de vendas e receita total (preço final após desconto).
+        Dias encerrados vêm do resumo diário; apenas o dia atual é somado nas vendas.
+        """
+        return summarize_sales()
+
+    def low_stock_products(self):
+        """
+        Produtos com estoque baixo: quantidade menor ou igual ao maior valor entre
+        5 unidades e 20% do estoque máximo histórico (quantity * 5 <= max_quantity).
+        """
+        rows = db.session.query(Product.id, Product.name, Product.quantity).filter(
+            Product.name != CREDIT_PAYMENT_PRODUCT_NAME,
+            or_(
+                Product.quantity <= 5,
+                Product.quantity * 5 <= Product.max_quantity
+            )
+        ).order_by(Product.quantity, Product.name).all()
+        return [{'id': row.id, 'name': row.name, 'quantity': row.quantity} for row in rows]
+
+    def compute(self):
+        """Calcula todas as estatísticas sem usar o cache"""
+        low_stock_list = self._timed('low_stock_products', self.low_stock_products)
+        sales_summary = self._timed('sales_summary', self.sales_summary)
+        return {
+            'total_products': self._timed('total_products', self.count_products),
+            'total_sales': sales_summary['count'],
+            'total_revenue': sales_summary['net'],
+            'low_stock_products': len(low_stock_list),
+            'low_stock_products_list': low_stock_list
+        }
+
+    def get(self):
+        """Retorna as estatísticas, recalculando apenas quando o cache expira"""
+        now = time.monotonic()
+        cached = self._cached
+        if cached is not None and self._expires_at > now:
+            self.hits += 1
+            return cached
+
+        with self._lock:
+            # Outra thread pode ter recalculado enquanto aguardávamos o lock
+            if self._cached is not None and self._expires_at > time.monotonic():
+                self.hits += 1
+                return self._cached
+
+            self.misses += 1
+            stats = self._timed('dashboard', self.compute)
+            self._cached = stats
+            self._expires_at = time.monotonic() + self.ttl
+            return stats
+
+    def invalidate(self):
+        """Descarta o resultado em cache"""
+        self._cached = None
+        self._expires_at = 0
+
+    def stats(self):
+        """Retorna as métricas do cache e os tempos de cada estatística"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'ttl': self.ttl,
+            'timings': {name: dict(timing) for name, timing in self.timings.items()}
+        }
+
+
+# Instância global do serviço de estatísticas do dashboard
+dashboard_stats = DashboardStats()
\ No newline at end of file
@@ -23,10 +23,9 @@ def license_required(f):
             # Para outros usuários, verificar a licença associada à sua conta
             user_license_key = getattr(user, 'license_key', None)
             if user_license_key:
-                from app.models import License
-                # Buscar a licença específica do usuário
-                user_license = License.query.filter_by(license_key=user_license_key).first()
-                if user_license and user_license.is_valid():
+                from app.utils.license_cache import license_cache
+                # Verificar a licença específica do usuário (via cache de veredictos)
+                if license_cache.is_license_valid(user_license_key):
                     return f(*args, **kwargs)
                 else:
                     flash('Licença inválida ou expirada. Por favor, entre em contato com o administrador.', 'error')
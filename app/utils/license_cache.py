@@ -0,0 +1,102 @@
+import threading
+import time
+from datetime import datetime
+
+
+class LicenseCache:
+    """
+    Cache de veredictos de licença compartilhado pelo processo.
+    Evita consultas ao banco (e validações online) a cada requisição; as entradas
+    expiram após o TTL configurado e podem ser invalidadas explicitamente
+    quando uma licença é alterada.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+        # Métricas do cache
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        """Configura o cache a partir das configurações da aplicação"""
+        self.ttl = app.config.get('LICENSE_CACHE_TTL', self.ttl)
+        self.clear()
+
+    def get(self, key, loader):
+        """Retorna o valor em cache para a chave ou o carrega com a função informada"""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > now:
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        value = loader()
+        if self.ttl > 0:
+            with self._lock:
+                self._entries[key] = (value, now + self.ttl)
+        return value
+
+    def prime(self, license_key, snapshot):
+        """Guarda os dados da licença já carregados por outra consulta (sem sobrescrever)"""
+        if self.ttl <= 0:
+            return
+        key = ('license', license_key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                self._entries[key] = (snapshot, now + self.ttl)
+
+    def invalidate(self, license_key):
+        """Remove todas as entradas associadas a uma chave de licença"""
+        with self._lock:
+            stale_keys = [key for key in self._entries if key[1] == license_key]
+            for key in stale_keys:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def clear(self):
+        """Remove todas as entradas do cache"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def get_license_snapshot(self, license_key):
+        """Retorna os dados mínimos da licença (ativa e validade) ou None se não existir"""
+        def load():
+            from app.models import License
+            license = License.query.filter_by(license_key=license_key).first()
+            if not license:
+                return None
+            return {'is_active': license.is_active, 'expiry_date': license.expiry_date}
+
+        return self.get(('license', license_key), load)
+
+    def is_license_valid(self, license_key):
+        """Verifica se a licença está válida usando o cache"""
+        if not license_key:
+            return False
+        snapshot = self.get_license_snapshot(license_key)
+        # A validade é conferida a cada chamada para que a expiração não dependa do TTL
+        return bool(snapshot and snapshot['is_active'] and snapshot['expiry_date'] > datetime.utcnow())
+
+    def stats(self):
+        """Retorna as métricas do cache"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            'invalidations': self.invalidations,
+            'entries': len(self._entries),
+            'ttl': self.ttl
+        }
+
+
+# Instância global do cache de licenças
+license_cache = LicenseCache()
\ No newline at end of file
@@ -4,7 +4,9 @@ from datetime import datetime, timedelta
 from app.models import License
 from app import db
 from app.database_manager import database_manager
-import requests
+from app.utils.license_cache import license_cache
+from app.utils.license_refresher import license_refresher
+from app.utils.circuit_breaker import CircuitBreaker
 import threading
 import time
 
@@ -18,6 +20,20 @@ class LicenseManager:
         default_url = os.environ.get('ONLINE_SERVER_URL', 'http://seu_servidor_online.com')
         self.server_url = server_url or default_url
         self.license_file = os.environ.get('LICENSE_FILE', 'instance/license.json')
+        self.api_timeout = 10
+        self.grace_period_days = 3
+
+        # Disjuntores: deixam de consultar um servidor de licenças inacessível
+        self.db_breaker = CircuitBreaker('online_db')
+        self.api_breaker = CircuitBreaker('api')
+
+    def init_app(self, app):
+        """Configura a validação online a partir das configurações da aplicação"""
+        self.api_timeout = app.config.get('LICENSE_API_TIMEOUT', self.api_timeout)
+        self.grace_period_days = app.config.get('LICENSE_GRACE_PERIOD_DAYS', self.grace_period_days)
+        for breaker in (self.db_breaker, self.api_breaker):
+            breaker.failure_threshold = app.config.get('LICENSE_BREAKER_FAILURES', breaker.failure_threshold)
+            breaker.reset_timeout = app.config.get('LICENSE_BREAKER_RESET', breaker.reset_timeout)
 
     def load_license_key(self):
         """
@@ -43,43 +59,147 @@ class LicenseManager:
         with open(self.license_file, 'w') as f:
             json.dump({'license_key': license_key}, f)
 
-    def validate_license_online_db(self, license_key):
+    def _validate_online_db(self, license_key):
         """
-        Valida a licença diretamente no banco de dados online
+        Valida a licença no banco de dados online.
+        Retorna (válida, mensagem, servidor respondeu)
         """
         # Usar o método de classe do modelo License para validar no banco online
         result = License.validate_license_online(license_key)
 
         if result["valid"]:
-            return True, "Licença válida no servidor"
+            return True, "Licença válida no servidor", True
         else:
             message = result.get("message", "Licença inválida ou não encontrada no servidor")
-            return False, message
+            return False, message, not result.get("error", False)
 
-    def validate_license_online_api(self, license_key):
+    def _validate_online_api(self, license_key):
         """
-        Valida a licença online com o servidor central via API
+        Valida a licença com o servidor central via API.
+        Retorna (válida, mensagem, servidor respondeu)
         """
+        # Importado sob demanda: a biblioteca requests é a importação mais lenta da inicialização
+        import requests
         try:
             response = requests.post(
                 f"{self.server_url}/api/validate_license",
                 json={'license_key': license_key},
-                timeout=10
+                timeout=self.api_timeout
             )
 
             if response.status_code == 200:
                 data = response.json()
-                return data.get('valid', False), data.get('message', '')
+                return data.get('valid', False), data.get('message', ''), True
             else:
-                return False, f'Erro no servidor: {response.status_code}'
+                return False, f'Erro no servidor: {response.status_code}', response.status_code < 500
         except requests.exceptions.RequestException as e:
-            return False, f'Erro de conexão: {str(e)}'
+            return False, f'Erro de conexão: {str(e)}', False
         except Exception as e:
-            return False, f'Erro inesperado: {str(e)}'
+            return False, f'Erro inesperado: {str(e)}', False
+
+    def validate_license_online_db(self, license_key):
+        """
+        Valida a licença diretamente no banco de dados online
+        """
+        valid, message, _ = self._validate_online_db(license_key)
+        return valid, message
+
+    def validate_license_online_api(self, license_key):
+        """
+        Valida a licença online com o servidor central via API
+        """
+        valid, message, _ = self._validate_online_api(license_key)
+        return valid, message
+
+    def validate_license_online(self, license_key):
+        """
+        Valida a licença no banco de dados online e, como alternativa, via API.
+        Cada servidor é protegido por um disjuntor: enquanto estiver aberto, o servidor
+        não é consultado e a validação falha imediatamente.
+        """
+        messages = []
+        for breaker, validate in ((self.db_breaker, self._validate_online_db),
+                                  (self.api_breaker, self._validate_online_api)):
+            if not breaker.allow():
+                messages.append(f'Servidor de licenças ({breaker.name}) indisponível, aguardando nova tentativa')
+                continue
+
+            valid, message, reachable = validate(license_key)
+            if reachable:
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+            if valid:
+                return True, message
+            messages.append(message)
+        return False, '. '.join(messages)
+
+    def record_online_validation(self, license_key):
+        """
+        Registra uma validação online bem-sucedida: atualiza a data da última validação
+        ou cria a licença local com base na online
+        """
+        local_license = License.query.filter_by(license_key=license_key).first()
+        if local_license:
+            local_license.last_validation = datetime.utcnow()
+        else:
+            db.session.add(License(
+                license_key=license_key,
+                client_name="Cliente Local", # Poderia ser obtido do servidor
+                client_email="cliente@exemplo.com", # Poderia ser obtido do servidor
+                expiry_date=datetime.max, # Definir data real quando possível
+                is_active=True,
+                last_validation=datetime.utcnow()
+            ))
+        db.session.commit()
+
+    def local_license_status(self, license_key):
+        """
+        Verifica o status da licença sem aguardar o servidor de licenças.
+        Quando a validação online é necessária ela é agendada em background e o último
+        veredicto conhecido é usado; a licença só é recusada se a validação online falhou
+        e o período de carência já terminou.
+        """
+        local_license = License.query.filter_by(license_key=license_key).first()
+
+        if not local_license:
+            # A licença local será criada em background se for válida online
+            license_refresher.request(license_key)
+            verdict = license_refresher.last_verdict(license_key)
+            if verdict is None:
+                # Primeiro acesso com a licença: aguardar a validação em background apenas por
+                # um tempo curto (LICENSE_FIRST_CHECK_WAIT), nunca pelos timeouts do servidor
+                verdict = license_refresher.wait_for(license_key)
+            if verdict is None:
+                return {'valid': False, 'message': 'Licença não encontrada localmente; validação online em andamento',
+                        'pending': True}
+            if not verdict['valid']:
+                return {'valid': False, 'message': f'Licença não encontrada localmente e inválida online. {verdict["message"]}'}
+            return {'valid': True, 'message': 'Licença validada online e adicionada localmente'}
+
+        # Verificar se expirou localmente
+        if not local_license.is_valid():
+            return {'valid': False, 'message': 'Licença expirada'}
+
+        # Verificar se precisa validar online (a cada 30 dias)
+        if local_license.needs_validation():
+            license_refresher.request(license_key)
+            verdict = license_refresher.last_verdict(license_key)
+            if verdict and not verdict['valid']:
+                # Permitir uso por alguns dias extras após falha na validação
+                grace_end = (local_license.last_validation or datetime.min) + \
+                    timedelta(days=30 + self.grace_period_days)
+                if datetime.utcnow() >= grace_end:
+                    return {'valid': False, 'message': f'Falha na validação online: {verdict["message"]}'}
+                return {'valid': True, 'message': f'Validação online falhou, mas usando período de carência. {verdict["message"]}'}
+            return {'valid': True, 'message': 'Licença válida; revalidação online em segundo plano'}
+
+        return {'valid': True, 'message': 'Licença válida e atualizada'}
 
     def check_license_status(self):
         """
         Verifica o status da licença local com validação online
+        (síncrona: nas requisições use cached_license_status, que não aguarda o servidor)
         """
         license_key = self.load_license_key()
 
@@ -140,11 +260,30 @@ class LicenseManager:
         else:
             return {'valid': True, 'message': 'Licença válida e atualizada'}
 
+    def cached_license_key(self):
+        """
+        Retorna a chave de licença do sistema sem reler o arquivo a cada chamada
+        """
+        return license_cache.get(('system_key', None), self.load_license_key)
+
+    def cached_license_status(self):
+        """
+        Retorna o status da licença do sistema usando o cache de veredictos
+        """
+        license_key = self.cached_license_key()
+        if not license_key:
+            return {'valid': False, 'message': 'Nenhuma licença encontrada'}
+        status = license_cache.get(('status', license_key), lambda: self.local_license_status(license_key))
+        if status.get('pending'):
+            # Veredicto provisório: não permanece em cache até o fim da validação em background
+            license_cache.invalidate(license_key)
+        return status
+
     def validate_license(self):
         """
         Método principal para validação de licença
         """
-        result = self.check_license_status()
+        result = self.cached_license_status()
         return result['valid']
 
     def setup_background_validation(self):
@@ -155,7 +294,7 @@ class LicenseManager:
             while True:
                 time.sleep(24 * 3600)  # Verificar a cada 24 horas
                 try:
-                    self.check_license_status()
+                    license_refresher.request(self.load_license_key())
                 except:
                     pass  # Ignorar erros na validação em background
 
@@ -193,12 +332,10 @@ def check_license():
 
         # Para usuários normais, verificar a licença associada à sua conta
         if hasattr(user, 'license_key') and user.license_key:
-            from app.models import License
-            # Buscar a licença específica do usuário no banco local
-            user_license = License.query.filter_by(license_key=user.license_key).first()
-            if user_license and user_license.is_valid():
+            # Verificar a licença específica do usuário (via cache de veredictos)
+            if license_cache.is_license_valid(user.license_key):
                 # Validar online se necessário
-                result = license_manager.check_license_status()
+                result = license_manager.cached_license_status()
                 if result['valid']:
                     return True
                 else:
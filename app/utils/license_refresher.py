@@ -0,0 +1,153 @@
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+
+class LicenseRefresher:
+    """
+    Revalidação online de licenças em background (stale-while-revalidate).
+    A requisição apenas agenda a revalidação e segue com o último veredicto conhecido;
+    uma thread em background consulta o servidor de licenças, atualiza a licença local
+    e invalida o cache de veredictos.
+    """
+
+    def __init__(self, retry_interval=300, first_check_wait=1.5):
+        # Intervalo mínimo (segundos) entre tentativas para a mesma licença
+        self.retry_interval = retry_interval
+        # Espera máxima (segundos) de uma requisição pela primeira validação de uma licença
+        self.first_check_wait = first_check_wait
+        self.app = None
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._last_attempt = {}
+        self._verdicts = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+        # Contadores de operação
+        self.requested = 0
+        self.refreshed = 0
+        self.failures = 0
+        self.errors = 0
+
+    def init_app(self, app):
+        """Configura a revalidação a partir das configurações da aplicação"""
+        self.app = app
+        self.retry_interval = app.config.get('LICENSE_REFRESH_INTERVAL', self.retry_interval)
+        self.first_check_wait = app.config.get('LICENSE_FIRST_CHECK_WAIT', self.first_check_wait)
+
+    def _ensure_worker(self):
+        """Inicia a thread de revalidação sob demanda (e novamente após um fork)"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid is not None and self._pid != os.getpid():
+                # Processo filho: as revalidações pendentes pertencem ao processo pai
+                self._queue = queue.Queue()
+                self._pending = set()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._worker, name='license-refresher', daemon=True)
+            self._thread.start()
+
+    def request(self, license_key):
+        """
+        Agenda a revalidação online de uma licença sem bloquear a requisição.
+        Retorna False se já existe uma revalidação pendente ou recente para a licença.
+        """
+        if not license_key:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if license_key in self._pending:
+                return False
+            last_attempt = self._last_attempt.get(license_key)
+            if last_attempt is not None and now - last_attempt < self.retry_interval:
+                return False
+            self._pending.add(license_key)
+            self._last_attempt[license_key] = now
+            self.requested += 1
+        self._ensure_worker()
+        self._queue.put(license_key)
+        return True
+
+    def last_verdict(self, license_key):
+        """Último resultado da validação online ({'valid', 'message', 'checked_at'}) ou None"""
+        return self._verdicts.get(license_key)
+
+    def wait_for(self, license_key, timeout=None):
+        """
+        Aguarda no máximo timeout segundos (padrão: first_check_wait) a revalidação pendente
+        de uma licença. Retorna o veredicto, ou None se a validação ainda não terminou;
+        a validação continua em background e o veredicto fica disponível para o próximo acesso.
+        """
+        timeout = self.first_check_wait if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while license_key in self._pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.last_verdict(license_key)
+
+    def _worker(self):
+        while True:
+            license_key = self._queue.get()
+            try:
+                self.refresh(license_key)
+            except Exception as e:
+                self.errors += 1
+                if self.app is not None:
+                    self.app.logger.error(f"Erro na revalidação da licença em background: {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard(license_key)
+                self._queue.task_done()
+
+    def refresh(self, license_key):
+        """Valida a licença online agora (executado na thread de background)"""
+        from app.utils.license_cache import license_cache
+
+        with self.app.app_context():
+            valid, message = self.validate_now(license_key)
+
+        # O próximo acesso recalcula o status com o novo veredicto
+        license_cache.invalidate(license_key)
+        return valid, message
+
+    def validate_now(self, license_key):
+        """
+        Valida a licença online no contexto atual (protegida pelos disjuntores) e guarda o veredicto
+        """
+        from app.utils.license_manager import license_manager
+
+        valid, message = license_manager.validate_license_online(license_key)
+        if valid:
+            license_manager.record_online_validation(license_key)
+            self.refreshed += 1
+        else:
+            self.failures += 1
+        self._verdicts[license_key] = {'valid': valid, 'message': message, 'checked_at': datetime.utcnow()}
+        return valid, message
+
+    def wait(self, timeout=10.0):
+        """Aguarda a conclusão das revalidações pendentes"""
+        deadline = time.monotonic() + timeout
+        while self._pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._pending
+
+    def stats(self):
+        """Retorna os contadores da revalidação"""
+        return {
+            'requested': self.requested,
+            'refreshed': self.refreshed,
+            'failures': self.failures,
+            'errors': self.errors,
+            'pending': len(self._pending)
+        }
+
+
+# Instância global da revalidação de licenças
+license_refresher = LicenseRefresher()
\ No newline at end of file
@@ -0,0 +1,92 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class LicenseStubServer:
+    """
+    Servidor local que imita a API de validação de licenças (POST /api/validate_license).
+    Usado em testes e desenvolvimento para simular um servidor lento (delay), fora do ar
+    (status_code 5xx) ou com licenças específicas, apontando ONLINE_SERVER_URL para ele.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, valid_keys=(), delay=0.0, status_code=200):
+        self.host = host
+        self.port = port
+        self.valid_keys = set(valid_keys)
+        self.delay = delay
+        self.status_code = status_code
+        self.requests = 0
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                stub.requests += 1
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    payload = {}
+
+                if stub.delay:
+                    time.sleep(stub.delay)
+
+                if self.path != '/api/validate_license':
+                    status, body = 404, {'message': 'Rota não encontrada'}
+                elif stub.status_code != 200:
+                    status, body = stub.status_code, {'message': 'Erro simulado'}
+                elif payload.get('license_key') in stub.valid_keys:
+                    status, body = 200, {'valid': True, 'message': 'Licença válida (servidor local)'}
+                else:
+                    status, body = 200, {'valid': False, 'message': 'Licença inválida (servidor local)'}
+
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass  # Não poluir a saída dos testes
+
+        return Handler
+
+    def start(self):
+        """Inicia o servidor em uma thread e retorna a URL base"""
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='license-stub-server', daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def serve_forever(self):
+        """Executa o servidor na thread atual (usado pelo comando de linha de comando)"""
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self.port = self._server.server_address[1]
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
\ No newline at end of file
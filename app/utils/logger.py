@@ -1,6 +1,10 @@
 import logging
 from logging.handlers import RotatingFileHandler
 import os
+import queue
+import threading
+import time
+from datetime import datetime
 from flask import request
 from flask_login import current_user
 
@@ -9,7 +13,7 @@ def setup_logger(app):
         if not os.path.exists('logs'):
             os.mkdir('logs')
         file_handler = RotatingFileHandler('logs/alphasystem.log',
-                                         maxBytes=10240000, 
+                                         maxBytes=10240000,
                                          backupCount=10)
         file_handler.setFormatter(logging.Formatter(
             '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
@@ -19,20 +23,203 @@ def setup_logger(app):
         app.logger.setLevel(logging.INFO)
         app.logger.info('Alphasystem startup')
 
+
+class ActivityLogger:
+    """
+    Pipeline assíncrono para registro de atividades dos usuários.
+    A thread da requisição apenas enfileira o evento; uma thread em background
+    grava os eventos em lote no log da aplicação (e opcionalmente na tabela activity_log).
+    """
+
+    def __init__(self, max_size=10000, batch_size=200, flush_interval=1.0):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.persist_to_db = False
+        self.app = None
+        self._queue = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)  # Notificada quando um lote termina de ser gravado
+        self._pending = 0  # Eventos enfileirados ou em um lote ainda não gravado
+        self._thread = None
+        self._pid = None
+        self._stop_event = threading.Event()
+
+        # Contadores de operação (atualizados sob o lock)
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.db_errors = 0
+        self.batches = 0
+
+    def init_app(self, app):
+        """Configura o pipeline a partir das configurações da aplicação"""
+        self.app = app
+        self.max_size = app.config.get('ACTIVITY_LOG_QUEUE_SIZE', self.max_size)
+        self.batch_size = app.config.get('ACTIVITY_LOG_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('ACTIVITY_LOG_FLUSH_INTERVAL', self.flush_interval)
+        self.persist_to_db = app.config.get('ACTIVITY_LOG_TO_DB', False)
+        if self._queue.maxsize != self.max_size:
+            self._queue = queue.Queue(maxsize=self.max_size)
+
+    def _ensure_worker(self):
+        """Inicia a thread de gravação sob demanda (e novamente após um fork)"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid is not None and self._pid != os.getpid():
+                # Processo filho: a fila herdada pode conter eventos já gravados pelo processo pai
+                self._queue = queue.Queue(maxsize=self.max_size)
+                self._pending = 0
+            self._stop_event.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._worker, name='activity-log-writer', daemon=True)
+            self._thread.start()
+
+    def log(self, entry):
+        """Enfileira um evento sem bloquear a requisição; descarta quando a fila está cheia"""
+        self._ensure_worker()
+        with self._lock:
+            try:
+                self._queue.put_nowait(entry)
+            except queue.Full:
+                self.dropped += 1
+                return False
+            self.enqueued += 1
+            self._pending += 1
+        return True
+
+    def _worker(self):
+        while not self._stop_event.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._write_batch(batch)
+        # Esvaziar o que restou na fila antes de encerrar
+        batch = self._drain()
+        if batch:
+            self._write_batch(batch)
+
+    def _next_batch(self):
+        """Aguarda o primeiro evento e agrupa os seguintes até o tamanho do lote ou o intervalo"""
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _write_batch(self, batch):
+        """Grava um lote de eventos no arquivo de log e, se configurado, no banco de dados"""
+        app = self.app
+        db_error = False
+        try:
+            if app is None:
+                return
+
+            for entry in batch:
+                app.logger.info(format_activity_message(entry))
+
+            if self.persist_to_db:
+                try:
+                    from sqlalchemy import insert
+                    from app import db
+                    from app.models import ActivityLog
+                    rows = [dict(entry, user_agent=(entry['user_agent'] or '')[:255]) for entry in batch]
+                    with app.app_context():
+                        db.session.execute(insert(ActivityLog), rows)
+                        db.session.commit()
+                except Exception as e:
+                    db_error = True
+                    app.logger.error(f"Erro ao gravar lote de atividades no banco de dados: {e}")
+        finally:
+            # O lote só deixa de estar pendente depois de gravado (flush aguarda este ponto)
+            with self._idle:
+                if app is not None:
+                    self.written += len(batch)
+                    self.batches += 1
+                    if db_error:
+                        self.db_errors += 1
+                self._pending -= len(batch)
+                self._idle.notify_all()
+
+    def flush(self, timeout=5.0):
+        """
+        Aguarda até que todos os eventos enfileirados sejam gravados, incluindo o lote que a
+        thread de gravação já retirou da fila e ainda está gravando
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending <= 0, timeout)
+
+    def shutdown(self, timeout=5.0):
+        """Interrompe a thread de gravação após gravar os eventos pendentes"""
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout)
+        else:
+            batch = self._drain()
+            if batch:
+                self._write_batch(batch)
+
+    def stats(self):
+        """Retorna os contadores do pipeline"""
+        with self._lock:
+            return {
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'dropped': self.dropped,
+                'db_errors': self.db_errors,
+                'batches': self.batches,
+                'pending': self._pending,
+                'capacity': self.max_size
+            }
+
+
+# Instância global do registro de atividades
+activity_logger = ActivityLogger()
+
+
+def format_activity_message(entry):
+    """Monta a mensagem de log a partir de um evento de atividade"""
+    log_message = f"User {entry['user_id']} performed '{entry['action']}' at {entry['endpoint']}. " \
+                  f"IP: {entry['ip_address']}, User Agent: {entry['user_agent']}"
+
+    if entry.get('details'):
+        log_message += f", Details: {entry['details']}"
+
+    return log_message
+
+
 def log_user_activity(action, details=""):
     """Registra atividades dos usuários"""
     user_id = current_user.id if current_user.is_authenticated else 'Anonymous'
-    ip_address = request.remote_addr
-    endpoint = request.endpoint
-    user_agent = str(request.user_agent)
-    
-    log_message = f"User {user_id} performed '{action}' at {endpoint}. " \
-                  f"IP: {ip_address}, User Agent: {user_agent}"
-    
-    if details:
-        log_message += f", Details: {details}"
-    
-    from app import create_app
-    app = create_app()
-    with app.app_context():
-        app.logger.info(log_message)
\ No newline at end of file
+
+    activity_logger.log({
+        'user_id': str(user_id),
+        'action': action,
+        'endpoint': request.endpoint,
+        'ip_address': request.remote_addr,
+        'user_agent': str(request.user_agent),
+        'details': details,
+        'created_at': datetime.utcnow()
+    })
\ No newline at end of file
@@ -0,0 +1,218 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from app import db
+from app.models import User, Cashier, Sale, Product, DailySalesRollup
+from app.utils.money import to_cents, from_cents
+
+# Quantidade de vendas recentes exibidas no painel do gerente
+RECENT_SALES_LIMIT = 10
+
+
+class ManagerSummary:
+    """
+    Serviço do painel do gerente.
+    Monta o resumo dos usuários gerenciados (caixas abertos, vendas do dia, totais por usuário
+    e últimas vendas) apenas com consultas agregadas e de colunas, sem carregar relacionamentos
+    nos templates. O resultado contém apenas dados simples e fica em cache por gerente durante
+    alguns segundos.
+    """
+
+    def __init__(self, ttl=5):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+        # Instrumentação: última duração e acumulado (em segundos) por consulta
+        self.timings = {}
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """Configura o serviço a partir das configurações da aplicação"""
+        self.ttl = app.config.get('MANAGER_SUMMARY_CACHE_TTL', self.ttl)
+        self.clear()
+
+    def _timed(self, name, func_, timings):
+        """Executa uma consulta registrando o tempo gasto (no resumo e no acumulado do serviço)"""
+        start = time.perf_counter()
+        try:
+            return func_()
+        finally:
+            elapsed = time.perf_counter() - start
+            timings[name] = elapsed
+            timing = self.timings.setdefault(name, {'last': 0.0, 'total': 0.0, 'count': 0})
+            timing['last'] = elapsed
+            timing['total'] += elapsed
+            timing['count'] += 1
+
+    @staticmethod
+    def managed_users(manager_id):
+        rows = db.session.execute(
+            select(User.id, User.username, User.email, User.created_at)
+            .where(User.manager_id == manager_id)
+            .order_by(User.id)
+        ).all()
+        return [
+            {'id': row.id, 'username': row.username, 'email': row.email, 'created_at': row.created_at}
+            for row in rows
+        ]
+
+    @staticmethod
+    def open_cashiers(user_ids):
+        """Caixas abertos com o usuário de cada um (junção na mesma consulta)"""
+        rows = db.session.execute(
+            select(
+                Cashier.id, Cashier.user_id, User.username, User.email, Cashier.initial_amount,
+                Cashier.opening_date, Cashier.total_sales, Cashier.balance
+            )
+            .join(User, Cashier.user_id == User.id)
+            .where(Cashier.user_id.in_(user_ids), Cashier.status == 'open')
+            .order_by(Cashier.opening_date)
+        ).all()
+        return [
+            {
+                'id': row.id, 'user_id': row.user_id, 'username': row.username, 'email': row.email,
+                'initial_amount': row.initial_amount or 0.0, 'opening_date': row.opening_date,
+                'total_sales': row.total_sales or 0.0, 'balance': row.balance or 0.0
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def sales_today_by_user(user_ids, day_start, day_end):
+        """Quantidade e receita (preço total) das vendas de cada usuário no intervalo [day_start, day_end)"""
+        rows = db.session.execute(
+            select(Cashier.user_id, func.count(Sale.id), func.coalesce(func.sum(Sale.total_price), 0))
+            .join(Cashier, Sale.cashier_id == Cashier.id)
+            .where(Cashier.user_id.in_(user_ids), Sale.sale_date >= day_start, Sale.sale_date < day_end)
+            .group_by(Cashier.user_id)
+        ).all()
+        return {user_id: (int(count or 0), revenue or 0.0) for user_id, count, revenue in rows}
+
+    @staticmethod
+    def previous_sales_by_user(user_ids, day):
+        """Quantidade de vendas de cada usuário nos dias anteriores a day (resumo diário)"""
+        rows = db.session.execute(
+            select(DailySalesRollup.user_id, func.coalesce(func.sum(DailySalesRollup.sale_count), 0))
+            .where(DailySalesRollup.user_id.in_(user_ids), DailySalesRollup.day < day)
+            .group_by(DailySalesRollup.user_id)
+        ).all()
+        return {user_id: int(count or 0) for user_id, count in rows}
+
+    @staticmethod
+    def last_sale_by_user(user_ids):
+        """Data da última venda de cada usuário (máximo por caixa no índice (cashier_id, sale_date))"""
+        rows = db.session.execute(
+            select(Cashier.user_id, func.max(Sale.sale_date))
+            .join(Cashier, Sale.cashier_id == Cashier.id)
+            .where(Cashier.user_id.in_(user_ids))
+            .group_by(Cashier.user_id)
+        ).all()
+        return dict(rows)
+
+    @staticmethod
+    def recent_sales(user_ids, limit=RECENT_SALES_LIMIT):
+        """Últimas vendas com usuário e produto carregados na mesma consulta"""
+        rows = db.session.execute(
+            select(Sale.id, User.username, Product.name, Sale.total_price, Sale.sale_date)
+            .join(Cashier, Sale.cashier_id == Cashier.id)
+            .join(User, Cashier.user_id == User.id)
+            .join(Product, Sale.product_id == Product.id)
+            .where(Cashier.user_id.in_(user_ids))
+            .order_by(Sale.sale_date.desc(), Sale.id.desc())
+            .limit(limit)
+        ).all()
+        return [
+            {
+                'id': row.id, 'username': row.username, 'product_name': row.name,
+                'total_price': row.total_price or 0.0, 'sale_date': row.sale_date
+            }
+            for row in rows
+        ]
+
+    def compute(self, manager_id):
+        """Monta o resumo do gerente sem usar o cache"""
+        timings = {}
+        users = self._timed('managed_users', lambda: self.managed_users(manager_id), timings)
+        user_ids = [user['id'] for user in users]
+
+        # Intervalo semiaberto [hoje 00:00, amanhã 00:00)
+        today = datetime.utcnow().date()
+        day_start = datetime.combine(today, datetime.min.time())
+        day_end = day_start + timedelta(days=1)
+
+        open_cashiers, today_sales, previous_sales, last_sales, recent = [], {}, {}, {}, []
+        if user_ids:
+            open_cashiers = self._timed('open_cashiers', lambda: self.open_cashiers(user_ids), timings)
+            today_sales = self._timed(
+                'sales_today_by_user', lambda: self.sales_today_by_user(user_ids, day_start, day_end), timings
+            )
+            previous_sales = self._timed(
+                'previous_sales_by_user', lambda: self.previous_sales_by_user(user_ids, today), timings
+            )
+            last_sales = self._timed('last_sale_by_user', lambda: self.last_sale_by_user(user_ids), timings)
+            recent = self._timed('recent_sales', lambda: self.recent_sales(user_ids), timings)
+
+        open_cashier_users = {cashier['user_id'] for cashier in open_cashiers}
+        total_count = 0
+        total_revenue = 0  # Centavos
+        for user in users:
+            count, revenue = today_sales.get(user['id'], (0, 0.0))
+            user['today_sales'] = count
+            user['today_revenue'] = revenue
+            user['total_sales'] = previous_sales.get(user['id'], 0) + count
+            user['last_sale'] = last_sales.get(user['id'])
+            user['has_open_cashier'] = user['id'] in open_cashier_users
+            total_count += count
+            total_revenue += to_cents(revenue)
+
+        return {
+            'managed_users': users,
+            'open_cashiers': open_cashiers,
+            'total_daily_sales': total_count,
+            'total_daily_revenue': from_cents(total_revenue),
+            'recent_sales': recent,
+            'generated_at': datetime.now(),
+            'timings': timings
+        }
+
+    def get(self, manager_id):
+        """Retorna o resumo do gerente, recalculando apenas quando o cache expira"""
+        now = time.monotonic()
+        entry = self._entries.get(manager_id)
+        if entry is not None and entry[1] > now:
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        summary = self._timed('summary', lambda: self.compute(manager_id), {})
+        if self.ttl > 0:
+            with self._lock:
+                self._entries[manager_id] = (summary, time.monotonic() + self.ttl)
+        return summary
+
+    def invalidate(self, manager_id):
+        """Descarta o resumo do gerente (após criar, editar ou excluir um usuário gerenciado)"""
+        with self._lock:
+            self._entries.pop(manager_id, None)
+
+    def clear(self):
+        """Descarta os resumos de todos os gerentes"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Retorna as métricas do cache e os tempos de cada consulta"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._entries),
+            'ttl': self.ttl,
+            'timings': {name: dict(timing) for name, timing in self.timings.items()}
+        }
+
+
+# Instância global do serviço do painel do gerente
+manager_summary = ManagerSummary()
\ No newline at end of file
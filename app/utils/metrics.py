@@ -0,0 +1,211 @@
+import bisect
+import threading
+import time
+from flask import g, request
+
+# Contadores de negócio expostos em /metrics (nome -> descrição)
+BUSINESS_COUNTERS = {
+    'sales': 'Vendas registradas',
+    'sales_amount': 'Valor das vendas registradas (reais, após desconto)',
+    'cashier_opened': 'Caixas abertos',
+    'cashier_closed': 'Caixas fechados',
+    'credit_payments': 'Pagamentos de fiado',
+    'credit_payments_amount': 'Valor dos pagamentos de fiado (reais)'
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _number(value):
+    if value is None:
+        return 'NaN'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+    Métricas do processo no formato de exposição de texto do Prometheus (/metrics).
+    No caminho das requisições apenas incrementa contadores em memória (latência por
+    endpoint em histograma, requisições em andamento e respostas por código); pools de
+    conexões, caches e demais serviços são lidos no momento da coleta a partir dos seus
+    stats(). Cada processo (worker) expõe as suas próprias métricas.
+    """
+
+    # Limites (em segundos) do histograma de latência das requisições
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self.enabled = True
+        self.app = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.histograms = {}
+        self.responses = {}
+        self.counters = dict.fromkeys(BUSINESS_COUNTERS, 0)
+        self.started_at = time.time()
+
+    def init_app(self, app):
+        """Registra a medição das requisições a partir das configurações da aplicação"""
+        self.app = app
+        self.enabled = app.config.get('METRICS_ENABLED', self.enabled)
+        if not self.enabled:
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._record_status)
+        app.teardown_request(self._finish_request)
+
+    # Requisições
+
+    def _start_request(self):
+        g._metrics_start = time.perf_counter()
+        with self._lock:
+            self.in_flight += 1
+
+    def _record_status(self, response):
+        g._metrics_status = response.status_code
+        return response
+
+    def _finish_request(self, exception=None):
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        status = g.pop('_metrics_status', 500)
+        key = (request.blueprint or '', request.endpoint or 'desconhecido')
+        with self._lock:
+            self.in_flight -= 1
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = {'buckets': [0] * (len(self.LATENCY_BUCKETS) + 1), 'count': 0, 'sum': 0.0}
+                self.histograms[key] = histogram
+            histogram['buckets'][bisect.bisect_left(self.LATENCY_BUCKETS, elapsed)] += 1
+            histogram['count'] += 1
+            histogram['sum'] += elapsed
+            response_key = key + (str(status),)
+            self.responses[response_key] = self.responses.get(response_key, 0) + 1
+
+    # Contadores de negócio
+
+    def inc(self, name, value=1):
+        """Incrementa um contador de negócio (ver BUSINESS_COUNTERS)"""
+        with self._lock:
+            self.counters[name] += value
+
+    # Exposição
+
+    def render(self):
+        """Métricas no formato de exposição de texto do Prometheus (versão 0.0.4)"""
+        lines = []
+
+        def metric(name, kind, description, samples):
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            for suffix, labels, value in samples:
+                lines.append(f'{name}{suffix}{_labels(**labels)} {_number(value)}')
+
+        with self._lock:
+            histograms = {key: {'buckets': list(h['buckets']), 'count': h['count'], 'sum': h['sum']}
+                          for key, h in self.histograms.items()}
+            responses = dict(self.responses)
+            counters = dict(self.counters)
+            in_flight = self.in_flight
+
+        samples = []
+        for (blueprint, endpoint), histogram in sorted(histograms.items()):
+            cumulative = 0
+            for limit, count in zip(self.LATENCY_BUCKETS + ('+Inf',), histogram['buckets']):
+                cumulative += count
+                samples.append(('_bucket', {'blueprint': blueprint, 'endpoint': endpoint, 'le': limit}, cumulative))
+            samples.append(('_sum', {'blueprint': blueprint, 'endpoint': endpoint}, histogram['sum']))
+            samples.append(('_count', {'blueprint': blueprint, 'endpoint': endpoint}, histogram['count']))
+        metric('alpha_http_request_duration_seconds', 'histogram', 'Latência das requisições por endpoint', samples)
+
+        metric('alpha_http_responses_total', 'counter', 'Respostas por endpoint e código HTTP', [
+            ('', {'blueprint': blueprint, 'endpoint': endpoint, 'status': status}, count)
+            for (blueprint, endpoint, status), count in sorted(responses.items())
+        ])
+        metric('alpha_http_requests_in_flight', 'gauge', 'Requisições em andamento', [('', {}, in_flight)])
+
+        for name, description in BUSINESS_COUNTERS.items():
+            metric(f'alpha_{name}_total', 'counter', description, [('', {}, counters[name])])
+
+        self._render_pools(metric)
+        self._render_services(metric)
+        metric('alpha_process_start_time_seconds', 'gauge', 'Início do processo (epoch)', [('', {}, self.started_at)])
+        return '\n'.join(lines) + '\n'
+
+    def _render_pools(self, metric):
+        """Conexões em uso e excedentes dos pools (engines do Flask-SQLAlchemy e do DatabaseManager)"""
+        from app import db
+        from app.database_manager import database_manager
+
+        pools = []
+        for bind, engine in db.engines.items():
+            pools.append(({'owner': 'sqlalchemy', 'bind': bind or 'default'}, engine.pool))
+        for bind, engine in list(database_manager._engines.items()):
+            pools.append(({'owner': 'database_manager', 'bind': bind}, engine.pool))
+
+        for name, method, description in (
+            ('alpha_db_pool_size', 'size', 'Tamanho do pool de conexões'),
+            ('alpha_db_pool_checked_out', 'checkedout', 'Conexões em uso'),
+            ('alpha_db_pool_checked_in', 'checkedin', 'Conexões livres no pool'),
+            ('alpha_db_pool_overflow', 'overflow', 'Conexões além do tamanho do pool (negativo: vagas ainda não abertas)')
+        ):
+            metric(name, 'gauge', description, [
+                ('', labels, getattr(pool, method)()) for labels, pool in pools if hasattr(pool, method)
+            ])
+
+    def _render_services(self, metric):
+        """Métricas dos caches e serviços em memória, lidas dos seus stats()"""
+        from app.utils.license_cache import license_cache
+        from app.utils.user_cache import user_cache
+        from app.utils.dashboard_stats import dashboard_stats
+        from app.utils.manager_summary import manager_summary
+        from app.utils.license_manager import license_manager
+        from app.utils.logger import activity_logger
+        from app.utils.checkout import checkout_service
+
+        caches = {
+            'license': license_cache.stats(),
+            'user': user_cache.stats(),
+            'dashboard': dashboard_stats.stats(),
+            'manager_summary': manager_summary.stats()
+        }
+        metric('alpha_cache_hits_total', 'counter', 'Acertos dos caches em memória', [
+            ('', {'cache': cache}, stats['hits']) for cache, stats in caches.items()
+        ])
+        metric('alpha_cache_misses_total', 'counter', 'Faltas dos caches em memória', [
+            ('', {'cache': cache}, stats['misses']) for cache, stats in caches.items()
+        ])
+        license_stats = caches['license']
+        metric('alpha_license_cache_hit_rate', 'gauge', 'Taxa de acerto do cache de licenças',
+               [('', {}, license_stats['hit_rate'])])
+
+        breakers = {'online_db': license_manager.db_breaker, 'api': license_manager.api_breaker}
+        metric('alpha_license_breaker_open', 'gauge', 'Disjuntor da validação online aberto (1) ou não (0)', [
+            ('', {'breaker': name}, breaker.stats()['state'] == breaker.OPEN) for name, breaker in breakers.items()
+        ])
+
+        logger_stats = activity_logger.stats()
+        metric('alpha_activity_log_pending', 'gauge', 'Atividades aguardando gravação',
+               [('', {}, logger_stats['pending'])])
+        metric('alpha_activity_log_dropped_total', 'counter', 'Atividades descartadas com a fila cheia',
+               [('', {}, logger_stats['dropped'])])
+
+        checkout_stats = checkout_service.stats()
+        metric('alpha_checkout_conflicts_total', 'counter', 'Conflitos de estoque entre caixas no fechamento de vendas',
+               [('', {}, checkout_stats['conflicts'])])
+
+
+# Instância global das métricas do processo
+metrics = Metrics()
\ No newline at end of file
@@ -0,0 +1,50 @@
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy import BigInteger, Numeric
+from sqlalchemy.sql import operators
+from sqlalchemy.types import TypeDecorator
+
+
+def to_cents(value):
+    """Converte um valor em reais (float, Decimal, str ou int) para centavos inteiros (meio centavo arredonda para cima)"""
+    if value is None:
+        return None
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return int((value * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    """Converte centavos inteiros para reais"""
+    if cents is None:
+        return None
+    return int(round(cents)) / 100
+
+
+def percent_of(cents, percentage):
+    """Percentual de um valor em centavos, arredondado para o centavo"""
+    value = Decimal(int(cents)) * Decimal(str(percentage or 0)) / 100
+    return int(value.quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+class Money(TypeDecorator):
+    """
+    Valor monetário guardado no banco como centavos inteiros (BIGINT).
+    Na aplicação os valores continuam em reais: a conversão é feita ao gravar e ao ler, e as
+    somas (SUM) são feitas pelo banco sobre inteiros, sem erros de arredondamento.
+    """
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        return from_cents(value)
+
+    def coerce_compared_value(self, op, value):
+        # Somas e comparações com valores em reais são convertidas para centavos;
+        # multiplicadores e divisores (quantidades, percentuais) não
+        if op in (operators.add, operators.sub) or operators.is_comparison(op):
+            return self
+        return Numeric()
\ No newline at end of file
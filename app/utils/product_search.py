@@ -0,0 +1,444 @@
+import bisect
+import collections
+import heapq
+import os
+import re
+import threading
+import time
+import unicodedata
+
+# Peso de cada campo do produto na pontuação da busca
+FIELD_WEIGHTS = {'name': 3.0, 'category': 2.0, 'description': 1.0}
+
+# Qualidade de cada tipo de correspondência de um termo da busca
+MATCH_EXACT = 1.0
+MATCH_PREFIX = 0.8
+MATCH_FUZZY = 0.5
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize_text(text):
+    """Remove acentos e converte para minúsculas ('Pão de Açúcar' -> 'pao de acucar')"""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in text if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+def trigrams(token):
+    """Trigramas do termo com espaços nas bordas (favorece o início das palavras)"""
+    padded = f'  {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ProductSearchIndex:
+    """
+    Índice invertido em memória para a busca de produtos por nome, categoria e descrição.
+    Cada termo da busca é comparado sem acentos com o vocabulário do catálogo: correspondência
+    exata, por prefixo (lista ordenada do vocabulário) e, quando não há nenhuma das duas,
+    aproximada por trigramas. Todos os termos precisam corresponder e os resultados são
+    ordenados pela pontuação (campo e tipo de correspondência) e pelo nome.
+
+    O índice é construído em background quando o processo (worker) inicia, atualizado a
+    cada alteração de produto neste processo e reconstruído em background após
+    refresh_interval segundos (alterações feitas por outros processos). Enquanto a
+    primeira construção não termina, as buscas consultam o banco diretamente. As alterações
+    feitas durante uma construção são registradas e reaplicadas na nova estrutura antes da troca.
+    """
+
+    def __init__(self, refresh_interval=300, max_expansions=50, fuzzy_threshold=0.4):
+        self.refresh_interval = refresh_interval
+        self.max_expansions = max_expansions
+        self.fuzzy_threshold = fuzzy_threshold
+        self.app = None
+        self._lock = threading.RLock()
+        self._reset()
+        self._built_at = None
+        self._rebuilding_pid = None  # Processo com a construção em andamento (a thread não sobrevive a um fork)
+        self._build_logs = []  # Alterações feitas durante cada construção em andamento: [(pid, [alterações])]
+
+        # Métricas: tempos das buscas recentes (segundos) e da última construção
+        self.searches = 0
+        self.fallback_searches = 0
+        self.builds = 0
+        self.last_build_seconds = 0.0
+        self._recent_timings = collections.deque(maxlen=1000)
+
+    def _reset(self):
+        self._docs = {}             # id -> (nome normalizado, {termo: peso})
+        self._postings = {}         # termo -> {id do produto: peso do campo}
+        self._vocab = []            # termos ordenados (busca por prefixo)
+        self._vocab_trigrams = {}   # trigrama -> termos que o contêm
+        self._trigram_counts = {}   # termo -> quantidade de trigramas
+        self._sorted_postings = {}  # termo -> [(-peso, nome normalizado, id)] ordenada (criada sob demanda)
+
+    def init_app(self, app):
+        """Configura o índice a partir das configurações da aplicação"""
+        self.app = app
+        self.refresh_interval = app.config.get('PRODUCT_SEARCH_REFRESH_INTERVAL', self.refresh_interval)
+        # Sem fork (servidor de desenvolvimento, waitress) a construção começa na primeira requisição
+        app.before_request(self.warm_up)
+
+    # Construção e atualização
+
+    @staticmethod
+    def _document_terms(name, category, description):
+        terms = {}
+        for field, text in (('name', name), ('category', category), ('description', description)):
+            weight = FIELD_WEIGHTS[field]
+            for token in tokenize(text):
+                if weight > terms.get(token, 0):
+                    terms[token] = weight
+        return terms
+
+    def _add_term(self, token):
+        bisect.insort(self._vocab, token)
+        grams = trigrams(token)
+        self._trigram_counts[token] = len(grams)
+        for gram in grams:
+            self._vocab_trigrams.setdefault(gram, set()).add(token)
+
+    def _remove_term(self, token):
+        index = bisect.bisect_left(self._vocab, token)
+        if index < len(self._vocab) and self._vocab[index] == token:
+            del self._vocab[index]
+        for gram in trigrams(token):
+            words = self._vocab_trigrams.get(gram)
+            if words is not None:
+                words.discard(token)
+                if not words:
+                    del self._vocab_trigrams[gram]
+        self._trigram_counts.pop(token, None)
+
+    def _add_document(self, product_id, name, category, description, new_terms=None):
+        terms = self._document_terms(name, category, description)
+        normalized_name = normalize_text(name)
+        self._docs[product_id] = (normalized_name, terms)
+        for token, weight in terms.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                if new_terms is None:
+                    self._add_term(token)
+                else:
+                    new_terms.append(token)
+            postings[product_id] = weight
+            ranked = self._sorted_postings.get(token)
+            if ranked is not None:
+                bisect.insort(ranked, (-weight, normalized_name, product_id))
+
+    def _remove_document(self, product_id):
+        doc = self._docs.pop(product_id, None)
+        if doc is None:
+            return
+        normalized_name, terms = doc
+        for token, weight in terms.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(product_id, None)
+            ranked = self._sorted_postings.get(token)
+            if ranked is not None:
+                entry = (-weight, normalized_name, product_id)
+                index = bisect.bisect_left(ranked, entry)
+                if index < len(ranked) and ranked[index] == entry:
+                    del ranked[index]
+            if not postings:
+                del self._postings[token]
+                self._sorted_postings.pop(token, None)
+                self._remove_term(token)
+
+    def build(self):
+        """Reconstrói o índice a partir da tabela de produtos (requer contexto da aplicação)"""
+        from app import db
+        from app.models import Product
+
+        start = time.perf_counter()
+        # Alterações feitas a partir daqui (add_or_update/remove) podem não estar nas linhas lidas:
+        # são registradas e reaplicadas na nova estrutura antes da troca
+        log = []
+        with self._lock:
+            self._build_logs.append((os.getpid(), log))
+        try:
+            rows = db.session.query(Product.id, Product.name, Product.category, Product.description).all()
+
+            # Montar a nova estrutura fora do lock e trocá-la de uma vez
+            fresh = ProductSearchIndex.__new__(ProductSearchIndex)
+            fresh._reset()
+            new_terms = []
+            for row in rows:
+                fresh._add_document(row.id, row.name, row.category, row.description, new_terms)
+            fresh._vocab = sorted(new_terms)
+            for token in new_terms:
+                grams = trigrams(token)
+                fresh._trigram_counts[token] = len(grams)
+                for gram in grams:
+                    fresh._vocab_trigrams.setdefault(gram, set()).add(token)
+
+            with self._lock:
+                for change in log:
+                    fresh._apply_change(change)
+                self._docs = fresh._docs
+                self._postings = fresh._postings
+                self._vocab = fresh._vocab
+                self._vocab_trigrams = fresh._vocab_trigrams
+                self._trigram_counts = fresh._trigram_counts
+                self._sorted_postings = {}
+                self._built_at = time.monotonic()
+                self.builds += 1
+                self.last_build_seconds = time.perf_counter() - start
+        finally:
+            with self._lock:
+                self._build_logs = [entry for entry in self._build_logs if entry[1] is not log]
+        return len(rows)
+
+    def _rebuild_in_background(self):
+        app = self.app
+        if app is None:
+            return
+        pid = os.getpid()
+        with self._lock:
+            if self._rebuilding_pid == pid:
+                return
+            self._rebuilding_pid = pid
+
+        def rebuild():
+            try:
+                with app.app_context():
+                    self.build()
+            except Exception as e:
+                app.logger.error(f"Erro ao reconstruir o índice de busca de produtos: {e}")
+            finally:
+                self._rebuilding_pid = None
+
+        threading.Thread(target=rebuild, name='product-search-rebuild', daemon=True).start()
+
+    def warm_up(self):
+        """Inicia a construção do índice em background se ainda não foi construído (início do worker)"""
+        if self._built_at is None and self._rebuilding_pid != os.getpid():
+            self._rebuild_in_background()
+
+    def wait(self, timeout=30.0):
+        """Aguarda a conclusão da construção do índice"""
+        deadline = time.monotonic() + timeout
+        while self._built_at is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self._built_at is not None
+
+    def _ensure_built(self):
+        """Indica se o índice está pronto; nenhuma busca aguarda a sua construção"""
+        if self._built_at is None:
+            self.warm_up()
+            return False
+        if self.refresh_interval and time.monotonic() - self._built_at > self.refresh_interval:
+            # Continua respondendo com o índice atual enquanto a nova versão é construída
+            self._rebuild_in_background()
+        return True
+
+    def _apply_change(self, change):
+        action, product_id, *fields = change
+        self._remove_document(product_id)
+        if action == 'update':
+            self._add_document(product_id, *fields)
+
+    def _record_change(self, change):
+        """Aplica uma alteração ao índice atual e a registra nas construções em andamento (sob o lock)"""
+        pid = os.getpid()
+        for build_pid, log in self._build_logs:
+            if build_pid == pid:  # Construções herdadas de um fork não terminam neste processo
+                log.append(change)
+        if self._built_at is not None:  # Ainda não construído: a construção lê ou reaplica a alteração
+            self._apply_change(change)
+
+    def add_or_update(self, product):
+        """Indexa um produto novo ou alterado"""
+        with self._lock:
+            self._record_change(('update', product.id, product.name, product.category, product.description))
+
+    def remove(self, product_id):
+        """Remove um produto do índice"""
+        with self._lock:
+            self._record_change(('remove', product_id))
+
+    def invalidate(self):
+        """Descarta o índice; a próxima busca inicia a reconstrução em background"""
+        with self._lock:
+            self._reset()
+            self._built_at = None
+
+    # Busca
+
+    def _match_terms(self, token, expand=True):
+        """Termos do vocabulário que correspondem a um termo da busca: {termo: qualidade}"""
+        matches = {}
+        if token in self._postings:
+            matches[token] = MATCH_EXACT
+        if not expand:
+            return matches
+
+        # Prefixo: faixa contígua da lista ordenada, priorizando os termos mais curtos
+        expansions = []
+        index = bisect.bisect_left(self._vocab, token)
+        while index < len(self._vocab) and self._vocab[index].startswith(token):
+            if self._vocab[index] != token:
+                expansions.append(self._vocab[index])
+            index += 1
+        for word in heapq.nsmallest(self.max_expansions, expansions, key=len):
+            matches[word] = MATCH_PREFIX
+
+        if matches or len(token) < 3:
+            return matches
+
+        # Aproximada: similaridade de trigramas com o vocabulário (erros de digitação)
+        grams = trigrams(token)
+        shared = collections.Counter()
+        for gram in grams:
+            shared.update(self._vocab_trigrams.get(gram, ()))
+        candidates = []
+        for word, count in shared.items():
+            similarity = count / (len(grams) + self._trigram_counts[word] - count)
+            if similarity >= self.fuzzy_threshold:
+                candidates.append((similarity, word))
+        for similarity, word in heapq.nlargest(self.max_expansions, candidates):
+            matches[word] = MATCH_FUZZY * similarity
+        return matches
+
+    def _ranked_postings(self, token):
+        """Produtos de um termo ordenados por peso do campo e nome (calculado uma vez por termo)"""
+        ranked = self._sorted_postings.get(token)
+        if ranked is None:
+            docs = self._docs
+            ranked = sorted((-weight, docs[product_id][0], product_id)
+                            for product_id, weight in self._postings[token].items())
+            self._sorted_postings[token] = ranked
+        return ranked
+
+    def _top_single(self, matches, count):
+        """
+        Melhores resultados de um único termo: intercala as listas já ordenadas de cada termo
+        do vocabulário (cada lista tem qualidade constante), parando ao atingir a quantidade.
+        """
+        def scored(token, quality):
+            for negative_weight, name, product_id in self._ranked_postings(token):
+                yield negative_weight * quality, name, product_id
+
+        ranked = []
+        seen = set()
+        for negative_score, name, product_id in heapq.merge(*(scored(token, quality) for token, quality in matches.items())):
+            # A primeira ocorrência de um produto tem a maior pontuação
+            if product_id in seen:
+                continue
+            seen.add(product_id)
+            ranked.append(product_id)
+            if len(ranked) >= count:
+                break
+        return ranked
+
+    def _top_multiple(self, term_matches, count):
+        """Melhores resultados de vários termos: todos precisam corresponder; pontuações somadas"""
+        candidates = None
+        for matches in term_matches:
+            ids = set().union(*(self._postings[token].keys() for token in matches))
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return 0, []
+
+        scores = dict.fromkeys(candidates, 0.0)
+        for matches in term_matches:
+            best = {}
+            for token, quality in matches.items():
+                postings = self._postings[token]
+                for product_id in postings.keys() & candidates:
+                    score = quality * postings[product_id]
+                    if score > best.get(product_id, 0):
+                        best[product_id] = score
+            for product_id, score in best.items():
+                scores[product_id] += score
+
+        docs = self._docs
+        ranked = heapq.nsmallest(count, scores.items(), key=lambda item: (-item[1], docs[item[0]][0], item[0]))
+        return len(candidates), [product_id for product_id, _ in ranked]
+
+    def search(self, query, limit=20, offset=0, with_total=True):
+        """
+        Busca produtos e retorna (total de resultados, ids da página) em ordem de relevância.
+        Com with_total=False (autocompletar) o total não é calculado e retorna None.
+        """
+        start = time.perf_counter()
+        ready = self._ensure_built()
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return 0, []
+        if not ready:
+            self.fallback_searches += 1
+            return self._search_database(query, limit, offset, with_total)
+
+        with self._lock:
+            # Em buscas com vários termos, uma letra isolada não é expandida por prefixo
+            # (e é ignorada se não corresponder exatamente, ex.: 'arroz t' durante a digitação)
+            term_matches = []
+            for token in tokens:
+                matches = self._match_terms(token, expand=len(tokens) == 1 or len(token) > 1)
+                if matches or len(tokens) == 1 or len(token) > 1:
+                    term_matches.append(matches)
+            if not term_matches or not all(term_matches):
+                total, ids = 0, []
+            elif len(term_matches) == 1:
+                matches = term_matches[0]
+                ids = self._top_single(matches, offset + limit)[offset:]
+                total = len(set().union(*(self._postings[token].keys() for token in matches))) if with_total else None
+            else:
+                total, ids = self._top_multiple(term_matches, offset + limit)
+                ids = ids[offset:]
+
+        elapsed = time.perf_counter() - start
+        self.searches += 1
+        self._recent_timings.append(elapsed)
+        return total, ids
+
+    @staticmethod
+    def _search_database(query, limit, offset, with_total):
+        """
+        Busca direta no banco enquanto o índice não está pronto: todas as palavras precisam
+        aparecer no nome, na categoria ou na descrição (sem tolerância a acentos e erros de digitação)
+        """
+        from sqlalchemy import or_
+        from app import db
+        from app.models import Product
+
+        select = db.session.query(Product.id)
+        for word in query.split():
+            select = select.filter(or_(
+                Product.name.icontains(word, autoescape=True),
+                Product.category.icontains(word, autoescape=True),
+                Product.description.icontains(word, autoescape=True)
+            ))
+        total = select.count() if with_total else None
+        ids = [row.id for row in select.order_by(Product.name, Product.id).offset(offset).limit(limit)]
+        return total, ids
+
+    def stats(self):
+        """Retorna o tamanho do índice e os tempos das buscas recentes"""
+        timings = sorted(self._recent_timings)
+
+        def percentile(p):
+            return timings[min(len(timings) - 1, int(len(timings) * p))] if timings else 0.0
+
+        return {
+            'ready': self._built_at is not None,
+            'products': len(self._docs),
+            'terms': len(self._vocab),
+            'builds': self.builds,
+            'last_build_seconds': self.last_build_seconds,
+            'searches': self.searches,
+            'fallback_searches': self.fallback_searches,
+            'p50_seconds': percentile(0.50),
+            'p99_seconds': percentile(0.99)
+        }
+
+
+# Instância global do índice de busca de produtos
+product_search = ProductSearchIndex()
\ No newline at end of file
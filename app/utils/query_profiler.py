@@ -0,0 +1,204 @@
+import threading
+import time
+from collections import deque
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(Exception):
+    """Endpoint executou mais comandos SQL que o orçamento configurado"""
+
+
+def parse_budgets(value):
+    """Converte 'endpoint=N,endpoint2=M' em {'endpoint': N, 'endpoint2': M}"""
+    budgets = {}
+    for item in (value or '').split(','):
+        endpoint, _, limit = item.partition('=')
+        if endpoint.strip() and limit.strip():
+            budgets[endpoint.strip()] = int(limit)
+    return budgets
+
+
+class QueryProfiler:
+    """
+    Instrumentação dos comandos SQL por requisição, ligada aos eventos de todos os engines.
+    Conta os comandos e o tempo gasto no banco em cada requisição e acumula os totais por
+    endpoint. Comandos mais lentos que o limite são registrados no log com o plano de
+    execução (EXPLAIN), obtido ao final da requisição em outra conexão. Um orçamento de
+    comandos por endpoint pode ser configurado; no modo estrito (padrão nos testes) a
+    requisição que o ultrapassa falha com QueryBudgetExceeded.
+    """
+
+    def __init__(self, slow_threshold_ms=200, explain=True, budget=0, budgets=None, strict=None,
+                 max_slow_queries=50):
+        self.enabled = True
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.explain = explain
+        self.budget = budget
+        self.budgets = dict(budgets or {})
+        self.strict = strict
+        self.app = None
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self.slow_queries = deque(maxlen=max_slow_queries)
+        self._listening = False
+
+    def init_app(self, app):
+        """Configura o profiler a partir das configurações da aplicação e registra os eventos"""
+        self.app = app
+        self.enabled = app.config.get('QUERY_PROFILER_ENABLED', self.enabled)
+        self.slow_threshold = app.config.get('SLOW_QUERY_THRESHOLD_MS', self.slow_threshold * 1000) / 1000
+        self.explain = app.config.get('SLOW_QUERY_EXPLAIN', self.explain)
+        self.budget = app.config.get('QUERY_BUDGET', self.budget)
+        self.budgets = parse_budgets(app.config.get('QUERY_BUDGETS')) or self.budgets
+        self.strict = app.config.get('QUERY_BUDGET_STRICT', self.strict)
+        if not self.enabled:
+            return
+
+        if not self._listening:
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._listening = True
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    # Eventos do SQLAlchemy
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('query_start_time')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+
+        state = g.get('_query_profile') if has_request_context() else None
+        if state is not None:
+            if state['explaining']:
+                return
+            state['count'] += 1
+            state['time'] += elapsed
+
+        if elapsed >= self.slow_threshold:
+            slow = {
+                'endpoint': request.endpoint if has_request_context() else None,
+                'statement': statement,
+                'parameters': parameters if not executemany else None,
+                'duration_ms': round(elapsed * 1000, 3),
+                'plan': None,
+                'engine': conn.engine
+            }
+            if state is not None:
+                # O plano é obtido ao final da requisição, fora da transação em andamento
+                state['slow'].append(slow)
+            else:
+                self._record_slow(slow)
+
+    # Ciclo da requisição
+
+    def _start_request(self):
+        g._query_profile = {'count': 0, 'time': 0.0, 'slow': [], 'explaining': False}
+
+    def _finish_request(self, response):
+        state = g.get('_query_profile')
+        if state is None:
+            return response
+        endpoint = request.endpoint or 'desconhecido'
+
+        # Os comandos do EXPLAIN não entram na contagem da requisição
+        state['explaining'] = True
+        for slow in state['slow']:
+            if self.explain:
+                slow['plan'] = self.explain_plan(slow['engine'], slow['statement'], slow['parameters'])
+            self._record_slow(slow)
+        g.pop('_query_profile', None)
+
+        budget = self.budgets.get(endpoint, self.budget)
+        exceeded = bool(budget) and state['count'] > budget
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, {
+                'requests': 0, 'queries': 0, 'max_queries': 0, 'db_time': 0.0, 'max_db_time': 0.0,
+                'slow_queries': 0, 'budget_exceeded': 0
+            })
+            stats['requests'] += 1
+            stats['queries'] += state['count']
+            stats['max_queries'] = max(stats['max_queries'], state['count'])
+            stats['db_time'] += state['time']
+            stats['max_db_time'] = max(stats['max_db_time'], state['time'])
+            stats['slow_queries'] += len(state['slow'])
+            stats['budget_exceeded'] += int(exceeded)
+
+        if exceeded:
+            message = f'{endpoint} executou {state["count"]} comandos SQL (orçamento: {budget})'
+            self.app.logger.warning(message)
+            # Sem configuração explícita, o modo estrito vale apenas nos testes
+            if self.app.testing if self.strict is None else self.strict:
+                raise QueryBudgetExceeded(message)
+        return response
+
+    # Comandos lentos
+
+    @staticmethod
+    def explain_plan(engine, statement, parameters):
+        """Plano de execução de um SELECT (EXPLAIN QUERY PLAN no SQLite, EXPLAIN nos demais)"""
+        if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return None
+        prefix = 'EXPLAIN QUERY PLAN ' if engine.dialect.name == 'sqlite' else 'EXPLAIN '
+        try:
+            with engine.connect() as connection:
+                rows = connection.exec_driver_sql(prefix + statement, parameters or ()).fetchall()
+            return [' | '.join(str(value) for value in row) for row in rows]
+        except Exception as e:
+            return [f'EXPLAIN indisponível: {e}']
+
+    def _record_slow(self, slow):
+        slow = dict(slow)
+        slow.pop('engine', None)
+        slow['parameters'] = repr(slow['parameters'])[:500] if slow['parameters'] is not None else None
+        self.slow_queries.append(slow)
+        if self.app is not None:
+            plan = '\n  '.join(slow['plan'] or [])
+            self.app.logger.warning(
+                f"Comando SQL lento ({slow['duration_ms']:.1f} ms) em {slow['endpoint'] or 'fora de requisição'}: "
+                f"{slow['statement']}" + (f'\n  {plan}' if plan else '')
+            )
+
+    # Métricas
+
+    def stats(self):
+        """Totais por endpoint (médias em comandos e milissegundos) e os últimos comandos lentos"""
+        with self._lock:
+            endpoints = {}
+            for endpoint, stats in self._endpoints.items():
+                requests = stats['requests'] or 1
+                endpoints[endpoint] = {
+                    'requests': stats['requests'],
+                    'queries': stats['queries'],
+                    'avg_queries': round(stats['queries'] / requests, 2),
+                    'max_queries': stats['max_queries'],
+                    'db_time_ms': round(stats['db_time'] * 1000, 3),
+                    'avg_db_time_ms': round(stats['db_time'] * 1000 / requests, 3),
+                    'max_db_time_ms': round(stats['max_db_time'] * 1000, 3),
+                    'slow_queries': stats['slow_queries'],
+                    'budget': self.budgets.get(endpoint, self.budget) or None,
+                    'budget_exceeded': stats['budget_exceeded']
+                }
+            return {
+                'enabled': self.enabled,
+                'slow_threshold_ms': self.slow_threshold * 1000,
+                'endpoints': endpoints,
+                'slow_queries': list(self.slow_queries)
+            }
+
+    def reset(self):
+        """Zera os totais e a lista de comandos lentos"""
+        with self._lock:
+            self._endpoints.clear()
+            self.slow_queries.clear()
+
+
+# Instância global do profiler de comandos SQL
+query_profiler = QueryProfiler()
\ No newline at end of file
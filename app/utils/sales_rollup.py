@@ -0,0 +1,213 @@
+from datetime import datetime, time
+from sqlalchemy import func, insert, delete, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app import db
+from app.models import Sale, Cashier, DailySalesRollup
+from app.utils.money import to_cents, from_cents
+
+
+MONEY_FIELDS = ('gross', 'discount', 'net')
+
+# Chave única do resumo diário (uma linha por dia, caixa e produto)
+UNIQUE_KEY = ('day', 'cashier_id', 'product_id')
+
+# Caixa das vendas registradas sem caixa aberto (NULL não participaria da chave única)
+NO_CASHIER_ID = 0
+
+
+def _empty_totals():
+    return {'count': 0, 'quantity': 0, 'gross': 0.0, 'discount': 0.0, 'net': 0.0}
+
+
+def _empty_cents():
+    return {'count': 0, 'quantity': 0, 'gross': 0, 'discount': 0, 'net': 0}
+
+
+def _day_start(day):
+    return datetime.combine(day, time.min)
+
+
+def record_sales(sales, user_id=None):
+    """
+    Soma as vendas ao resumo diário na mesma transação das vendas.
+    As vendas são agrupadas por (dia, caixa, produto) e somadas com um único upsert atômico
+    (chave única da tabela): as chaves novas são inseridas e as existentes incrementadas, sem
+    linhas duplicadas mesmo com vendas simultâneas.
+    """
+    groups = {}
+    for sale in sales:
+        if sale.sale_date is None:
+            sale.sale_date = datetime.utcnow()
+        key = (sale.sale_date.date(), sale.cashier_id or NO_CASHIER_ID, sale.product_id)
+        # Valores acumulados em centavos inteiros
+        totals = groups.setdefault(key, _empty_cents())
+        totals['count'] += 1
+        totals['quantity'] += sale.quantity or 0
+        totals['gross'] += to_cents(sale.total_price or 0)
+        totals['discount'] += to_cents(sale.discount_amount or 0)
+        totals['net'] += to_cents(sale.final_price if sale.final_price is not None else (sale.total_price or 0))
+
+    if not groups:
+        return
+
+    rows = [
+        {
+            'day': day,
+            'user_id': user_id,
+            'cashier_id': cashier_id,
+            'product_id': product_id,
+            'sale_count': totals['count'],
+            'quantity': totals['quantity'],
+            'gross': from_cents(totals['gross']),
+            'discount': from_cents(totals['discount']),
+            'net': from_cents(totals['net'])
+        }
+        for (day, cashier_id, product_id), totals in groups.items()
+    ]
+    db.session.execute(_upsert(rows))
+
+
+def _upsert(rows):
+    """
+    INSERT das linhas que, para as chaves já existentes, soma os valores às colunas.
+    Os incrementos são somados diretamente às colunas, então os valores monetários vão em
+    centavos (a unidade guardada no banco), sem conversão.
+    """
+    dialect = db.session.get_bind(mapper=DailySalesRollup.__mapper__).dialect.name
+    if dialect in ('mysql', 'mariadb'):
+        statement = mysql_insert(DailySalesRollup).values(rows)
+        return statement.on_duplicate_key_update(**_increments(statement.inserted))
+    if dialect == 'sqlite':
+        statement = sqlite_insert(DailySalesRollup).values(rows)
+        return statement.on_conflict_do_update(
+            index_elements=list(UNIQUE_KEY),
+            set_=_increments(statement.excluded)
+        )
+    raise NotImplementedError(f'Upsert do resumo diário não implementado para o banco {dialect}')
+
+
+def _increments(new):
+    table = DailySalesRollup.__table__
+    return {
+        'sale_count': table.c.sale_count + new.sale_count,
+        'quantity': table.c.quantity + new.quantity,
+        'gross': table.c.gross + new.gross,
+        'discount': table.c.discount + new.discount,
+        'net': table.c.net + new.net
+    }
+
+
+def record_sale(sale, user_id=None):
+    """Soma uma venda ao resumo diário na mesma transação da venda"""
+    record_sales([sale], user_id=user_id)
+
+
+def rebuild(start_day=None, end_day=None):
+    """
+    Reconstrói o resumo diário a partir das vendas registradas (intervalo [start_day, end_day)).
+    Retorna o número de linhas geradas.
+    """
+    delete_stmt = delete(DailySalesRollup)
+    if start_day:
+        delete_stmt = delete_stmt.where(DailySalesRollup.day >= start_day)
+    if end_day:
+        delete_stmt = delete_stmt.where(DailySalesRollup.day < end_day)
+    db.session.execute(delete_stmt)
+
+    sale_day = func.date(Sale.sale_date)
+    cashier_key = func.coalesce(Sale.cashier_id, NO_CASHIER_ID)
+    source = select(
+        sale_day,
+        Cashier.user_id,
+        cashier_key,
+        Sale.product_id,
+        func.count(Sale.id),
+        func.coalesce(func.sum(Sale.quantity), 0),
+        func.coalesce(func.sum(Sale.total_price), 0),
+        func.coalesce(func.sum(func.coalesce(Sale.discount_amount, 0)), 0),
+        func.coalesce(func.sum(func.coalesce(Sale.final_price, Sale.total_price)), 0)
+    ).select_from(Sale).outerjoin(
+        Cashier, Sale.cashier_id == Cashier.id
+    ).where(Sale.sale_date.isnot(None))
+    if start_day:
+        source = source.where(Sale.sale_date >= _day_start(start_day))
+    if end_day:
+        source = source.where(Sale.sale_date < _day_start(end_day))
+    source = source.group_by(sale_day, Cashier.user_id, cashier_key, Sale.product_id)
+
+    result = db.session.execute(insert(DailySalesRollup).from_select(
+        ['day', 'user_id', 'cashier_id', 'product_id', 'sale_count', 'quantity', 'gross', 'discount', 'net'],
+        source
+    ))
+    db.session.commit()
+    return result.rowcount
+
+
+def needs_backfill():
+    """Indica se existem vendas de dias anteriores sem resumo diário (ex.: após atualização)"""
+    has_rollup = db.session.query(DailySalesRollup.id).limit(1).first() is not None
+    if has_rollup:
+        return False
+    today_start = _day_start(datetime.utcnow().date())
+    return db.session.query(Sale.id).filter(Sale.sale_date < today_start).limit(1).first() is not None
+
+
+def summarize_sales(start_day=None, end_day=None, cashier_id=None, user_ids=None):
+    """
+    Totais de vendas (count, quantity, gross, discount, net) no intervalo de dias [start_day, end_day).
+    Dias já encerrados são lidos do resumo diário; apenas o dia atual (parcial) é somado
+    diretamente na tabela de vendas.
+    """
+    totals = _empty_totals()
+    if user_ids is not None and not user_ids:
+        return totals
+
+    today = datetime.utcnow().date()
+
+    # Dias anteriores: resumo diário
+    rollup_end = today if end_day is None else min(end_day, today)
+    if start_day is None or start_day < rollup_end:
+        query = db.session.query(
+            func.coalesce(func.sum(DailySalesRollup.sale_count), 0),
+            func.coalesce(func.sum(DailySalesRollup.quantity), 0),
+            func.coalesce(func.sum(DailySalesRollup.gross), 0),
+            func.coalesce(func.sum(DailySalesRollup.discount), 0),
+            func.coalesce(func.sum(DailySalesRollup.net), 0)
+        ).filter(DailySalesRollup.day < rollup_end)
+        if start_day is not None:
+            query = query.filter(DailySalesRollup.day >= start_day)
+        if cashier_id is not None:
+            query = query.filter(DailySalesRollup.cashier_id == cashier_id)
+        if user_ids is not None:
+            query = query.filter(DailySalesRollup.user_id.in_(user_ids))
+        _add_totals(totals, query.one())
+
+    # Dia atual (parcial): vendas registradas
+    raw_start = today if start_day is None else max(start_day, today)
+    if end_day is None or raw_start < end_day:
+        query = db.session.query(
+            func.count(Sale.id),
+            func.coalesce(func.sum(Sale.quantity), 0),
+            func.coalesce(func.sum(Sale.total_price), 0),
+            func.coalesce(func.sum(func.coalesce(Sale.discount_amount, 0)), 0),
+            func.coalesce(func.sum(func.coalesce(Sale.final_price, Sale.total_price)), 0)
+        ).filter(Sale.sale_date >= _day_start(raw_start))
+        if end_day is not None:
+            query = query.filter(Sale.sale_date < _day_start(end_day))
+        if cashier_id is not None:
+            query = query.filter(Sale.cashier_id == cashier_id)
+        if user_ids is not None:
+            query = query.join(Cashier, Sale.cashier_id == Cashier.id).filter(Cashier.user_id.in_(user_ids))
+        _add_totals(totals, query.one())
+
+    return totals
+
+
+def _add_totals(totals, row):
+    count, quantity, gross, discount, net = row
+    totals['count'] += int(count or 0)
+    totals['quantity'] += int(quantity or 0)
+    # Somar em centavos para não acumular erros de arredondamento
+    for field, value in zip(MONEY_FIELDS, (gross, discount, net)):
+        totals[field] = from_cents(to_cents(totals[field]) + to_cents(value or 0))
\ No newline at end of file
@@ -0,0 +1,125 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Marcador da linha com as etapas da inicialização na saída do processo medido
+STEPS_MARKER = 'STARTUP_STEPS '
+
+
+class StartupProfiler:
+    """
+    Tempo de inicialização da aplicação.
+    create_app marca o fim de cada etapa (configuração, extensões, serviços, blueprints...);
+    o tempo de importação de cada módulo é obtido executando a importação do ponto de
+    entrada em um processo novo com "python -X importtime", como numa partida a frio
+    (ex.: uma função serverless).
+    """
+
+    def __init__(self):
+        self.steps = []
+        self._last = None
+
+    def start(self):
+        """Inicia a medição de uma nova criação da aplicação"""
+        self.steps = []
+        self._last = time.perf_counter()
+
+    def mark(self, name):
+        """Registra a duração da etapa encerrada agora (desde a marcação anterior)"""
+        if self._last is None:
+            return
+        now = time.perf_counter()
+        self.steps.append((name, now - self._last))
+        self._last = now
+
+    def total(self):
+        """Duração total (em segundos) da última criação da aplicação"""
+        return sum(duration for _, duration in self.steps)
+
+    def report(self):
+        """Etapas da última criação da aplicação, em milissegundos"""
+        return {
+            'steps': [{'step': name, 'ms': round(duration * 1000, 3)} for name, duration in self.steps],
+            'total_ms': round(self.total() * 1000, 3)
+        }
+
+
+def parse_importtime(output):
+    """
+    Converte a saída de "python -X importtime" em uma lista de módulos com o tempo próprio
+    e o acumulado (incluindo os módulos importados por ele), em milissegundos.
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            modules.append({
+                'module': name.strip(),
+                'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+                'self_ms': int(self_us) / 1000,
+                'cumulative_ms': int(cumulative_us) / 1000
+            })
+        except ValueError:
+            continue
+    return modules
+
+
+def profile_cold_start(target='wsgi', top=15):
+    """
+    Mede a partida a frio do ponto de entrada (módulo com a variável app) em um processo novo:
+    tempo total até a aplicação estar pronta, tempo de importação por módulo e por pacote
+    de primeiro nível (tempo próprio somado) e as etapas do create_app.
+    """
+    code = (
+        'import time; _start = time.perf_counter()\n'
+        f'import {target}\n'
+        '_elapsed = time.perf_counter() - _start\n'
+        'import json\n'
+        'from app.utils.startup_profiler import startup_profiler, STEPS_MARKER\n'
+        'print(STEPS_MARKER + json.dumps(dict(startup_profiler.report(), '
+        'ready_ms=round(_elapsed * 1000, 3))))\n'
+    )
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, cwd=os.getcwd()
+    )
+    wall = time.perf_counter() - start
+    if process.returncode != 0:
+        lines = process.stderr.strip().splitlines()
+        raise RuntimeError(f'Falha ao importar {target}: {lines[-1] if lines else process.returncode}')
+
+    boot = {}
+    for line in process.stdout.splitlines():
+        if line.startswith(STEPS_MARKER):
+            boot = json.loads(line[len(STEPS_MARKER):])
+
+    modules = parse_importtime(process.stderr)
+    # Tempo próprio somado por pacote de primeiro nível (sqlalchemy, flask, app...)
+    packages = {}
+    for module in modules:
+        package = module['module'].split('.')[0]
+        packages[package] = packages.get(package, 0) + module['self_ms']
+
+    return {
+        'target': target,
+        'process_ms': round(wall * 1000, 3),
+        'ready_ms': boot.get('ready_ms'),
+        # Importações (e execução do módulo de entrada) fora do create_app
+        'import_ms': round(boot['ready_ms'] - boot['total_ms'], 3) if boot else None,
+        'create_app_ms': boot.get('total_ms'),
+        'steps': boot.get('steps', []),
+        'packages': sorted(
+            ({'package': name, 'ms': round(ms, 3)} for name, ms in packages.items()),
+            key=lambda item: item['ms'], reverse=True
+        )[:top],
+        'modules': sorted(modules, key=lambda item: item['self_ms'], reverse=True)[:top]
+    }
+
+
+# Instância global do profiler de inicialização
+startup_profiler = StartupProfiler()
\ No newline at end of file
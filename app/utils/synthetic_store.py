@@ -0,0 +1,221 @@
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import (User, License, Product, Sale, Cashier, CashierTransaction,
+                        CustomerCredit, ConsumptionRecord)
+from app.utils import sales_rollup
+from app.utils.money import from_cents, percent_of
+
+# Senha de todos os usuários gerados (apenas para bancos de benchmark)
+SYNTHETIC_PASSWORD = 'benchmark'
+SYNTHETIC_LICENSE_KEY = 'BENCHMARK-LICENSE'
+
+CATEGORIES = ('Bebidas', 'Mercearia', 'Limpeza', 'Higiene', 'Padaria', 'Frios', 'Hortifruti', 'Utilidades')
+
+
+class SyntheticStore:
+    """
+    Gerador determinístico de uma loja sintética para medições de desempenho.
+    Com a mesma semente e os mesmos parâmetros gera sempre os mesmos dados: produtos, um
+    gerente com os seus usuários, um caixa por usuário por dia (fechados, exceto o do dia
+    atual), vendas com as transações de caixa, despesas e clientes fiado com consumos.
+    As linhas são inseridas em lote com IDs explícitos, por isso o banco deve estar vazio.
+    """
+
+    def __init__(self, products=200, users=5, years=1, sales_per_day=40, customers=50,
+                 seed=42, batch_size=5000):
+        self.products = products
+        self.users = users
+        self.years = years
+        self.sales_per_day = sales_per_day
+        self.customers = customers
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.counts = {}
+
+        # Próximos IDs explícitos por tabela
+        self._next_ids = {}
+        self._pending = {}
+
+    def _next_id(self, model):
+        next_id = self._next_ids.get(model, 1)
+        self._next_ids[model] = next_id + 1
+        return next_id
+
+    def _add(self, model, row):
+        rows = self._pending.setdefault(model, [])
+        rows.append(row)
+        if len(rows) >= self.batch_size:
+            self._flush(model)
+
+    def _flush(self, model=None):
+        # Os caixas (e as vendas) precisam existir antes das transações que os referenciam
+        order = (Cashier, Sale, CashierTransaction, ConsumptionRecord)
+        models = order if model is None else [m for m in order if m is model or order.index(m) < order.index(model)]
+        for current in models:
+            rows = self._pending.pop(current, None)
+            if rows:
+                db.session.execute(insert(current), rows)
+                self.counts[current.__tablename__] = self.counts.get(current.__tablename__, 0) + len(rows)
+
+    @staticmethod
+    def is_empty():
+        """Indica se o banco ainda não tem produtos nem vendas"""
+        return not db.session.query(func.count(Product.id)).scalar() and \
+            not db.session.query(func.count(Sale.id)).scalar()
+
+    def generate(self):
+        """Gera a loja na transação atual e confirma. Retorna as quantidades de linhas por tabela"""
+        if not self.is_empty():
+            raise ValueError('O banco de dados já tem produtos ou vendas; use um banco vazio para os dados sintéticos.')
+
+        now = datetime.utcnow()
+        password = generate_password_hash(SYNTHETIC_PASSWORD)
+        db.session.add(License(
+            license_key=SYNTHETIC_LICENSE_KEY, client_name='Loja sintética', client_email='benchmark@localhost',
+            expiry_date=now + timedelta(days=365), is_active=True, user_type='manager'
+        ))
+        db.session.flush()
+
+        manager = User(username='bench_manager', email='bench_manager@localhost', password=password,
+                       role='manager', license_key=SYNTHETIC_LICENSE_KEY)
+        db.session.add(manager)
+        db.session.flush()
+        user_ids = []
+        for index in range(self.users):
+            user = User(username=f'bench_user{index + 1}', email=f'bench_user{index + 1}@localhost',
+                        password=password, role='user', license_key=SYNTHETIC_LICENSE_KEY, manager_id=manager.id)
+            db.session.add(user)
+            db.session.flush()
+            user_ids.append(user.id)
+        self.counts['user'] = self.users + 1
+
+        prices = self._generate_products(now)
+        self._generate_sales(now, user_ids, prices)
+        self._generate_tabs(now)
+        self._flush()
+        db.session.commit()
+
+        # Resumo diário de vendas gerado a partir das vendas inseridas
+        self.counts['daily_sales_rollup'] = sales_rollup.rebuild()
+        return dict(self.counts)
+
+    def _generate_products(self, now):
+        prices = []
+        rows = []
+        for index in range(self.products):
+            price = self.random.randint(50, 20000)  # Centavos
+            prices.append(price)
+            rows.append({
+                'id': index + 1,
+                'name': f'Produto {index + 1:05d}',
+                'description': f'Produto sintético {index + 1}',
+                'price': from_cents(price),
+                'quantity': 10 ** 6,
+                'max_quantity': 10 ** 6,
+                'category': CATEGORIES[index % len(CATEGORIES)],
+                'barcode': f'789{index + 1:010d}',
+                'created_at': now
+            })
+        db.session.execute(insert(Product), rows)
+        self.counts['product'] = len(rows)
+        return prices
+
+    def _generate_sales(self, now, user_ids, prices):
+        today = now.date()
+        first_day = today - timedelta(days=365 * self.years)
+        day = first_day
+        while day <= today:
+            day_start = datetime.combine(day, datetime.min.time())
+            is_today = day == today
+            # Caixa do dia atual fica aberto; vendas de hoje até o horário atual
+            span = max(int((now - day_start).total_seconds()), 1) if is_today else 10 * 3600
+            opening = day_start if is_today else day_start + timedelta(hours=8)
+
+            for user_id in user_ids:
+                cashier_id = self._next_id(Cashier)
+                initial = self.random.choice((0, 5000, 10000, 20000))
+                sales_total = expenses_total = 0
+                transactions = [{
+                    'id': self._next_id(CashierTransaction), 'cashier_id': cashier_id,
+                    'transaction_type': 'entry', 'amount': from_cents(initial),
+                    'description': 'Abertura de caixa', 'transaction_date': opening, 'related_sale_id': None
+                }]
+
+                sales = []
+                count = self.random.randint(self.sales_per_day // 2, self.sales_per_day * 3 // 2)
+                # Um sorteio por venda, para que a sequência não dependa do horário atual
+                times = sorted(int(self.random.random() * span) for _ in range(count))
+                for offset in times:
+                    product_index = self.random.randrange(len(prices))
+                    quantity = self.random.randint(1, 5)
+                    discount_percentage = 5.0 if self.random.random() < 0.1 else 0.0
+                    total = prices[product_index] * quantity
+                    discount = percent_of(total, discount_percentage)
+                    sale_date = opening + timedelta(seconds=offset)
+                    sale_id = self._next_id(Sale)
+                    sales.append({
+                        'id': sale_id, 'product_id': product_index + 1, 'quantity': quantity,
+                        'total_price': from_cents(total), 'discount_percentage': discount_percentage,
+                        'discount_amount': from_cents(discount), 'final_price': from_cents(total - discount),
+                        'sale_date': sale_date, 'cashier_id': cashier_id
+                    })
+                    transactions.append({
+                        'id': self._next_id(CashierTransaction), 'cashier_id': cashier_id,
+                        'transaction_type': 'sale', 'amount': from_cents(total - discount),
+                        'description': f'Venda {sale_id}', 'transaction_date': sale_date, 'related_sale_id': sale_id
+                    })
+                    sales_total += total - discount
+
+                if self.random.random() < 0.2:
+                    expense = self.random.randint(500, 5000)
+                    transactions.append({
+                        'id': self._next_id(CashierTransaction), 'cashier_id': cashier_id,
+                        'transaction_type': 'expense', 'amount': from_cents(expense),
+                        'description': 'Despesa', 'transaction_date': opening + timedelta(seconds=span // 2),
+                        'related_sale_id': None
+                    })
+                    expenses_total += expense
+
+                # O caixa é inserido antes das suas vendas e transações
+                balance = initial + sales_total - expenses_total
+                self._add(Cashier, {
+                    'id': cashier_id, 'user_id': user_id, 'opening_date': opening,
+                    'closing_date': None if is_today else opening + timedelta(seconds=span),
+                    'initial_amount': from_cents(initial), 'final_amount': None if is_today else from_cents(balance),
+                    'total_sales': from_cents(sales_total), 'total_expenses': from_cents(expenses_total),
+                    'balance': from_cents(balance), 'status': 'open' if is_today else 'closed'
+                })
+                for sale in sales:
+                    self._add(Sale, sale)
+                for transaction in transactions:
+                    self._add(CashierTransaction, transaction)
+            day += timedelta(days=1)
+
+    def _generate_tabs(self, now):
+        days = 365 * self.years
+        for index in range(self.customers):
+            customer_id = index + 1
+            debt = 0
+            records = []
+            for _ in range(self.random.randint(5, 60)):
+                value = self.random.randint(100, 15000)
+                created_at = now - timedelta(minutes=self.random.randrange(days * 24 * 60 + 1))
+                paid = self.random.random() < 0.7
+                if not paid:
+                    debt += value
+                records.append({
+                    'id': self._next_id(ConsumptionRecord), 'customer_id': customer_id,
+                    'item_description': f'Consumo {self.random.randrange(1000)}', 'total_value': from_cents(value),
+                    'paid': paid, 'paid_date': created_at + timedelta(days=1) if paid else None,
+                    'created_at': created_at, 'updated_at': created_at
+                })
+            db.session.execute(insert(CustomerCredit), [{
+                'id': customer_id, 'name': f'Cliente {customer_id:04d}', 'phone': f'1199{customer_id:07d}',
+                'total_debt': from_cents(debt), 'created_at': now, 'updated_at': now
+            }])
+            for record in records:
+                self._add(ConsumptionRecord, record)
+        self.counts['customer_credit'] = self.customers
\ No newline at end of file
@@ -0,0 +1,115 @@
+import threading
+import time
+from flask_login import UserMixin
+
+
+class CachedUser(UserMixin):
+    """
+    Registro imutável do usuário autenticado, usado como current_user.
+    Contém apenas os dados consultados a cada requisição (papel, administrador, gerente e
+    licença); rotas que alteram o usuário devem carregar o modelo User do banco.
+    """
+
+    __slots__ = ('id', 'username', 'email', 'is_admin', 'role', 'manager_id',
+                 'license_key', 'license_active', 'license_expiry')
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields.get(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('CachedUser é somente leitura; altere o modelo User')
+
+    def __repr__(self):
+        return f'<CachedUser {self.id} {self.username}>'
+
+
+class UserCache:
+    """
+    Cache dos usuários autenticados compartilhado pelo processo (user_loader do Flask-Login).
+    O usuário e a sua licença são carregados em uma única consulta e mantidos por TTL
+    segundos; as rotas que alteram ou excluem usuários (e licenças) invalidam as entradas
+    explicitamente. Em regime, autenticação e verificação de licença não fazem consultas.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+        # Métricas do cache
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        """Configura o cache a partir das configurações da aplicação"""
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+        self.clear()
+
+    def _load(self, user_id):
+        from app import db
+        from app.models import User, License
+        from app.utils.license_cache import license_cache
+
+        row = db.session.query(
+            User.id, User.username, User.email, User.is_admin, User.role, User.manager_id,
+            User.license_key, License.is_active, License.expiry_date
+        ).outerjoin(License, License.license_key == User.license_key).filter(User.id == user_id).first()
+        if row is None:
+            return None
+
+        user = CachedUser(
+            id=row[0], username=row[1], email=row[2], is_admin=bool(row[3]), role=row[4],
+            manager_id=row[5], license_key=row[6], license_active=row[7], license_expiry=row[8]
+        )
+        # Aproveitar a mesma consulta para o cache de veredictos de licença
+        if user.license_key and user.license_expiry is not None:
+            license_cache.prime(user.license_key, {
+                'is_active': user.license_active, 'expiry_date': user.license_expiry
+            })
+        return user
+
+    def get(self, user_id):
+        """Retorna o registro do usuário (do cache ou do banco) ou None se não existir"""
+        now = time.monotonic()
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[1] > now:
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        user = self._load(user_id)
+        # Usuários inexistentes não ficam em cache
+        if user is not None and self.ttl > 0:
+            with self._lock:
+                self._entries[user_id] = (user, now + self.ttl)
+        return user
+
+    def invalidate(self, user_id):
+        """Remove o usuário do cache (após editar, excluir ou redefinir a senha)"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self.invalidations += 1
+
+    def clear(self):
+        """Remove todos os usuários do cache (por exemplo, após alterar uma licença)"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        """Retorna as métricas do cache"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            'invalidations': self.invalidations,
+            'entries': len(self._entries),
+            'ttl': self.ttl
+        }
+
+
+# Instância global do cache de usuários
+user_cache = UserCache()
\ No newline at end of file
@@ -0,0 +1,32 @@
+import multiprocessing
+import os
+from dotenv import load_dotenv
+
+# Configuração do gunicorn: gunicorn -c gunicorn.conf.py wsgi:app
+# Antes de iniciar (ou após atualizar) execute "flask --app wsgi prepare-db".
+load_dotenv()
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', 5007)}"
+
+# Um worker por núcleo (WEB_CONCURRENCY=0) e algumas threads por worker para as esperas de E/S
+workers = int(os.environ.get('WEB_CONCURRENCY', 0)) or multiprocessing.cpu_count()
+threads = int(os.environ.get('WEB_THREADS', 4))
+worker_class = 'gthread'
+
+# A aplicação é criada uma vez no processo principal e herdada pelos workers via fork;
+# os engines herdados são descartados no filho (os.register_at_fork em app/lifecycle.py)
+preload_app = True
+
+# Encerramento gracioso: requisições em andamento têm graceful_timeout segundos para terminar
+timeout = int(os.environ.get('WEB_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+
+
+def worker_exit(server, worker):
+    # Gravar as atividades pendentes e fechar as conexões do worker antes de sair
+    from app.lifecycle import process_lifecycle
+    process_lifecycle.shutdown()
\ No newline at end of file
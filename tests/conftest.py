@@ -0,0 +1,70 @@
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models import License, User
+from app.utils import credit_ledger
+
+# Senha de todos os usuários criados nos testes
+PASSWORD = 'senha-teste'
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """Aplicação com bancos SQLite em um diretório temporário (não usa instance/)"""
+    directory = tmp_path_factory.mktemp('db')
+
+    class Config(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{directory / "test.db"}'
+        SQLALCHEMY_BINDS = {
+            'local': f'sqlite:///{directory / "test_local.db"}',
+            'online': f'sqlite:///{directory / "test_online.db"}'
+        }
+
+    return create_app(Config)
+
+
+@pytest.fixture
+def session(app):
+    """Banco recriado a cada teste, com uma licença, um administrador, um usuário comum e um gerente"""
+    # O ID do produto de pagamento de fiado guardado no processo é de um banco anterior
+    credit_ledger._payment_product_id = None
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(License(license_key='TESTE-1', client_name='Cliente', client_email='cliente@exemplo.com',
+                               expiry_date=datetime.utcnow() + timedelta(days=30)))
+        db.session.add(User(username='caixa', email='caixa@exemplo.com', password=generate_password_hash(PASSWORD),
+                            role='user', license_key='TESTE-1'))
+        db.session.add(User(username='admin', email='admin@exemplo.com', password=generate_password_hash(PASSWORD),
+                            is_admin=True, role='admin'))
+        db.session.add(User(username='gerente', email='gerente@exemplo.com', password=generate_password_hash(PASSWORD),
+                            role='manager', license_key='TESTE-1'))
+        db.session.commit()
+        yield db.session
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app, session):
+    return app.test_client()
+
+
+def csrf_token(client, path):
+    """Token CSRF da página (os formulários com Meta.csrf exigem o token mesmo nos testes)"""
+    html = client.get(path).get_data(as_text=True)
+    token = re.search(r'name="csrf_token"[^>]*value="([^"]+)"', html) or \
+        re.search(r'value="([^"]+)"[^>]*name="csrf_token"', html)
+    return token.group(1) if token else ''
+
+
+def login(client, username):
+    """Autentica o usuário no cliente de testes"""
+    response = client.post('/login', data={'username': username, 'password': PASSWORD,
+                                           'csrf_token': csrf_token(client, '/login')})
+    assert response.status_code == 302
+    return User.query.filter_by(username=username).one()
\ No newline at end of file
@@ -0,0 +1,69 @@
+import threading
+import time
+from datetime import datetime
+
+from app.models import ActivityLog
+from app.utils.logger import ActivityLogger
+
+
+def make_entry(number):
+    return {
+        'user_id': '1',
+        'action': f'Ação {number}',
+        'endpoint': 'main.index',
+        'ip_address': '127.0.0.1',
+        'user_agent': 'pytest',
+        'details': '',
+        'created_at': datetime.utcnow()
+    }
+
+
+def make_logger(app):
+    logger = ActivityLogger(batch_size=20, flush_interval=0.01)
+    logger.app = app
+    logger.persist_to_db = True
+    return logger
+
+
+def test_flush_waits_for_the_batch_being_written(app, session, monkeypatch):
+    logger = make_logger(app)
+    write_batch = logger._write_batch
+
+    def slow_write(batch):
+        # O lote já saiu da fila, mas ainda não foi gravado
+        time.sleep(0.2)
+        write_batch(batch)
+
+    monkeypatch.setattr(logger, '_write_batch', slow_write)
+    for number in range(50):
+        assert logger.log(make_entry(number))
+
+    assert logger.flush(timeout=10)
+    session.expire_all()
+    assert ActivityLog.query.count() == 50
+    stats = logger.stats()
+    assert stats['pending'] == 0
+    assert stats['written'] == stats['enqueued'] == 50
+    logger.shutdown()
+
+
+def test_counters_from_several_threads(app, session):
+    logger = make_logger(app)
+    logger.persist_to_db = False
+
+    def produce():
+        for number in range(500):
+            logger.log(make_entry(number))
+
+    threads = [threading.Thread(target=produce) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert logger.flush(timeout=30)
+    stats = logger.stats()
+    assert stats['enqueued'] + stats['dropped'] == 8 * 500
+    assert stats['written'] == stats['enqueued']
+    assert stats['pending'] == 0
+    logger.shutdown()
\ No newline at end of file
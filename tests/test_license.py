@@ -0,0 +1,49 @@
+import time
+
+from app.models import License
+from app.utils.license_manager import license_manager
+from app.utils.license_refresher import license_refresher
+
+
+def slow_validation(delay, valid=True):
+    def validate(license_key):
+        time.sleep(delay)
+        return valid, 'Licença válida no servidor' if valid else 'Licença inválida'
+    return validate
+
+
+def test_first_check_of_unknown_license_is_capped(session, monkeypatch):
+    # Servidor de licenças mais lento que a espera máxima da requisição
+    monkeypatch.setattr(license_manager, 'validate_license_online', slow_validation(1.0))
+    monkeypatch.setattr(license_refresher, 'first_check_wait', 0.1)
+
+    start = time.monotonic()
+    status = license_manager.local_license_status('NOVA-LENTA')
+    assert time.monotonic() - start < 0.5
+    assert status['valid'] is False
+    assert status['pending'] is True
+
+    # A validação continua em background e libera o próximo acesso
+    assert license_refresher.wait(5)
+    status = license_manager.local_license_status('NOVA-LENTA')
+    assert status['valid'] is True
+    session.expire_all()
+    assert License.query.filter_by(license_key='NOVA-LENTA').first() is not None
+
+
+def test_first_check_of_unknown_license_within_wait(session, monkeypatch):
+    monkeypatch.setattr(license_manager, 'validate_license_online', slow_validation(0.05))
+    monkeypatch.setattr(license_refresher, 'first_check_wait', 2.0)
+
+    status = license_manager.local_license_status('NOVA-RAPIDA')
+    assert status['valid'] is True
+    assert 'pending' not in status
+
+
+def test_unknown_license_invalid_online(session, monkeypatch):
+    monkeypatch.setattr(license_manager, 'validate_license_online', slow_validation(0, valid=False))
+    monkeypatch.setattr(license_refresher, 'first_check_wait', 2.0)
+
+    status = license_manager.local_license_status('NOVA-INVALIDA')
+    assert status['valid'] is False
+    assert 'pending' not in status
\ No newline at end of file
@@ -0,0 +1,27 @@
+from tests.conftest import login
+
+LOOPBACK = {'REMOTE_ADDR': '127.0.0.1'}
+
+
+def test_metrics_without_token_requires_admin(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', None)
+    # Atrás de um proxy local todas as requisições chegam da própria máquina
+    assert client.get('/metrics', environ_base=LOOPBACK).status_code == 403
+
+    login(client, 'caixa')
+    assert client.get('/metrics', environ_base=LOOPBACK).status_code == 403
+
+
+def test_metrics_without_token_allows_admin(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', None)
+    login(client, 'admin')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+
+
+def test_metrics_with_token(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 'segredo')
+    assert client.get('/metrics', environ_base=LOOPBACK).status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer errado'}).status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer segredo'}).status_code == 200
\ No newline at end of file
@@ -0,0 +1,50 @@
+import random
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from app.utils.money import to_cents, from_cents, percent_of
+
+SEEDS = range(5)
+
+
+def reference_percent(cents, percentage):
+    """Percentual calculado com frações exatas, meio centavo arredondado para cima"""
+    value = Fraction(cents) * Fraction(str(percentage)) / 100
+    return int(value + Fraction(1, 2)) if value >= 0 else -int(-value + Fraction(1, 2))
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_cents_round_trip(seed):
+    rng = random.Random(seed)
+    for _ in range(2000):
+        cents = rng.randint(-10 ** 9, 10 ** 9)
+        assert to_cents(from_cents(cents)) == cents
+        # Valores digitados com duas casas (texto, Decimal ou float) chegam exatos em centavos
+        text = f'{"-" if cents < 0 else ""}{abs(cents) // 100}.{abs(cents) % 100:02d}'
+        assert to_cents(text) == cents
+        assert to_cents(Decimal(text)) == cents
+        assert to_cents(float(text)) == cents
+
+
+def test_to_cents_rounds_half_up():
+    assert to_cents('0.005') == 1
+    assert to_cents('0.004') == 0
+    assert to_cents('-0.005') == -1
+    assert to_cents(None) is None
+    assert from_cents(None) is None
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_percent_of(seed):
+    rng = random.Random(seed)
+    for _ in range(2000):
+        cents = rng.randint(0, 10 ** 8)
+        percentage = round(rng.uniform(0, 100), rng.choice([0, 1, 2]))
+        discount = percent_of(cents, percentage)
+        assert discount == reference_percent(cents, percentage)
+        assert 0 <= discount <= cents
+        assert percent_of(cents, 0) == 0
+        assert percent_of(cents, None) == 0
+        assert percent_of(cents, 100) == cents
\ No newline at end of file
@@ -0,0 +1,65 @@
+import pytest
+
+from app.models import Product
+from app.utils.product_search import ProductSearchIndex
+
+
+def search_ids(index, query):
+    return index.search(query)[1]
+
+
+@pytest.mark.parametrize('rebuild', [False, True])
+def test_changes_during_build_are_kept(session, monkeypatch, rebuild):
+    rice = Product(name='Arroz', price=10.0, quantity=5)
+    beans = Product(name='Feijão', price=8.0, quantity=5)
+    session.add_all([rice, beans])
+    session.commit()
+
+    index = ProductSearchIndex(refresh_interval=0)
+    if rebuild:
+        index.build()
+    # Busca no índice (nunca no banco) para verificar o que a construção deixou
+    monkeypatch.setattr(index, '_ensure_built', lambda: True)
+
+    pasta = Product(name='Macarrão', price=6.0, quantity=5)
+
+    def change_catalog():
+        # Alterações confirmadas depois da leitura dos produtos pela construção
+        session.add(pasta)
+        beans.name = 'Lentilha'
+        session.delete(rice)
+        session.commit()
+        index.add_or_update(pasta)
+        index.add_or_update(beans)
+        index.remove(rice.id)
+
+    original = ProductSearchIndex._add_document
+    state = {'changed': False}
+
+    def add_document(self, *args, **kwargs):
+        if self is not index and not state['changed']:
+            state['changed'] = True
+            change_catalog()
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(ProductSearchIndex, '_add_document', add_document)
+    index.build()
+
+    assert state['changed']
+    assert search_ids(index, 'macarrao') == [pasta.id]
+    assert search_ids(index, 'lentilha') == [beans.id]
+    assert search_ids(index, 'feijao') == []
+    assert search_ids(index, 'arroz') == []
+    assert index._build_logs == []
+
+
+def test_change_without_build_is_read_by_the_build(session):
+    product = Product(name='Café', price=15.0, quantity=5)
+    session.add(product)
+    session.commit()
+
+    index = ProductSearchIndex()
+    index.add_or_update(product)
+    assert index.stats()['products'] == 0
+    index.build()
+    assert index.search('cafe')[1] == [product.id]
\ No newline at end of file
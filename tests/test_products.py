@@ -0,0 +1,66 @@
+from app.models import Product
+from app.utils import credit_ledger
+from tests.conftest import csrf_token, login
+
+
+def payment_product(session):
+    credit_ledger.payment_product_id()
+    session.commit()
+    # ID guardado no processo, como após o primeiro pagamento de fiado
+    return session.get(Product, credit_ledger.payment_product_id())
+
+
+def edit(client, product, name):
+    path = f'/products/edit/{product.id}'
+    return client.post(path, data={
+        'csrf_token': csrf_token(client, path),
+        'name': name,
+        'description': product.description or '',
+        'price': product.price,
+        'quantity': product.quantity,
+        'category': product.category or '',
+        'barcode': product.barcode or ''
+    })
+
+
+def test_payment_product_cannot_be_renamed_or_deleted(client, session):
+    login(client, 'admin')
+    product = payment_product(session)
+
+    edit(client, product, 'Produto renomeado')
+    session.expire_all()
+    assert session.get(Product, product.id).name == credit_ledger.PAYMENT_PRODUCT_NAME
+
+    response = client.post(f'/products/delete/{product.id}')
+    assert response.status_code == 302
+    session.expire_all()
+    assert session.get(Product, product.id) is not None
+    assert credit_ledger.payment_product_id() == product.id
+
+
+def test_renamed_payment_product_cannot_be_deleted(client, session):
+    login(client, 'admin')
+    product = payment_product(session)
+    # Renomeado diretamente no banco (ex.: antes desta proteção existir)
+    product.name = 'Produto renomeado'
+    session.commit()
+
+    client.post(f'/products/delete/{product.id}')
+    session.expire_all()
+    assert session.get(Product, product.id) is not None
+
+
+def test_other_products_can_be_renamed_and_deleted(client, session):
+    login(client, 'admin')
+    payment_product(session)
+    product = Product(name='Refrigerante', price=5.0, quantity=10)
+    session.add(product)
+    session.commit()
+
+    edit(client, product, 'Refrigerante lata')
+    session.expire_all()
+    assert session.get(Product, product.id).name == 'Refrigerante lata'
+
+    client.post(f'/products/delete/{product.id}')
+    session.expire_all()
+    assert session.get(Product, product.id) is None
\ No newline at end of file
@@ -0,0 +1,162 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, update
+
+from app.models import Cashier, CashierTransaction, ConsumptionRecord, CustomerCredit, Product, Sale, User
+from app.utils import cashier_ledger, credit_ledger, sales_rollup
+from app.utils.checkout import checkout_service
+from app.utils.money import to_cents, from_cents
+from tests.conftest import login
+
+SEEDS = range(5)
+
+# Percentuais de desconto sorteados nas cestas (inclui valores com dízima)
+DISCOUNTS = (0, 0, 1.5, 3.3, 5, 7.25, 10, 33.33)
+
+
+def make_products(session, rng, count=20):
+    products = [
+        Product(name=f'Produto {i}', price=from_cents(rng.randint(1, 99999)), quantity=10 ** 6)
+        for i in range(count)
+    ]
+    session.add_all(products)
+    session.commit()
+    return products
+
+
+def open_cashier(session, user, initial_cents):
+    cashier = Cashier(user_id=user.id, initial_amount=from_cents(initial_cents), status='open')
+    session.add(cashier)
+    session.flush()
+    cashier_ledger.record_transaction(cashier, 'entry', from_cents(initial_cents), 'Abertura de caixa')
+    session.commit()
+    return cashier
+
+
+def random_basket(rng, products):
+    return [
+        {
+            'product_id': rng.choice(products).id,
+            'quantity': rng.randint(1, 9),
+            'discount_percentage': rng.choice(DISCOUNTS)
+        }
+        for _ in range(rng.randint(1, 5))
+    ]
+
+
+def sum_cents(session, column, *conditions):
+    """Soma (SQL) de uma coluna monetária, em centavos"""
+    return to_cents(session.query(func.coalesce(func.sum(column), 0)).filter(*conditions).scalar())
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_rollup_matches_sales(session, seed):
+    rng = random.Random(seed)
+    user = User.query.filter_by(username='caixa').one()
+    products = make_products(session, rng)
+    cashiers = [open_cashier(session, user, rng.randint(0, 50000)) for _ in range(2)]
+
+    for _ in range(120):
+        checkout_service.checkout(random_basket(rng, products), rng.choice(cashiers))
+        session.commit()
+
+    # Parte das vendas passa para dias anteriores, lidos do resumo diário reconstruído
+    today = datetime.utcnow().date()
+    sale_ids = [sale_id for (sale_id,) in session.query(Sale.id)]
+    for sale_id in rng.sample(sale_ids, len(sale_ids) // 2):
+        session.execute(update(Sale).where(Sale.id == sale_id)
+                        .values(sale_date=datetime.utcnow() - timedelta(days=rng.randint(1, 40))))
+    session.commit()
+    sales_rollup.rebuild(end_day=today)
+
+    assert to_cents(sales_rollup.summarize_sales()['net']) == sum_cents(session, Sale.final_price)
+    for cashier in cashiers:
+        assert to_cents(sales_rollup.summarize_sales(cashier_id=cashier.id)['net']) == \
+            sum_cents(session, Sale.final_price, Sale.cashier_id == cashier.id)
+    # Apenas os dias anteriores (somente o resumo diário)
+    assert to_cents(sales_rollup.summarize_sales(end_day=today)['net']) == \
+        sum_cents(session, Sale.final_price, Sale.sale_date < datetime.combine(today, datetime.min.time()))
+    # Cada venda: total menos desconto é exatamente o valor final
+    for total, discount, final in session.query(Sale.total_price, Sale.discount_amount, Sale.final_price):
+        assert to_cents(total) - to_cents(discount or 0) == to_cents(final)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_cashier_reconciles_after_close(client, session, seed):
+    rng = random.Random(seed)
+    user = login(client, 'caixa')
+    products = make_products(session, rng)
+    initial = rng.randint(0, 50000)
+    cashier = open_cashier(session, user, initial)
+
+    expected = {'sales': 0, 'expenses': 0, 'balance': initial}
+    for _ in range(80):
+        if rng.random() < 0.7:
+            sales = checkout_service.checkout(random_basket(rng, products), cashier)
+            session.commit()
+            cents = sum(to_cents(sale.final_price) for sale in sales)
+            expected['sales'] += cents
+            expected['balance'] += cents
+        else:
+            transaction_type = rng.choice(['expense', 'expense', 'exit', 'entry'])
+            cents = rng.randint(1, 20000)
+            cashier_ledger.record_transaction(cashier, transaction_type, from_cents(cents), 'Lançamento de teste')
+            session.commit()
+            if transaction_type == 'expense':
+                expected['expenses'] += cents
+            expected['balance'] += cashier_ledger.TRANSACTION_SIGNS[transaction_type] * cents
+
+    response = client.post(f'/cashier/close/{cashier.id}')
+    assert response.status_code == 302
+
+    session.expire_all()
+    cashier = session.get(Cashier, cashier.id)
+    assert cashier.status == 'closed'
+    assert to_cents(cashier.total_sales) == expected['sales']
+    assert to_cents(cashier.total_expenses) == expected['expenses']
+    assert to_cents(cashier.balance) == expected['balance']
+    assert to_cents(cashier.final_amount) == expected['balance']
+    assert sum_cents(session, CashierTransaction.amount, CashierTransaction.transaction_type == 'sale') == \
+        sum_cents(session, Sale.final_price)
+    assert cashier_ledger.reconcile(include_closed=True) == []
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_credit_reconciles_after_settle(session, seed):
+    rng = random.Random(seed)
+    customers = [CustomerCredit(name=f'Cliente {i}') for i in range(4)]
+    session.add_all(customers)
+    session.commit()
+
+    pending = {customer.id: 0 for customer in customers}
+    for _ in range(150):
+        customer = rng.choice(customers)
+        if rng.random() < 0.65 or not pending[customer.id]:
+            cents = rng.randint(1, 30000)
+            credit_ledger.add_consumption(customer, 'Consumo de teste', from_cents(cents))
+            pending[customer.id] += cents
+        else:
+            # Pagamento parcial, total (sem valor) ou maior que a dívida
+            choice = rng.random()
+            if choice < 0.7:
+                amount = rng.randint(1, pending[customer.id])
+            elif choice < 0.85:
+                amount = None
+            else:
+                amount = pending[customer.id] + rng.randint(1, 5000)
+            settled = credit_ledger.settle(customer, None if amount is None else from_cents(amount))
+            expected_settled = pending[customer.id] if amount is None else min(amount, pending[customer.id])
+            assert to_cents(settled) == expected_settled
+            pending[customer.id] -= expected_settled
+        session.commit()
+
+        assert credit_ledger.reconcile() == []
+
+    session.expire_all()
+    for customer in customers:
+        assert to_cents(session.get(CustomerCredit, customer.id).total_debt) == pending[customer.id]
+        unpaid = ConsumptionRecord.paid.is_(False) | ConsumptionRecord.paid.is_(None)
+        assert sum_cents(session, ConsumptionRecord.total_value,
+                         ConsumptionRecord.customer_id == customer.id, unpaid) == pending[customer.id]
\ No newline at end of file
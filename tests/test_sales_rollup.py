@@ -0,0 +1,84 @@
+from datetime import datetime, date
+
+from sqlalchemy import func, inspect, text
+
+from app import db
+from app.migrations import _daily_sales_rollup_unique_key
+from app.models import DailySalesRollup, Product, Sale
+from app.utils import sales_rollup
+
+
+def make_sale(product, cashier_id=None, total=10.0, discount=0.0, quantity=1):
+    return Sale(product_id=product.id, cashier_id=cashier_id, quantity=quantity, total_price=total,
+                discount_percentage=0.0, discount_amount=discount,
+                final_price=total - discount, sale_date=datetime.utcnow())
+
+
+def test_record_sales_keeps_one_row_per_key(session):
+    product = Product(name='Arroz', price=10.0, quantity=100)
+    session.add(product)
+    session.commit()
+
+    for cashier_id in (None, None, 7, 7, 7):
+        sales_rollup.record_sales([make_sale(product, cashier_id, total=10.0, discount=0.25)])
+        session.commit()
+    # Várias vendas do mesmo produto em um único registro
+    sales_rollup.record_sales([make_sale(product, 7, total=3.5), make_sale(product, 7, total=1.15)])
+    session.commit()
+
+    rows = {row.cashier_id: row for row in DailySalesRollup.query.all()}
+    assert set(rows) == {sales_rollup.NO_CASHIER_ID, 7}
+    assert rows[sales_rollup.NO_CASHIER_ID].sale_count == 2
+    assert rows[sales_rollup.NO_CASHIER_ID].net == 19.5
+    assert rows[7].sale_count == 5
+    assert rows[7].gross == 34.65
+    assert rows[7].discount == 0.75
+    assert rows[7].net == 33.9
+
+
+def test_unique_key_migration_merges_duplicates(session):
+    session.close()
+    with db.engine.begin() as connection:
+        # Tabela no formato anterior: caixa opcional e índice da chave não único
+        DailySalesRollup.__table__.drop(bind=connection)
+        connection.execute(text('''
+            CREATE TABLE daily_sales_rollup (
+                id INTEGER PRIMARY KEY, day DATE NOT NULL, user_id INTEGER, cashier_id INTEGER,
+                product_id INTEGER NOT NULL, sale_count INTEGER NOT NULL, quantity INTEGER NOT NULL,
+                gross BIGINT NOT NULL, discount BIGINT NOT NULL, net BIGINT NOT NULL
+            )
+        '''))
+        connection.execute(text(
+            'CREATE INDEX ix_daily_sales_rollup_day_cashier_product ON daily_sales_rollup (day, cashier_id, product_id)'
+        ))
+        rows = [
+            (1, 2, 1, 1, 3, 1000, 100, 900),
+            (2, 2, 1, 2, 5, 2000, 0, 2000),
+            (3, 2, 2, 1, 1, 150, 0, 150),
+            (4, None, None, 1, 1, 500, 0, 500),
+            (5, None, None, 1, 2, 700, 50, 650),
+        ]
+        for row_id, user_id, cashier_id, sale_count, quantity, gross, discount, net in rows:
+            connection.execute(text('''
+                INSERT INTO daily_sales_rollup VALUES
+                (:id, :day, :user_id, :cashier_id, 9, :sale_count, :quantity, :gross, :discount, :net)
+            '''), {'id': row_id, 'day': date(2024, 5, 1), 'user_id': user_id, 'cashier_id': cashier_id,
+                   'sale_count': sale_count, 'quantity': quantity, 'gross': gross, 'discount': discount, 'net': net})
+
+        _daily_sales_rollup_unique_key(connection)
+        # Idempotente: uma segunda execução não altera nada
+        _daily_sales_rollup_unique_key(connection)
+
+        indexes = {item['name']: item for item in inspect(connection).get_indexes('daily_sales_rollup')}
+        assert indexes['ix_daily_sales_rollup_day_cashier_product']['unique']
+        merged = connection.execute(text('''
+            SELECT id, cashier_id, sale_count, quantity, gross, discount, net
+            FROM daily_sales_rollup ORDER BY id
+        ''')).fetchall()
+    assert [tuple(row) for row in merged] == [
+        (1, 1, 3, 8, 3000, 100, 2900),
+        (3, 2, 1, 1, 150, 0, 150),
+        (4, 0, 2, 3, 1200, 50, 1150),
+    ]
+    # Lido pelo modelo, em reais
+    assert session.query(func.sum(DailySalesRollup.net)).scalar() == 42.0
\ No newline at end of file
@@ -0,0 +1,24 @@
+import os
+from dotenv import load_dotenv
+
+# Carregar variáveis de ambiente do arquivo .env ANTES de importar outros módulos
+load_dotenv()
+
+from app import create_app
+from app.config import ProductionConfig
+from app.utils.logger import setup_logger
+
+# Ponto de entrada de produção: a aplicação é criada uma única vez (no processo principal,
+# com preload) sem tocar no banco de dados. As migrações e o usuário admin são preparados
+# antes, com "flask --app wsgi prepare-db".
+app = create_app(ProductionConfig)
+
+# Configurar logging
+setup_logger(app)
+
+if __name__ == '__main__':
+    # Servidor multithread em um único processo (Windows ou sem gunicorn):
+    # python wsgi.py. Com gunicorn: gunicorn -c gunicorn.conf.py wsgi:app
+    from waitress import serve
+    serve(app, host=os.environ.get('HOST', '0.0.0.0'), port=int(os.environ.get('PORT', 5007)),
+          threads=int(os.environ.get('WEB_THREADS', 4)))
\ No newline at end of file